@@ -0,0 +1,124 @@
+"""
+Benchmark des moteurs d'extraction des paragraphes (html_paragraphs.py)
+Corpus: pages gratis.bible du cache HTTP local (remplies par complete-jerusalem-web.py),
+ou un répertoire de fichiers .htm, ou à défaut des pages synthétiques au même format
+Pour chaque moteur installé: pages/s, Mo/s, et pages dont les versets extraits
+diffèrent de la référence BeautifulSoup (html.parser)
+
+Usage: python scripts/bench-html-extract.py [--corpus DIR] [--synthetic 1200] [--repeat 3]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+from html_paragraphs import BACKENDS, available, get_extractor
+from http_cache import HttpCache
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+GRATIS_PREFIX = 'https://gratis.bible/fr/dejer/'
+# Même motif que scrape_chapter() dans complete-jerusalem-web.py
+VERSE_PARAGRAPH = re.compile(r'^(\d+)\s+(.+)')
+
+WORDS = ("Au commencement Dieu créa le ciel et la terre Or la terre était vide et vague "
+         "les ténèbres couvraient l'abîme un vent de Dieu tournoyait sur les eaux").split()
+
+
+def load_corpus(directory: str) -> List[str]:
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.htm', '.html')):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    return pages
+
+
+def cached_pages() -> List[str]:
+    return [r.text for r in HttpCache().cached_responses(GRATIS_PREFIX) if r.status_code == 200]
+
+
+def make_pages(n_pages: int, seed: int = 42) -> List[str]:
+    """Pages de chapitre: en-tête, navigation, ~30 versets avec notes et entités, pied de page"""
+    rng = random.Random(seed)
+    pages = []
+    for n in range(n_pages):
+        nav = ''.join(f'<li><a href="../{c}/1.htm">{c}</a></li>' for c in ('gen', 'exod', 'lev', 'num', 'deut'))
+        verses = []
+        for verse in range(1, rng.randint(15, 50)):
+            words = rng.choices(WORDS, k=rng.randint(12, 40))
+            i = rng.randrange(len(words))
+            words[i] = f'<i>{words[i]}</i>'
+            text = ' '.join(words).replace(' et ', ' &amp; ', 1)
+            note = f'<span class="note"><a href="#n{verse}">{verse}</a></span>' if rng.random() < 0.2 else ''
+            verses.append(f'<p class="v" id="v{verse}">{verse} {text}&nbsp;;{note}</p>\n')
+            if rng.random() < 0.05:
+                verses.append(f'<!-- section --><p class="titre">{" ".join(rng.choices(WORDS, k=4))}</p>\n')
+        pages.append(
+            '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Genèse ' + str(n + 1) + '</title>'
+            '<link rel="stylesheet" href="/s.css"><style>p.v{margin:0}</style></head><body>'
+            f'<div class="nav"><ul>{nav}</ul></div><h1>Genèse {n + 1}</h1><div class="chapitre">\n'
+            + ''.join(verses) +
+            '</div><div class="pied"><p>Bible de Jérusalem &copy; gratis.bible</p></div>'
+            '<script>var chapitre = "<p>" + 1;</script></body></html>'
+        )
+    return pages
+
+
+def verses_of(paragraphs: List[str]) -> List[tuple]:
+    return [(int(m.group(1)), m.group(2)) for m in map(VERSE_PARAGRAPH.match, paragraphs) if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'extraction HTML")
+    parser.add_argument('--corpus', help="répertoire de pages .htm (défaut: cache HTTP, sinon synthétique)")
+    parser.add_argument('--synthetic', type=int, default=1200, help="pages synthétiques si aucun corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="passes par moteur (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages, source = load_corpus(args.corpus), args.corpus
+    else:
+        pages, source = cached_pages(), 'cache HTTP (gratis.bible)'
+        if not pages:
+            pages, source = make_pages(args.synthetic), 'pages synthétiques'
+    if not pages:
+        print("❌ Corpus vide")
+        sys.exit(1)
+
+    size_mb = sum(len(p.encode('utf-8')) for p in pages) / 1e6
+    print(f"📊 {len(pages)} pages ({size_mb:.1f} Mo), source: {source}\n")
+
+    backends = [b for b in BACKENDS if available(b)]
+    missing = [b for b in BACKENDS if b not in backends]
+    reference = [verses_of(p) for p in map(get_extractor('bs4'), pages)] if 'bs4' in backends else None
+
+    print(f"{'moteur':<11} {'pages/s':>9} {'Mo/s':>7} {'ms/page':>8} {'versets':>8} {'écarts':>7}")
+    for backend in backends:
+        extract = get_extractor(backend)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = [extract(p) for p in pages]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        verses = [verses_of(r) for r in results]
+        differing = sum(v != ref for v, ref in zip(verses, reference)) if reference else '-'
+        print(f"{backend:<11} {len(pages) / best:>9.0f} {size_mb / best:>7.1f} {best / len(pages) * 1e3:>8.2f} "
+              f"{sum(map(len, verses)):>8} {differing:>7}")
+
+    if missing:
+        print(f"\n⚠ Non installés: {', '.join(missing)}")
+    if reference is None:
+        print("⚠ bs4 absent: pas de comparaison avec la référence")
+
+
+if __name__ == "__main__":
+    main()
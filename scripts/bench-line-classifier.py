@@ -0,0 +1,161 @@
+"""
+Micro-benchmark de la classification des lignes de import-jerusalem-v2.py
+Compare l'ancienne cascade de re.match à LineClassifier sur des lignes synthétiques
+et, si un PDF est fourni, sur ses lignes réelles (texte relu depuis le cache des pages)
+Les deux doivent rendre exactement les mêmes décisions
+
+Usage: python scripts/bench-line-classifier.py [--lines 200000] [--pdf Bible_de_Jerusalem.pdf] [--show 40]
+"""
+
+import os
+import re
+import ast
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+from line_classifier import (BOOK, CHAPTER_HEADING, CHAPTER_NUMBER, UNKNOWN,
+                             VERSE_A, VERSE_B, VERSE_C, VERSE_D, LineClassifier)
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+WORDS = ("Au commencement Dieu créa le ciel et la terre Or la terre était vide et vague "
+         "les ténèbres couvraient l'abîme un vent de Dieu tournoyait sur les eaux").split()
+
+
+def load_book_names() -> List[str]:
+    """Noms de livres de BOOK_MAPPING, lus dans import-jerusalem-v2.py sans l'exécuter"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import-jerusalem-v2.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'BOOK_MAPPING' for t in node.targets):
+            return list(ast.literal_eval(node.value).keys())
+    raise RuntimeError("BOOK_MAPPING introuvable dans import-jerusalem-v2.py")
+
+
+class LegacyClassifier:
+    """Ancienne cascade de parse_pdf_improved (référence), mêmes tokens que LineClassifier"""
+
+    def __init__(self, book_names):
+        self.book_names = set(book_names)
+        self.current_book = None
+        self.current_chapter = None
+
+    def feed(self, line):
+        if re.match(r'^[A-ZÂÊÎÔÛÀÙÇÉÈ\s]+$', line) and len(line) < 40:
+            if line.strip() in self.book_names:
+                self.current_book, self.current_chapter = line.strip(), None
+                return (BOOK, line.strip())
+
+        chapter_match = re.match(r'^Chapitre\s+(\d+)', line, re.IGNORECASE)
+        if chapter_match:
+            self.current_chapter = int(chapter_match.group(1))
+            return (CHAPTER_HEADING, self.current_chapter)
+
+        if line.isdigit() and int(line) < 200:
+            self.current_chapter = int(line)
+            return (CHAPTER_NUMBER, self.current_chapter)
+
+        a = re.match(r'^([A-Z][a-zàâéèêëîïôûùüç\s\'\-]+?)\s+(\d+)[\.,]\s*(\d+)\s+(.+)$', line)
+        if a and a.group(1).strip() in self.book_names:
+            self.current_book, self.current_chapter = a.group(1).strip(), int(a.group(2))
+            return (VERSE_A, self.current_book, self.current_chapter, int(a.group(3)), a.group(4).strip())
+
+        b = re.match(r'^(\d+)[\.,]\s*(\d+)\s+(.+)$', line)
+        if b and self.current_book:
+            self.current_chapter = int(b.group(1))
+            return (VERSE_B, self.current_book, self.current_chapter, int(b.group(2)), b.group(3).strip())
+
+        if self.current_book:
+            c = re.match(r'^(\d+)\.\s+(.+)$', line)
+            if c and self.current_chapter:
+                return (VERSE_C, self.current_book, self.current_chapter, int(c.group(1)), c.group(2).strip())
+            d = re.match(r'^(\d+)\s+([A-Z].+)$', line)
+            if d and self.current_chapter and int(d.group(1)) < 200:
+                return (VERSE_D, self.current_book, self.current_chapter, int(d.group(1)), d.group(2).strip())
+
+        return (UNKNOWN,)
+
+
+def synthetic_lines(n: int, book_names: List[str], seed: int = 7) -> List[str]:
+    """Mélange des formes rencontrées dans le PDF (en-têtes, numéros, versets, notes)"""
+    rng = random.Random(seed)
+
+    def words(k):
+        return ' '.join(rng.choices(WORDS, k=k))
+
+    makers = [
+        lambda: f"{rng.choice(book_names)} {rng.randint(1, 50)}, {rng.randint(1, 40)} {words(9)}",
+        lambda: f"{rng.randint(1, 50)}, {rng.randint(1, 40)} {words(9)}",
+        lambda: f"{rng.randint(1, 40)}. {words(9)}",
+        lambda: f"{rng.randint(1, 40)} {words(9)}",
+        lambda: f"Chapitre {rng.randint(1, 50)}",
+        lambda: str(rng.randint(1, 250)),
+        lambda: rng.choice(book_names).upper(),
+        lambda: words(12),
+        lambda: f"Cf. {rng.choice(book_names)} {rng.randint(1, 50)}, {rng.randint(1, 40)}",
+    ]
+    weights = [10, 10, 10, 25, 2, 3, 1, 35, 4]
+    return [rng.choices(makers, weights)[0]() for _ in range(n)]
+
+
+def pdf_lines(pdf_path: str) -> List[str]:
+    from pdf_pages import iter_page_texts
+    lines = []
+    for _, text in iter_page_texts(pdf_path, layout=True):
+        for line in (text or '').split('\n'):
+            line = line.strip()
+            if line:
+                lines.append(line)
+    return lines
+
+
+def run(classifier, lines):
+    start = time.perf_counter()
+    tokens = [classifier.feed(line) for line in lines]
+    return tokens, time.perf_counter() - start
+
+
+def bench(label: str, lines: List[str], book_names: List[str], show: int) -> None:
+    legacy_tokens, t_old = run(LegacyClassifier(book_names), lines)
+    classifier = LineClassifier(book_names)
+    tokens, t_new = run(classifier, lines)
+
+    for i, (expected, got) in enumerate(zip(legacy_tokens, tokens)):
+        if expected != got:
+            print(f"❌ {label}: décision différente ligne {i}: {lines[i]!r}")
+            print(f"   ancien: {expected}\n   nouveau: {got}")
+            sys.exit(1)
+
+    n = len(lines)
+    print(f"\n📊 {label}: {n} lignes")
+    print(f"   ancien      {t_old:7.3f}s  {n / t_old:>10,.0f} lignes/s")
+    print(f"   classifieur {t_new:7.3f}s  {n / t_new:>10,.0f} lignes/s  (x{t_old / t_new:.1f})")
+    print(f"   {classifier.report()}")
+    for line, token in list(zip(lines, tokens))[:show]:
+        print(f"   {token[0]:<16} {line[:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark du classifieur de lignes")
+    parser.add_argument('--lines', type=int, default=200000, help="nombre de lignes synthétiques")
+    parser.add_argument('--pdf', help="PDF de la Bible de Jérusalem pour mesurer sur les lignes réelles")
+    parser.add_argument('--show', type=int, default=0, help="afficher la décision des N premières lignes")
+    args = parser.parse_args()
+
+    book_names = load_book_names()
+    bench('synthétique', synthetic_lines(args.lines, book_names), book_names, args.show)
+    if args.pdf:
+        bench(f"réel ({os.path.basename(args.pdf)})", pdf_lines(args.pdf), book_names, args.show)
+
+    print("\n✓ Décisions identiques")
+
+
+if __name__ == "__main__":
+    main()
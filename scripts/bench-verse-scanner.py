@@ -0,0 +1,151 @@
+"""
+Benchmark du découpage en versets: ancien parseur (re-scan du buffer) vs VerseScanner
+Entrée synthétique de N pages au format de la Bible de Jérusalem, profils selon la
+longueur des passages sans en-tête de verset:
+  dense          un en-tête toutes les quelques lignes
+  clairsemé      un en-tête toutes les ~300 lignes (~7 pages)
+  introductions  un en-tête toutes les ~1200 lignes (~30 pages, introductions de livre)
+  longues intros un en-tête toutes les ~4800 lignes (~120 pages)
+L'ancien parseur relit tout le texte en attente à chaque page: son coût par page croît
+avec la longueur du passage, celui du scanner non. Les deux implémentations doivent
+produire exactement les mêmes versets, dont des versets à cheval sur plusieurs pages
+
+Usage: python scripts/bench-verse-scanner.py [--pages 1500]
+"""
+
+import os
+import re
+import ast
+import sys
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+from verse_scanner import clean_verse_text, scan_pages
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+LINES_PER_PAGE = 40
+WORDS_PER_LINE = 10
+# Profil -> nombre moyen de lignes entre deux en-têtes de verset
+PROFILES = (('dense', 4), ('clairsemé', 300), ('introductions', 1200), ('longues intros', 4800))
+
+WORDS = ("et Dieu dit que la lumière soit il y eut un soir puis un matin ce fut le premier jour "
+         "la terre était informe et vide les ténèbres couvraient l'abîme l'esprit planait sur les eaux").split()
+
+
+def load_book_names() -> List[str]:
+    """Noms de livres de BOOK_MAPPING, lus dans import-jerusalem.py sans l'exécuter"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import-jerusalem.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'BOOK_MAPPING' for t in node.targets):
+            return list(ast.literal_eval(node.value).keys())
+    raise RuntimeError("BOOK_MAPPING introuvable dans import-jerusalem.py")
+
+
+def make_pages(n_pages: int, book_names: List[str], verse_every: int, seed: int = 42) -> List[str]:
+    """verse_every: nombre moyen de lignes entre deux en-têtes de verset"""
+    rng = random.Random(seed)
+    pages = []
+    book, chapter, verse = rng.choice(book_names), 1, 1
+    for _ in range(n_pages):
+        lines = []
+        for _ in range(LINES_PER_PAGE):
+            if rng.randrange(verse_every) == 0:
+                verse += 1
+                if verse > 30:
+                    chapter, verse = chapter + 1, 1
+                    lines.append(f"Chapitre {chapter}")
+                    if chapter > 40:
+                        book, chapter = rng.choice(book_names), 1
+                lines.append(f"{book} {chapter}, {verse} " + ' '.join(rng.choices(WORDS, k=8)))
+            else:
+                lines.append(' '.join(rng.choices(WORDS, k=WORDS_PER_LINE)))
+        pages.append('\n'.join(lines))
+    return pages
+
+
+def legacy_parse(pages: List[str], book_names: List[str]) -> List[Tuple[str, int, int, str]]:
+    """Boucle de l'ancien parse_pdf_text (référence)"""
+    sorted_books = sorted(book_names, key=len, reverse=True)
+    verse_start_pattern = re.compile(f"({'|'.join(map(re.escape, sorted_books))})\\s+(\\d+),\\s+(\\d+)")
+    verses = []
+    current_book = current_chapter = current_verse_num = None
+    pending_text_buffer = ""
+
+    for text in pages:
+        if not text:
+            continue
+        full_text = pending_text_buffer + " " + text
+        matches = list(verse_start_pattern.finditer(full_text))
+        if matches:
+            if current_book:
+                final_text = clean_verse_text(full_text[:matches[0].start()])
+                if final_text or current_verse_num:
+                    verses.append((current_book, current_chapter, current_verse_num, final_text))
+            for i, match in enumerate(matches):
+                if i < len(matches) - 1:
+                    content = clean_verse_text(full_text[match.end():matches[i + 1].start()])
+                    verses.append((match.group(1), int(match.group(2)), int(match.group(3)), content))
+                else:
+                    current_book = match.group(1)
+                    current_chapter = int(match.group(2))
+                    current_verse_num = int(match.group(3))
+                    pending_text_buffer = full_text[match.end():]
+        else:
+            pending_text_buffer = full_text
+
+    if current_book and pending_text_buffer:
+        verses.append((current_book, current_chapter, current_verse_num, clean_verse_text(pending_text_buffer)))
+    return verses
+
+
+def multi_page_verses(verses: List[Tuple[str, int, int, str]]) -> int:
+    """Versets dont le texte dépasse deux pages pleines (donc à cheval sur plusieurs pages)"""
+    return sum(1 for v in verses if len(v[3].split()) > 2 * LINES_PER_PAGE * WORDS_PER_LINE)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du découpage en versets")
+    parser.add_argument('--pages', type=int, default=1500, help="nombre de pages par profil")
+    args = parser.parse_args()
+
+    book_names = load_book_names()
+    print(f"📊 {len(book_names)} noms de livres, {args.pages} pages par profil\n")
+    print(f"{'profil':<15} {'pages/en-tête':>13} {'versets':>8} {'scanner (s)':>12} {'µs/page':>8} "
+          f"{'ancien (s)':>11} {'µs/page':>8} {'gain':>6}")
+
+    long_compared = 0
+    for profile, verse_every in PROFILES:
+        pages = make_pages(args.pages, book_names, verse_every)
+        verses, t_new = timed(scan_pages, pages, book_names)
+        expected, t_old = timed(legacy_parse, pages, book_names)
+        if expected != verses:
+            print(f"❌ Résultats différents ({profile})")
+            sys.exit(1)
+        long_compared += multi_page_verses(verses)
+        print(f"{profile:<15} {verse_every / LINES_PER_PAGE:>13.1f} {len(verses):>8} {t_new:>12.3f} "
+              f"{t_new / args.pages * 1e6:>8.0f} {t_old:>11.3f} {t_old / args.pages * 1e6:>8.0f} "
+              f"{t_old / t_new:>5.1f}x")
+
+    if not long_compared:
+        print("❌ Aucun verset sur plusieurs pages comparé à l'ancien parseur")
+        sys.exit(1)
+    print(f"\n✓ Résultats identiques ({long_compared} versets sur plusieurs pages comparés); le coût par "
+          f"page du scanner ne dépend pas de la longueur des passages sans en-tête")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+État du catalogue des versets chargés dans Supabase
+Compte les versets par traduction, livre et chapitre sans télécharger les lignes:
+RPC verse_counts (sql/verse_counts.sql) si disponible, sinon HEAD + Prefer: count=exact
+
+Usage: python scripts/catalog_status.py [translation_id ...]
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from dotenv import load_dotenv
+
+from supabase_rest import create_session
+
+# Nombre de requêtes HEAD simultanées pour le repli sans RPC
+MAX_PARALLEL_COUNTS = 8
+
+
+def parse_content_range(value: Optional[str]) -> Optional[int]:
+    """Extrait le total d'un en-tête Content-Range ('0-24/3573' ou '*/0')"""
+    if not value or '/' not in value:
+        return None
+    total = value.rsplit('/', 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+def count_rows(session: requests.Session, url: str, params: Dict) -> int:
+    """Nombre exact de lignes correspondant aux filtres, via une requête HEAD"""
+    response = session.head(
+        url,
+        params={**params, 'select': 'id'},
+        headers={'Prefer': 'count=exact', 'Range-Unit': 'items', 'Range': '0-0'},
+        timeout=30
+    )
+    if response.status_code not in (200, 206, 416):
+        response.raise_for_status()
+    total = parse_content_range(response.headers.get('Content-Range'))
+    if total is None:
+        raise ValueError(f"Content-Range absent pour {url}")
+    return total
+
+
+class CatalogStatus:
+    """Compteurs de versets chargés: traduction -> livre -> chapitre"""
+
+    def __init__(self, base_url: str, headers: Dict):
+        self.base_url = base_url
+        self.session = create_session(headers, pool_size=MAX_PARALLEL_COUNTS)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def count_verses(self, translation_id: str, book_id: Optional[str] = None,
+                     chapter: Optional[int] = None) -> int:
+        """Nombre de versets d'une traduction (optionnellement d'un livre / chapitre)"""
+        params = {'translation_id': f'eq.{translation_id}'}
+        if book_id:
+            params['book_id'] = f'eq.{book_id}'
+        if chapter is not None:
+            params['chapter'] = f'eq.{chapter}'
+        return count_rows(self.session, f"{self.base_url}/bible_verses", params)
+
+    def book_counts(self, translation_id: str, book_ids: Iterable[str]) -> Dict[str, int]:
+        """Nombre de versets par livre, requêtes HEAD en parallèle"""
+        book_ids = list(book_ids)
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_COUNTS) as pool:
+            counts = pool.map(lambda b: self.count_verses(translation_id, b), book_ids)
+            return dict(zip(book_ids, counts))
+
+    def chapter_counts(self, translation_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Compteurs complets en un seul appel via la RPC verse_counts
+        Retourne {translation_id: {book_id: {chapitre: n}}}, ou None si la RPC n'existe pas
+        """
+        response = self.session.post(
+            f"{self.base_url}/rpc/verse_counts",
+            json={'p_translation_id': translation_id},
+            timeout=60
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        counts: Dict = {}
+        for tid, book_id, chapter, n in response.json() or []:
+            counts.setdefault(tid, {}).setdefault(book_id, {})[chapter] = n
+        return counts
+
+    def translation_summary(self, translation_id: str) -> Dict:
+        """Total et détail par livre/chapitre d'une traduction (RPC, sinon total seul)"""
+        counts = self.chapter_counts(translation_id)
+        if counts is None:
+            return {'total': self.count_verses(translation_id), 'books': None}
+        books = counts.get(translation_id, {})
+        return {
+            'total': sum(n for chapters in books.values() for n in chapters.values()),
+            'books': books,
+        }
+
+
+def main():
+    load_dotenv(dotenv_path='.env.local')
+
+    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL', '')
+    supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY', os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY', ''))
+    if not supabase_url or not supabase_key:
+        print("❌ Erreur: Variables d'environnement Supabase manquantes")
+        sys.exit(1)
+
+    headers = {'apikey': supabase_key, 'Authorization': f'Bearer {supabase_key}'}
+    base = f"{supabase_url}/rest/v1"
+    requested = sys.argv[1:]
+
+    with CatalogStatus(base, headers) as catalog:
+        counts = catalog.chapter_counts(requested[0] if len(requested) == 1 else None)
+        if counts is None:
+            print("⚠ RPC verse_counts absente (voir sql/verse_counts.sql), totaux seuls")
+            for tid in requested or ['crampon', 'jerusalem', 'kjv', 'asv', 'bbe', 'akjv', 'ylt']:
+                print(f"  {tid:<12} {catalog.count_verses(tid):>7} versets")
+            return
+
+        for tid in sorted(counts):
+            if requested and tid not in requested:
+                continue
+            books = counts[tid]
+            total = sum(n for chapters in books.values() for n in chapters.values())
+            n_chapters = sum(len(chapters) for chapters in books.values())
+            print(f"  {tid:<12} {total:>7} versets, {len(books):>2} livres, {n_chapters:>5} chapitres")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,22 @@
 """
 Script de complétion des versets manquants pour Crampon depuis le XML
+Le XML est lu en flux (crampon_xml.py, schéma Zefania BOOK/CHAPTER/VERS ou
+book/chapter/verse détecté automatiquement): chaque verset manquant part
+directement vers l'écriture par lots, la mémoire reste constante
+
+Usage: python scripts/complete-crampon-xml.py [--xml crampon.xml] [--sink copy]
 """
 
 import os
 import sys
-import xml.etree.ElementTree as ET
-import re
+import argparse
 from dotenv import load_dotenv
 import requests
 
+from crampon_xml import book_slug, detect_schema, iter_verses
+from pg_copy_sink import SINKS, open_writer
+from verse_keys import fetch_verse_keys
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -28,82 +36,7 @@ HEADERS = {
     'Prefer': 'return=representation'
 }
 
-# Mapping livres FR -> slug
-BOOK_SLUG_MAP = {
-    'Genèse': 'genese',
-    'Exode': 'exode',
-    'Lévitique': 'levitique',
-    'Nombres': 'nombres',
-    'Deutéronome': 'deuteronome',
-    'Josué': 'josue',
-    'Juges': 'juges',
-    'Ruth': 'ruth',
-    '1 Samuel': '1-samuel',
-    '2 Samuel': '2-samuel',
-    '1 Rois': '1-rois',
-    '2 Rois': '2-rois',
-    '1 Chroniques': '1-chroniques',
-    '2 Chroniques': '2-chroniques',
-    'Esdras': 'esdras',
-    'Néhémie': 'nehemie',
-    'Esther': 'esther',
-    'Job': 'job',
-    'Psaumes': 'psaumes',
-    'Proverbes': 'proverbes',
-    'Qohélet': 'ecclesiaste',
-    'Cantique': 'cantique',
-    'Isaïe': 'eesaie',
-    'Jérémie': 'jeremie',
-    'Lamentations': 'lamentations',
-    'Ézéchiel': 'ezechiel',
-    'Daniel': 'daniel',
-    'Osée': 'osee',
-    'Joël': 'joel',
-    'Amos': 'amos',
-    'Abdias': 'abdias',
-    'Jonas': 'jonas',
-    'Michée': 'michee',
-    'Nahum': 'nahum',
-    'Habaquuc': 'habacuc',
-    'Sophonie': 'sophonie',
-    'Aggée': 'aggee',
-    'Zacharie': 'zacharie',
-    'Malachie': 'malachie',
-    'Tobie': 'tobie',
-    'Judith': 'judith',
-    'Sagesse': 'sagesse',
-    'Siracide': 'siracide',
-    'Baruch': 'baruch',
-    '1 Maccabées': '1-macchabees',
-    '2 Maccabées': '2-macchabees',
-    'Matthieu': 'matthieu',
-    'Marc': 'marc',
-    'Luc': 'luc',
-    'Jean': 'jean',
-    'Actes': 'actes',
-    'Romains': 'romains',
-    '1 Corinthiens': '1-corinthiens',
-    '2 Corinthiens': '2-corinthiens',
-    'Galates': 'galates',
-    'Éphésiens': 'ephesiens',
-    'Philippiens': 'philippiens',
-    'Colossiens': 'colossiens',
-    '1 Thessaloniciens': '1-thesaloniciens',
-    '2 Thessaloniciens': '2-thesaloniciens',
-    '1 Timothée': '1-timothee',
-    '2 Timothée': '2-timothee',
-    'Tite': 'tite',
-    'Philémon': 'philemon',
-    'Hébreux': 'hebreux',
-    'Jacques': 'jacques',
-    '1 Pierre': '1-pierre',
-    '2 Pierre': '2-pierre',
-    '1 Jean': '1-jean',
-    '2 Jean': '2-jean',
-    '3 Jean': '3-jean',
-    'Jude': 'jude',
-    'Apocalypse': 'apocalypse'
-}
+DEFAULT_XML_PATH = r"D:\Users\sebas\Desktop\dossier THEO\wikibible\scripts\crampon.xml"
 
 def fetch_books():
     """Récupère la liste des livres depuis Supabase"""
@@ -120,129 +53,100 @@ def fetch_books():
     print(f"✓ {len(books)} livres récupérés")
     return books
 
-def fetch_existing_verses(book_slug):
-    """Récupère les versets existants pour un livre"""
-    response = requests.get(
-        f"{SUPABASE_BASE}/bible_verses",
-        headers=HEADERS,
-        params={
-            'book_slug': f'eq.{book_slug}',
-            'translation_id': 'eq.crampon',
-            'select': 'chapter,verse'
-        }
-    )
-    if response.status_code == 200:
-        verses = response.json()
-        # Retourner un set de (chapter, verse)
-        return set((v['chapter'], v['verse']) for v in verses)
-    return set()
-
-def parse_xml_and_complete(xml_path, books):
-    """Parse le XML et complète les versets manquants"""
-    print(f"\n📖 Parsing du XML: {xml_path}")
-
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+def parse_xml_and_complete(xml_path, books, sink='rest'):
+    """Parse le XML en flux et complète les versets manquants"""
+    schema = detect_schema(xml_path)
+    if schema is None:
+        print(f"❌ Aucun livre reconnu dans {xml_path}")
+        sys.exit(1)
+    print(f"\n📖 Parsing du XML: {xml_path} (schéma {schema})")
 
     # Créer le mapping book_id
     book_id_map = {}
+    book_positions = {}
     for book in books:
         book_id_map[book['slug']] = book['id']
-
-    total_inserted = 0
-    total_skipped = 0
-
-    # Parcourir les testaments puis les livres
-    for testament in root.findall('.//testament'):
-        print(f"\n📜 Testament: {testament.get('name')}")
-
-        for book in testament.findall('BOOK'):
-            book_name_elem = book.find('NAME')
-            if book_name_elem is not None and book_name_elem.text:
-                book_name = book_name_elem.text
-            else:
-                book_name = "UNKNOWN"
-            print(f"\n📖 {book_name}")
-
-            if book_name not in BOOK_SLUG_MAP:
-                print(f"   WARNING: Mapping not found for {book_name}")
-                continue
-
-            slug = BOOK_SLUG_MAP[book_name]
-        book_id = book_id_map.get(slug)
-
-        if not book_id:
-            print(f"   ⚠️  Livre non trouvé en base: {slug}")
-            continue
-
-        # Récupérer les versets existants
-        existing = fetch_existing_verses(slug)
-        print(f"   {len(existing)} versets existants")
-
-        # Parcourir les chapitres
-        for chapter in book.findall('CHAPTER'):
-            chap_num = int(chapter.get('bnumber'))
-
-            # Parcourir les versets
-            verses_to_insert = []
-            for verse in chapter.findall('VERS'):
-                verse_num = int(verse.get('vnumber'))
-                verse_text = verse.text
-
-                if not verse_text:
+        book_positions[book['id']] = book['position']
+
+    # Récupérer en une passe tous les versets Crampon existants
+    existing = fetch_verse_keys(SUPABASE_BASE, HEADERS, 'crampon', book_positions)
+    print(f"   {len(existing)} versets Crampon existants")
+
+    counts = {'queued': 0, 'skipped': 0, 'books': 0}
+
+    def iter_rows():
+        current = None
+        book_id = None
+        queued_in_book = 0
+        for v in iter_verses(xml_path, schema):
+            if v.book != current:
+                if book_id and queued_in_book:
+                    print(f"   ✓ {queued_in_book} versets en file (total: {counts['queued']})")
+                current, book_id, queued_in_book = v.book, None, 0
+                print(f"\n📖 {v.book}")
+                slug = book_slug(v.book)
+                if not slug:
+                    print(f"   WARNING: Mapping not found for {v.book}")
                     continue
-
-                # Vérifier si le verset existe déjà
-                if (chap_num, verse_num) in existing:
-                    total_skipped += 1
+                book_id = book_id_map.get(slug)
+                if not book_id:
+                    print(f"   ⚠️  Livre non trouvé en base: {slug}")
                     continue
+                position = book_positions[book_id]
+                counts['books'] += 1
+                print(f"   {existing.count(position)} versets existants")
+            if not book_id:
+                continue
+
+            # Vérifier si le verset existe déjà
+            if existing.contains(position, v.chapter, v.verse):
+                counts['skipped'] += 1
+                continue
 
-                # Nettoyer le texte
-                verse_text = re.sub(r'\s+', ' ', verse_text).strip()
-
-                verses_to_insert.append({
-                    'book_id': book_id,
-                    'book_slug': slug,
-                    'chapter': chap_num,
-                    'verse': verse_num,
-                    'text': verse_text,
-                    'translation_id': 'crampon'
-                })
-
-            # Insérer par lot de 100
-            if verses_to_insert:
-                for i in range(0, len(verses_to_insert), 100):
-                    batch = verses_to_insert[i:i+100]
-                    response = requests.post(
-                        f"{SUPABASE_BASE}/bible_verses",
-                        headers=HEADERS,
-                        json=batch
-                    )
-                    if response.status_code == 201:
-                        total_inserted += len(batch)
-                        print(f"   ✓ Chapitre {chap_num}: {len(batch)} versets insérés (total: {total_inserted})")
-                    else:
-                        print(f"   ❌ Erreur insertion chapitre {chap_num}: {response.status_code}")
-                        print(response.text[:200])
-
-    print(f"\n✨ Import terminé: {total_inserted} versets insérés, {total_skipped} déjà existants")
+            counts['queued'] += 1
+            queued_in_book += 1
+            yield {
+                'book_id': book_id,
+                'book_slug': slug,
+                'chapter': v.chapter,
+                'verse': v.verse,
+                'text': v.text,
+                'translation_id': 'crampon'
+            }
+        if book_id and queued_in_book:
+            print(f"   ✓ {queued_in_book} versets en file (total: {counts['queued']})")
+
+    # Insérer par lots (envoi en parallèle) au fil de la lecture
+    with open_writer(sink, SUPABASE_BASE, HEADERS, 'bible_verses') as writer:
+        writer.write(iter_rows())
+    total_inserted = writer.rows_sent
+
+    print(f"\n✨ Import terminé: {counts['books']} livres, {total_inserted} versets insérés, "
+          f"{counts['skipped']} déjà existants")
+    if writer.rows_failed:
+        print(f"⚠ {writer.rows_failed} versets non insérés")
     return total_inserted
 
 def main():
+    parser = argparse.ArgumentParser(description="Complète la Bible Crampon depuis le XML")
+    parser.add_argument('--xml', default=DEFAULT_XML_PATH, help="fichier XML Crampon")
+    parser.add_argument('--sink', choices=SINKS, default='rest',
+                        help="rest: API PostgREST par lots (défaut); copy: COPY direct dans PostgreSQL "
+                             "via SUPABASE_DB_URL (psycopg requis)")
+    args = parser.parse_args()
+
     print("🙏 Complétion de la Bible Crampon depuis XML\n")
     print("="*60)
 
-    xml_path = r"D:\Users\sebas\Desktop\dossier THEO\wikibible\scripts\crampon.xml"
-
-    if not os.path.exists(xml_path):
-        print(f"❌ Fichier XML non trouvé: {xml_path}")
+    if not os.path.exists(args.xml):
+        print(f"❌ Fichier XML non trouvé: {args.xml}")
         sys.exit(1)
 
     # Récupérer les livres
     books = fetch_books()
 
     # Parser et compléter
-    parse_xml_and_complete(xml_path, books)
+    parse_xml_and_complete(args.xml, books, args.sink)
 
     print("\n" + "="*60)
     print("✅ Complétion terminée avec succès!")
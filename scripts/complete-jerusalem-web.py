@@ -1,13 +1,29 @@
 """
 Script de complétion de la Bible de Jérusalem depuis gratis.bible
 Scrape le site web pour récupérer les versets manquants
+Seuls les chapitres où il manque des versets sont demandés: chaque livre est borné
+par bible_books.chapters, un chapitre est incomplet s'il est absent, s'il a moins
+de versets que la traduction la plus complète en base (RPC verse_counts, sinon la
+versification de référence de versification.py) ou des trous dans sa numérotation;
+un livre s'arrête au premier 404
+Requêtes en parallèle sur une connexion persistante, avec une politesse par hôte;
+paragraphes extraits comme avec BeautifulSoup (html_paragraphs.py, moteur stdlib)
 """
 
 import os, sys, re
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
 from dotenv import load_dotenv
 import requests
-from bs4 import BeautifulSoup
+
+from supabase_rest import BulkWriter, create_session
+from verse_keys import VerseKeySet, fetch_verse_keys
+from versification import chapter_count, chapter_gap
+from catalog_status import CatalogStatus
+from http_cache import HostLimiter, HttpCache
+from html_paragraphs import BACKENDS, DEFAULT_BACKEND, get_extractor
+from import_journal import COMMITTED, ImportJournal, write_journaled
 
 load_dotenv('.env.local')
 
@@ -21,6 +37,18 @@ HEADERS = {
     'Prefer': 'return=representation'
 }
 
+# Politesse envers gratis.bible: requêtes simultanées et intervalle entre deux départs
+DEFAULT_HOST_CONCURRENCY = 4
+DEFAULT_DELAY = 0.3
+# Borne si bible_books.chapters n'est pas renseigné et le livre hors de la versification
+MAX_CHAPTERS = 150
+
+# Cache local des pages gratis.bible (WIKIBIBLE_HTTP_OFFLINE=1 pour rejouer sans réseau);
+# limiter et session sont fixés dans main() d'après les options
+HTTP_CACHE = HttpCache()
+# Textes des <p> d'une page (remplacé dans main() selon --html-backend)
+EXTRACT_PARAGRAPHS = get_extractor()
+
 # Mapping livres code site -> slug
 BOOK_CODE_TO_SLUG = {
     'gen': 'genese', 'exod': 'exode', 'lev': 'levitique', 'num': 'nombres',
@@ -50,35 +78,70 @@ def fetch_books():
     if response.status_code != 200:
         print(f"ERROR: {response.status_code}")
         sys.exit(1)
-    return {b['slug']: b['id'] for b in response.json()}
-
-def fetch_existing_verses(book_slug):
-    response = requests.get(
-        f"{SUPABASE_BASE}/bible_verses",
-        headers=HEADERS,
-        params={'book_slug': f'eq.{book_slug}', 'translation_id': 'eq.jerusalem', 'select': 'chapter,verse'}
-    )
-    if response.status_code == 200:
-        return set((v['chapter'], v['verse']) for v in response.json())
-    return set()
-
-def scrape_chapter(book_code, chapter_num):
-    """Scrape un chapitre depuis gratis.bible"""
+    return response.json()
+
+class BookPlan(NamedTuple):
+    """Chapitres à demander pour un livre, dans l'ordre"""
+    code: str
+    slug: str
+    book_id: str
+    position: int
+    chapters: List[int]
+
+
+def reference_counts(counts: Optional[Dict], exclude: str) -> Dict[str, Dict[int, int]]:
+    """Versets attendus par livre et chapitre: maximum sur les autres traductions en base"""
+    reference: Dict[str, Dict[int, int]] = {}
+    for translation_id, books in (counts or {}).items():
+        if translation_id == exclude:
+            continue
+        for book_id, chapters in books.items():
+            expected = reference.setdefault(book_id, {})
+            for chapter, n in chapters.items():
+                expected[int(chapter)] = max(expected.get(int(chapter), 0), n)
+    return reference
+
+
+def plan_crawl(books: List[Dict], existing: VerseKeySet, reference: Dict[str, Dict[int, int]],
+               journal: ImportJournal) -> List[BookPlan]:
+    """Chapitres incomplets de chaque livre, bornés par bible_books.chapters"""
+    by_slug = {b['slug']: b for b in books}
+    plans = []
+    for book_code, slug in BOOK_CODE_TO_SLUG.items():
+        book = by_slug.get(slug)
+        if not book:
+            print(f"SKIP: {book_code} - no book_id for {slug}")
+            continue
+        position = book['position']
+        expected = reference.get(book['id'], {})
+        n_chapters = book.get('chapters') or chapter_count(position) or MAX_CHAPTERS
+        chapters = [
+            chapter for chapter in range(1, n_chapters + 1)
+            if chapter_gap(existing, position, chapter, expected.get(chapter))
+            and not journal.skip(f"{book_code}/{chapter}")
+        ]
+        if chapters:
+            plans.append(BookPlan(book_code, slug, book['id'], position, chapters))
+    return plans
+
+
+def scrape_chapter(book_code, chapter_num) -> Optional[List[Dict]]:
+    """Scrape un chapitre depuis gratis.bible; None si le chapitre n'existe pas sur le site (404)"""
     # URL pattern: https://gratis.bible/fr/dejer/gen/1.htm
     url = f"https://gratis.bible/fr/dejer/{book_code}/{chapter_num}.htm"
 
     try:
-        response = requests.get(url, timeout=15)
+        response = HTTP_CACHE.get(url, timeout=15)
+        if response.status_code == 404:
+            return None
         if response.status_code != 200:
             return []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
         verses = []
 
         # Trouver tous les versets - le format peut varier
         # Chercher tous les paragraphes avec un numero au debut
-        for p in soup.find_all('p'):
-            text = p.get_text(strip=True)
+        for text in EXTRACT_PARAGRAPHS(response.text):
             if not text:
                 continue
 
@@ -105,70 +168,125 @@ def scrape_chapter(book_code, chapter_num):
         print(f"    ERROR scraping {url}: {e}")
         return []
 
+
+def crawl_book(plan: BookPlan) -> Dict:
+    """Chapitres prévus d'un livre, dans l'ordre, jusqu'au premier 404"""
+    chapters = []
+    stopped_at = None
+    for chapter in plan.chapters:
+        verses = scrape_chapter(plan.code, chapter)
+        if verses is None:
+            stopped_at = chapter
+            break
+        chapters.append((chapter, verses))
+    return {'plan': plan, 'chapters': chapters, 'stopped_at': stopped_at}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Complète la Bible de Jérusalem depuis gratis.bible")
+    parser.add_argument('--resume', action='store_true',
+                        help="reprendre un lancement interrompu: chapitres déjà traités non rescrapés (journal local)")
+    parser.add_argument('--host-concurrency', type=int, default=DEFAULT_HOST_CONCURRENCY,
+                        help="requêtes simultanées vers gratis.bible")
+    parser.add_argument('--delay', type=float, default=DEFAULT_DELAY,
+                        help="intervalle minimal (s) entre deux requêtes vers gratis.bible")
+    parser.add_argument('--html-backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="moteur d'extraction des paragraphes (défaut: stdlib, identique à bs4); "
+                             "lxml et selectolax, plus rapides, seulement si bench-html-extract.py "
+                             "ne montre aucun écart sur le cache")
+    parser.add_argument('--plan', action='store_true', help="afficher les chapitres à demander sans rien scraper")
+    args = parser.parse_args()
+
+    global EXTRACT_PARAGRAPHS
+    EXTRACT_PARAGRAPHS = get_extractor(args.html_backend)
+
     print("="*60)
     print("Completing Jerusalem Bible from gratis.bible")
     print("="*60)
 
-    book_id_map = fetch_books()
+    books = fetch_books()
+    book_positions = {b['id']: b['position'] for b in books}
 
-    total_inserted = 0
-    total_skipped = 0
-    books_processed = 0
+    existing = fetch_verse_keys(SUPABASE_BASE, HEADERS, 'jerusalem', book_positions)
+    print(f"Existing Jerusalem verses: {len(existing)}")
 
-    for book_code, slug in BOOK_CODE_TO_SLUG.items():
-        book_id = book_id_map.get(slug)
-        if not book_id:
-            print(f"\nSKIP: {book_code} - no book_id for {slug}")
-            continue
+    with CatalogStatus(SUPABASE_BASE, HEADERS) as catalog:
+        counts = catalog.chapter_counts()
+    if counts is None:
+        print("⚠ RPC verse_counts absente (voir sql/verse_counts.sql): seuls les chapitres "
+              "absents ou à numérotation trouée sont demandés")
+    reference = reference_counts(counts, 'jerusalem')
 
-        books_processed += 1
-        print(f"\n[{books_processed}] {book_code} ({slug})")
+    journal = ImportJournal('jerusalem-web', resume=args.resume)
+    plans = plan_crawl(books, existing, reference, journal)
+    planned = sum(len(p.chapters) for p in plans)
+    print(f"Plan: {planned} chapitres à demander dans {len(plans)} livres")
+    if args.plan:
+        for plan in plans:
+            print(f"  {plan.code}: {', '.join(map(str, plan.chapters))}")
+        journal.close()
+        return
 
-        existing = fetch_existing_verses(slug)
-        print(f"  Existing: {len(existing)} verses")
+    HTTP_CACHE.limiter = HostLimiter(args.host_concurrency, args.delay)
+    # Une connexion persistante par requête simultanée
+    HTTP_CACHE.session.close()
+    HTTP_CACHE.session = create_session(pool_size=args.host_concurrency)
 
-        # Scraper les chapitres (1-150 max)
-        for chapter in range(1, 151):
-            verses_data = scrape_chapter(book_code, chapter)
+    total_queued = 0
+    total_skipped = 0
+    books_processed = 0
+    writer = BulkWriter(SUPABASE_BASE, HEADERS, 'bible_verses')
 
-            if not verses_data:
-                # Pas de versets trouves - peut etre fin du livre
-                continue
+    # Un livre par tâche (chapitres dans l'ordre, arrêt au premier 404); insertions
+    # faites dans ce thread au fil des livres terminés
+    with ThreadPoolExecutor(max_workers=args.host_concurrency) as pool:
+        for result in pool.map(crawl_book, plans):
+            plan = result['plan']
+            books_processed += 1
+            print(f"\n[{books_processed}] {plan.code} ({plan.slug})")
+            print(f"  Existing: {existing.count(plan.position)} verses, "
+                  f"{len(plan.chapters)} chapitres incomplets")
+            if result['stopped_at'] is not None:
+                print(f"  Chapitre {result['stopped_at']} absent du site (404): fin du livre")
 
-            verses_to_insert = []
-            for v in verses_data:
-                if (v['chapter'], v['verse']) in existing:
-                    total_skipped += 1
+            for chapter, verses_data in result['chapters']:
+                unit = f"{plan.code}/{chapter}"
+                if not verses_data:
+                    # Pas de versets trouves
                     continue
 
-                verses_to_insert.append({
-                    'book_id': book_id,
-                    'book_slug': slug,
-                    'chapter': v['chapter'],
-                    'verse': v['verse'],
-                    'text': v['text'],
-                    'translation_id': 'jerusalem'
-                })
-
-            if verses_to_insert:
-                # Insérer par lot de 50
-                for i in range(0, len(verses_to_insert), 50):
-                    batch = verses_to_insert[i:i+50]
-                    response = requests.post(
-                        f"{SUPABASE_BASE}/bible_verses",
-                        headers=HEADERS,
-                        json=batch
-                    )
-                    if response.status_code == 201:
-                        total_inserted += len(batch)
-                        print(f"    Chapter {chapter}: +{len(batch)} (total: {total_inserted})")
-                    else:
-                        print(f"    ERROR Chapter {chapter}: {response.status_code}")
-
-            # Délai pour ne pas surcharger le serveur
-            time.sleep(0.3)
+                verses_to_insert = []
+                for v in verses_data:
+                    if existing.contains(plan.position, v['chapter'], v['verse']):
+                        total_skipped += 1
+                        continue
+
+                    verses_to_insert.append({
+                        'book_id': plan.book_id,
+                        'book_slug': plan.slug,
+                        'chapter': v['chapter'],
+                        'verse': v['verse'],
+                        'text': v['text'],
+                        'translation_id': 'jerusalem'
+                    })
+
+                if verses_to_insert:
+                    # Insérer en un lot (envoi en parallèle); le chapitre est noté dans le
+                    # journal quand tous ses lots sont insérés. Lots non sautés à la reprise:
+                    # les versets déjà en base sont de toute façon filtrés par existing
+                    write_journaled(writer, journal, unit, verses_to_insert,
+                                    complete_stage=COMMITTED, skip_batches=False)
+                    total_queued += len(verses_to_insert)
+                    print(f"    Chapter {chapter}: +{len(verses_to_insert)} queued (total: {total_queued})")
+                else:
+                    journal.mark(unit)
+
+    writer.close()
+    total_inserted = writer.rows_sent
 
+    print(f"\n{HTTP_CACHE.summary()}")
+    print(journal.summary())
+    journal.close()
     print("\n" + "="*60)
     print(f"DONE: {books_processed} books, {total_inserted} inserted, {total_skipped} skipped")
     print("="*60)
@@ -0,0 +1,135 @@
+"""
+Lecture en flux du XML de la Bible Crampon (xml.etree iterparse)
+Deux schémas reconnus automatiquement:
+  zefania   BOOK (enfant NAME ou attribut bname) / CHAPTER (bnumber ou cnumber) / VERS (vnumber)
+  numéroté  book (number, ordre catholique) / chapter (number) / verse (number)
+Chaque verset est produit dès sa balise fermante puis effacé, ainsi que ses chapitre
+et livre une fois terminés: la mémoire reste constante quelle que soit la taille du fichier
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import Iterator, NamedTuple, Optional
+
+ZEFANIA = 'zefania'
+NUMBERED = 'numéroté'
+
+# Balises (livre, chapitre, verset) de chaque schéma
+SCHEMA_TAGS = {
+    ZEFANIA: ('BOOK', 'CHAPTER', 'VERS'),
+    NUMBERED: ('book', 'chapter', 'verse'),
+}
+# Les fichiers Zefania standard nomment le livre BIBLEBOOK
+BOOK_TAG_ALIASES = {'BIBLEBOOK': ZEFANIA}
+
+# Numéro de livre -> nom français (ordre de la Bible catholique), schéma numéroté
+BOOK_NUMBER_TO_NAME = {
+    1: 'Genèse', 2: 'Exode', 3: 'Lévitique', 4: 'Nombres', 5: 'Deutéronome',
+    6: 'Josué', 7: 'Juges', 8: 'Ruth', 9: '1 Samuel', 10: '2 Samuel',
+    11: '1 Rois', 12: '2 Rois', 13: '1 Chroniques', 14: '2 Chroniques',
+    15: 'Esdras', 16: 'Néhémie', 17: 'Tobie', 18: 'Judith', 19: 'Esther',
+    20: '1 Maccabées', 21: '2 Maccabées', 22: 'Job', 23: 'Psaumes', 24: 'Proverbes',
+    25: 'Qohélet', 26: 'Cantique', 27: 'Sagesse', 28: 'Siracide', 29: 'Isaïe',
+    30: 'Jérémie', 31: 'Lamentations', 32: 'Baruch', 33: 'Ézéchiel', 34: 'Daniel',
+    35: 'Osée', 36: 'Joël', 37: 'Amos', 38: 'Abdias', 39: 'Jonas',
+    40: 'Michée', 41: 'Nahum', 42: 'Habaquuc', 43: 'Sophonie', 44: 'Aggée',
+    45: 'Zacharie', 46: 'Malachie', 47: 'Matthieu', 48: 'Marc', 49: 'Luc',
+    50: 'Jean', 51: 'Actes', 52: 'Romains', 53: '1 Corinthiens', 54: '2 Corinthiens',
+    55: 'Galates', 56: 'Éphésiens', 57: 'Philippiens', 58: 'Colossiens', 59: '1 Thessaloniciens',
+    60: '2 Thessaloniciens', 61: '1 Timothée', 62: '2 Timothée', 63: 'Tite', 64: 'Philémon',
+    65: 'Hébreux', 66: 'Jacques', 67: '1 Pierre', 68: '2 Pierre', 69: '1 Jean',
+    70: '2 Jean', 71: '3 Jean', 72: 'Jude', 73: 'Apocalypse'
+}
+
+# Nom français -> slug de bible_books
+BOOK_NAME_TO_SLUG = {
+    'Genèse': 'genese', 'Exode': 'exode', 'Lévitique': 'levitique', 'Nombres': 'nombres', 'Deutéronome': 'deuteronome',
+    'Josué': 'josue', 'Juges': 'juges', 'Ruth': 'ruth', '1 Samuel': '1-samuel', '2 Samuel': '2-samuel',
+    '1 Rois': '1-rois', '2 Rois': '2-rois', '1 Chroniques': '1-chroniques', '2 Chroniques': '2-chroniques',
+    'Esdras': 'esdras', 'Néhémie': 'nehemie', 'Tobie': 'tobie', 'Judith': 'judith', 'Esther': 'esther',
+    '1 Maccabées': '1-macchabees', '2 Maccabées': '2-macchabees', 'Job': 'job', 'Psaumes': 'psaumes', 'Proverbes': 'proverbes',
+    'Qohélet': 'ecclesiaste', 'Cantique': 'cantique', 'Sagesse': 'sagesse', 'Siracide': 'siracide', 'Isaïe': 'eesaie',
+    'Jérémie': 'jeremie', 'Lamentations': 'lamentations', 'Baruch': 'baruch', 'Ézéchiel': 'ezechiel', 'Daniel': 'daniel',
+    'Osée': 'osee', 'Joël': 'joel', 'Amos': 'amos', 'Abdias': 'abdias', 'Jonas': 'jonas',
+    'Michée': 'michee', 'Nahum': 'nahum', 'Habaquuc': 'habacuc', 'Sophonie': 'sophonie', 'Aggée': 'aggee',
+    'Zacharie': 'zacharie', 'Malachie': 'malachie', 'Matthieu': 'matthieu', 'Marc': 'marc', 'Luc': 'luc',
+    'Jean': 'jean', 'Actes': 'actes', 'Romains': 'romains', '1 Corinthiens': '1-corinthiens', '2 Corinthiens': '2-corinthiens',
+    'Galates': 'galates', 'Éphésiens': 'ephesiens', 'Philippiens': 'philippiens', 'Colossiens': 'colossiens', '1 Thessaloniciens': '1-thesaloniciens',
+    '2 Thessaloniciens': '2-thesaloniciens', '1 Timothée': '1-timothee', '2 Timothée': '2-timothee', 'Tite': 'tite', 'Philémon': 'philemon',
+    'Hébreux': 'hebreux', 'Jacques': 'jacques', '1 Pierre': '1-pierre', '2 Pierre': '2-pierre', '1 Jean': '1-jean',
+    '2 Jean': '2-jean', '3 Jean': '3-jean', 'Jude': 'jude', 'Apocalypse': 'apocalypse'
+}
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class XmlVerse(NamedTuple):
+    book: str  # nom français ('UNKNOWN' si absent du fichier)
+    chapter: int
+    verse: int
+    text: str
+
+
+def detect_schema(path: str) -> Optional[str]:
+    """Schéma d'après la première balise de livre rencontrée (lecture partielle du fichier)"""
+    for _, elem in ET.iterparse(path, events=('start',)):
+        if elem.tag in BOOK_TAG_ALIASES:
+            return BOOK_TAG_ALIASES[elem.tag]
+        for schema, (book_tag, _, _) in SCHEMA_TAGS.items():
+            if elem.tag == book_tag:
+                return schema
+    return None
+
+
+def _int_attr(elem, *names) -> Optional[int]:
+    for name in names:
+        value = elem.get(name)
+        if value is not None and value.strip().isdigit():
+            return int(value)
+    return None
+
+
+def iter_verses(path: str, schema: Optional[str] = None) -> Iterator[XmlVerse]:
+    """
+    Versets du fichier dans l'ordre du document (textes vides ignorés, espaces normalisés)
+    schema: ZEFANIA ou NUMBERED, détecté si None
+    """
+    schema = schema or detect_schema(path)
+    if schema is None:
+        raise ValueError(f"Aucun livre reconnu dans {path} (BOOK, BIBLEBOOK ou book)")
+    book_tag, chapter_tag, verse_tag = SCHEMA_TAGS[schema]
+    book_tags = {book_tag} | {tag for tag, s in BOOK_TAG_ALIASES.items() if s == schema}
+
+    book_name = 'UNKNOWN'
+    chapter = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag in book_tags:
+                if schema == NUMBERED:
+                    book_name = BOOK_NUMBER_TO_NAME.get(_int_attr(elem, 'number'), 'UNKNOWN')
+                else:
+                    book_name = elem.get('bname') or 'UNKNOWN'
+            elif tag == chapter_tag:
+                chapter = _int_attr(elem, 'cnumber', 'bnumber', 'number')
+            continue
+
+        if tag == verse_tag:
+            number = _int_attr(elem, 'vnumber', 'number')
+            # Comme les anciens scripts: texte propre du verset, sans ses sous-éléments
+            text = elem.text
+            elem.clear()
+            if text and number is not None and chapter is not None:
+                text = WHITESPACE.sub(' ', text).strip()
+                if text:
+                    yield XmlVerse(book_name, chapter, number, text)
+        elif tag == 'NAME' and schema == ZEFANIA:
+            book_name = (elem.text or '').strip() or book_name
+        elif tag == chapter_tag or tag in book_tags:
+            # Libère les versets (et chapitres) déjà produits
+            elem.clear()
+
+
+def book_slug(book_name: str) -> Optional[str]:
+    return BOOK_NAME_TO_SLUG.get(book_name)
+
@@ -7,6 +7,8 @@ import os
 import sys
 import re
 
+from pdf_pages import count_pages, iter_page_texts, require_pdfplumber
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -18,69 +20,61 @@ def diagnose_pdf(pdf_path: str, sample_pages: int = 50) -> None:
     print(f"🔍 Diagnostic du PDF: {pdf_path}\n")
     print("="*80)
 
-    try:
-        import pdfplumber
-    except ImportError:
-        print("❌ pdfplumber n'est pas installé")
-        print("Installez-le avec: pip install pdfplumber")
-        sys.exit(1)
+    require_pdfplumber()
 
     if not os.path.exists(pdf_path):
         print(f"❌ Fichier PDF non trouvé: {pdf_path}")
         sys.exit(1)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        print(f"📄 Total pages: {total_pages}\n")
-
-        # Analyser les premières pages pour comprendre la structure
-        pages_to_analyze = min(sample_pages, total_pages)
+    total_pages = count_pages(pdf_path)
+    print(f"📄 Total pages: {total_pages}\n")
 
-        print(f"📖 Analyse des {pages_to_analyze} premières pages...\n")
+    # Analyser les premières pages pour comprendre la structure
+    pages_to_analyze = min(sample_pages, total_pages)
 
-        for page_num in range(1, pages_to_analyze + 1):
-            page = pdf.pages[page_num - 1]
-            text = page.extract_text()
+    print(f"📖 Analyse des {pages_to_analyze} premières pages...\n")
 
-            if not text:
-                continue
+    # Texte relu depuis le cache des pages après la première extraction
+    for page_num, text in iter_page_texts(pdf_path, pages=range(1, pages_to_analyze + 1)):
+        if not text:
+            continue
 
-            lines = text.split('\n')
+        lines = text.split('\n')
 
-            print(f"\n{'='*80}")
-            print(f"PAGE {page_num}")
-            print(f"{'='*80}\n")
+        print(f"\n{'='*80}")
+        print(f"PAGE {page_num}")
+        print(f"{'='*80}\n")
 
-            # Afficher les 30 premières lignes non vides
-            count = 0
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
+        # Afficher les 30 premières lignes non vides
+        count = 0
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
 
-                count += 1
-                if count > 30:
-                    break
+            count += 1
+            if count > 30:
+                break
 
-                # Afficher la ligne avec son numéro
-                print(f"{i+1:3d}: {line[:100]}")  # Limiter à 100 chars
+            # Afficher la ligne avec son numéro
+            print(f"{i+1:3d}: {line[:100]}")  # Limiter à 100 chars
 
-                # Détecter les patterns potentiels
-                if re.match(r'^[0-9A-ZÂÊÎÔÛÀÙÇÉÈ\s]+$', line) and len(line) < 30:
-                    print(f"     ⚠️  POSSIBLE NOM DE LIVRE")
+            # Détecter les patterns potentiels
+            if re.match(r'^[0-9A-ZÂÊÎÔÛÀÙÇÉÈ\s]+$', line) and len(line) < 30:
+                print(f"     ⚠️  POSSIBLE NOM DE LIVRE")
 
-                if re.match(r'^Chapitre\s+\d+', line, re.IGNORECASE):
-                    print(f"     ⚠️  CHAPITRE")
+            if re.match(r'^Chapitre\s+\d+', line, re.IGNORECASE):
+                print(f"     ⚠️  CHAPITRE")
 
-                if re.match(r'^\d+$', line):
-                    print(f"     ⚠️  NUMÉRO SEUL (chapitre?)")
+            if re.match(r'^\d+$', line):
+                print(f"     ⚠️  NUMÉRO SEUL (chapitre?)")
 
-                if re.match(r'^[\w\s\'\-]+?\s+\d+[\.,]\s*\d+', line):
-                    print(f"     ⚠️  POSSIBLE VERSET")
+            if re.match(r'^[\w\s\'\-]+?\s+\d+[\.,]\s*\d+', line):
+                print(f"     ⚠️  POSSIBLE VERSET")
 
-            # Demander à l'utilisateur de continuer
-            if page_num % 5 == 0:
-                input(f"\n⏸️  Appuyez sur Entrée pour continuer...")
+        # Demander à l'utilisateur de continuer
+        if page_num % 5 == 0:
+            input(f"\n⏸️  Appuyez sur Entrée pour continuer...")
 
 def find_verse_patterns(pdf_path: str) -> None:
     """Cherche tous les patterns possibles de versets dans le PDF"""
@@ -88,53 +82,46 @@ def find_verse_patterns(pdf_path: str) -> None:
     print("🔍 RECHERCHE DE PATTERNS DE VERSETS")
     print(f"{'='*80}\n")
 
-    try:
-        import pdfplumber
-    except ImportError:
-        return
+    verse_patterns = {}
+
+    for page_num, text in iter_page_texts(pdf_path, pages=range(1, 101)):  # 100 premières pages
+        if not text:
+            continue
 
-    with pdfplumber.open(pdf_path) as pdf:
-        verse_patterns = {}
+        lines = text.split('\n')
 
-        for page_num, page in enumerate(pdf.pages[:100], 1):  # 100 premières pages
-            text = page.extract_text()
-            if not text:
+        for line in lines:
+            line = line.strip()
+            if not line or len(line) < 5:
                 continue
 
-            lines = text.split('\n')
-
-            for line in lines:
-                line = line.strip()
-                if not line or len(line) < 5:
-                    continue
-
-                # Pattern 1: "Livre Chapitre, Verset Texte"
-                if re.match(r'^[\w\s\'\-]+?\s+\d+[\.,]\s*\d+', line):
-                    if 'pattern1' not in verse_patterns:
-                        verse_patterns['pattern1'] = []
-                    if len(verse_patterns['pattern1']) < 10:
-                        verse_patterns['pattern1'].append(line[:80])
-
-                # Pattern 2: "Chapitre, Verset Texte" (sans nom du livre)
-                if re.match(r'^\d+[\.,]\s*\d+\s+.+', line):
-                    if 'pattern2' not in verse_patterns:
-                        verse_patterns['pattern2'] = []
-                    if len(verse_patterns['pattern2']) < 10:
-                        verse_patterns['pattern2'].append(line[:80])
-
-                # Pattern 3: "Verset. Texte" (numéro seul au début)
-                if re.match(r'^\d+\.\s+.+', line):
-                    if 'pattern3' not in verse_patterns:
-                        verse_patterns['pattern3'] = []
-                    if len(verse_patterns['pattern3']) < 10:
-                        verse_patterns['pattern3'].append(line[:80])
-
-        # Afficher les résultats
-        for pattern_name, examples in verse_patterns.items():
-            print(f"\n📋 {pattern_name.upper()}:")
-            print("-" * 80)
-            for ex in examples:
-                print(f"  {ex}")
+            # Pattern 1: "Livre Chapitre, Verset Texte"
+            if re.match(r'^[\w\s\'\-]+?\s+\d+[\.,]\s*\d+', line):
+                if 'pattern1' not in verse_patterns:
+                    verse_patterns['pattern1'] = []
+                if len(verse_patterns['pattern1']) < 10:
+                    verse_patterns['pattern1'].append(line[:80])
+
+            # Pattern 2: "Chapitre, Verset Texte" (sans nom du livre)
+            if re.match(r'^\d+[\.,]\s*\d+\s+.+', line):
+                if 'pattern2' not in verse_patterns:
+                    verse_patterns['pattern2'] = []
+                if len(verse_patterns['pattern2']) < 10:
+                    verse_patterns['pattern2'].append(line[:80])
+
+            # Pattern 3: "Verset. Texte" (numéro seul au début)
+            if re.match(r'^\d+\.\s+.+', line):
+                if 'pattern3' not in verse_patterns:
+                    verse_patterns['pattern3'] = []
+                if len(verse_patterns['pattern3']) < 10:
+                    verse_patterns['pattern3'].append(line[:80])
+
+    # Afficher les résultats
+    for pattern_name, examples in verse_patterns.items():
+        print(f"\n📋 {pattern_name.upper()}:")
+        print("-" * 80)
+        for ex in examples:
+            print(f"  {ex}")
 
 def main():
     pdf_path = r"D:\Users\sebas\Desktop\dossier THEO\wikibible\scripts\Bible_de_Jerusalem.pdf"
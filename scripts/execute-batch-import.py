@@ -1,67 +1,202 @@
 """
 Script pour exécuter l'import SQL par lots via l'API Supabase
-Contourne les limitations RLS en utilisant les batches de l'API REST
+Les instructions de bible-import.sql sont regroupées en transactions de plusieurs
+instructions (rpc/exec_sql_batch, voir sql/exec_sql_batch.sql), plusieurs groupes
+en parallèle. Un groupe en erreur est coupé en deux jusqu'à isoler l'instruction
+fautive; le registre côté base garantit qu'une instruction n'est appliquée qu'une fois
+
+Usage: python scripts/execute-batch-import.py [--file bible-import.sql] [--group-size 500]
+       [--concurrency 4] [--resume]
 """
 
 import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
 import requests
 from dotenv import load_dotenv
 
+from supabase_rest import create_session
+from import_journal import ImportJournal
+
 load_dotenv('.env.local')
 
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
 SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+# exec_sql_batch n'est accordée qu'au rôle service
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY', os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY'))
+
+DEFAULT_GROUP_SIZE = 500
+# Borne la taille du corps JSON d'un appel
+DEFAULT_GROUP_BYTES = 1_000_000
+DEFAULT_CONCURRENCY = 4
+# Erreurs réseau / 5xx: le groupe est renvoyé tel quel (sans risque grâce au registre)
+MAX_RETRIES = 5
+
+# (numéro de ligne, instruction)
+Statement = Tuple[int, str]
+
+
+class BatchExecutor:
+    """Envoie des groupes d'instructions à exec_sql_batch et isole les instructions en erreur"""
+
+    def __init__(self, session: requests.Session, source: str, journal: ImportJournal):
+        self.session = session
+        self.url = f'{SUPABASE_URL}/rest/v1/rpc/exec_sql_batch'
+        self.source = source
+        self.journal = journal
+        self.lock = threading.Lock()
+        self.applied = 0
+        self.already_applied = 0
+        self.calls = 0
+        self.failures: List[Tuple[int, str]] = []
+
+    def _call(self, group: List[Statement]) -> Tuple[Optional[int], str]:
+        """(instructions appliquées, '') ou (None, message d'erreur SQL)"""
+        payload = {
+            'p_source': self.source,
+            'p_lines': [line for line, _ in group],
+            'p_statements': [sql for _, sql in group],
+        }
+        for attempt in range(MAX_RETRIES):
+            with self.lock:
+                self.calls += 1
+            try:
+                response = self.session.post(self.url, json=payload, timeout=300)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code in (200, 201):
+                    return int(response.json()), ''
+                if response.status_code == 404:
+                    # Relevée par pool.map dans le thread principal
+                    raise SystemExit("❌ Fonction exec_sql_batch absente: exécutez scripts/sql/exec_sql_batch.sql")
+                if response.status_code < 500 and response.status_code != 429:
+                    # Erreur SQL: la transaction du groupe a été annulée
+                    return None, f"{response.status_code} {response.text[:300]}"
+                error = f"{response.status_code} {response.text[:200]}"
+            time.sleep(2 ** attempt)
+        return None, f"abandon après {MAX_RETRIES} essais: {error}"
+
+    def run(self, group: List[Statement]) -> None:
+        """Exécute un groupe; en cas d'erreur, chaque moitié est retentée séparément"""
+        applied, error = self._call(group)
+        if applied is not None:
+            with self.lock:
+                self.applied += applied
+                self.already_applied += len(group) - applied
+            self.journal.mark(f"{group[0][0]}-{group[-1][0]}")
+            return
+        if len(group) == 1:
+            with self.lock:
+                self.failures.append((group[0][0], error))
+            print(f"❌ Ligne {group[0][0]}: {error}")
+            return
+        middle = len(group) // 2
+        self.run(group[:middle])
+        self.run(group[middle:])
+
+
+def read_statements(path: str) -> List[Statement]:
+    """Instructions non vides du fichier (une par ligne), avec leur numéro de ligne"""
+    statements = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            sql = line.strip()
+            if sql and not sql.startswith('--'):
+                statements.append((number, sql))
+    return statements
+
+
+def make_groups(statements: List[Statement], group_size: int, group_bytes: int) -> List[List[Statement]]:
+    """Groupes consécutifs d'au plus group_size instructions et group_bytes octets"""
+    groups, current, size = [], [], 0
+    for statement in statements:
+        length = len(statement[1].encode('utf-8'))
+        if current and (len(current) >= group_size or size + length > group_bytes):
+            groups.append(current)
+            current, size = [], 0
+        current.append(statement)
+        size += length
+    if current:
+        groups.append(current)
+    return groups
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Exécute un fichier SQL par transactions groupées")
+    parser.add_argument('--file', default='bible-import.sql', help="fichier SQL (une instruction par ligne)")
+    parser.add_argument('--group-size', type=int, default=DEFAULT_GROUP_SIZE, help="instructions par transaction")
+    parser.add_argument('--group-bytes', type=int, default=DEFAULT_GROUP_BYTES, help="taille max d'un groupe en octets")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="transactions en parallèle")
+    parser.add_argument('--resume', action='store_true',
+                        help="ne pas renvoyer les groupes déjà validés lors d'un lancement précédent")
+    args = parser.parse_args()
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("❌ Variables d'environnement Supabase manquantes")
+        sys.exit(1)
+
     print('📖 Exécution de l\'import SQL par lots...\n')
 
-    with open('bible-import.sql', 'r', encoding='utf-8') as f:
-        sql_lines = f.readlines()
+    statements = read_statements(args.file)
+    # Fichier identifié par son contenu: registre et journal propres à cette version
+    source = f"{os.path.basename(args.file)}:{file_digest(args.file)[:16]}"
+    groups = make_groups(statements, args.group_size, args.group_bytes)
+    journal = ImportJournal(f"sql:{source}", resume=args.resume)
+    pending = [g for g in groups if not journal.skip(f"{g[0][0]}-{g[-1][0]}")]
 
-    total = len(sql_lines)
-    batch_size = 1000
+    print(f'📊 {len(statements)} instructions SQL à exécuter')
+    print(f'📦 {len(groups)} transactions de {args.group_size} instructions max, {args.concurrency} en parallèle')
+    if journal.skipped:
+        print(f'↳ {journal.skipped} transactions déjà validées (reprise)')
+    print()
 
-    print(f'📊 {total} instructions SQL à exécuter')
-    print(f'📦 Taille du lot: {batch_size}\n')
+    session = create_session({
+        'Content-Type': 'application/json',
+        'apikey': SUPABASE_KEY,
+        'Authorization': f'Bearer {SUPABASE_KEY}'
+    }, pool_size=args.concurrency)
+    executor = BatchExecutor(session, source, journal)
+    start = time.time()
+    done = 0
 
-    success = 0
-    errors = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in pool.map(executor.run, pending):
+            done += 1
+            if done % 5 == 0 or done == len(pending):
+                print(f'✅ Progression: {done}/{len(pending)} transactions '
+                      f'({executor.applied} appliquées, {len(executor.failures)} erreurs)')
 
-    for i in range(0, total, batch_size):
-        batch = sql_lines[i:i + batch_size]
-        batch_num = i // batch_size + 1
-        total_batches = (total + batch_size - 1) // batch_size
+    elapsed = time.time() - start
+    session.close()
+    journal.close()
+
+    print(f'\n✨ Import terminé en {elapsed:.0f}s ({executor.calls} appels)')
+    print(f'   ✅ Succès: {executor.applied}')
+    if executor.already_applied:
+        print(f'   ↳ Déjà appliquées: {executor.already_applied}')
+    print(f'   ❌ Erreurs: {len(executor.failures)}')
+    for line, error in sorted(executor.failures)[:20]:
+        print(f'      ligne {line}: {error[:150]}')
 
-        # Exécuter chaque instruction individuellement
-        for sql_line in batch:
-            try:
-                response = requests.post(
-                    f'{SUPABASE_URL}/rest/v1/rpc/exec_sql',
-                    headers={
-                        'Content-Type': 'application/json',
-                        'apikey': SUPABASE_KEY,
-                        'Authorization': f'Bearer {SUPABASE_KEY}'
-                    },
-                    json={'sql': sql_line.strip()},
-                    timeout=60
-                )
-
-                if response.status_code in [200, 201]:
-                    success += 1
-                else:
-                    print(f'⚠️  Batch {batch_num}/{total_batches} - Status: {response.status_code}')
-                    errors += 1
-
-            except Exception as e:
-                print(f'❌ Erreur batch {batch_num}: {e}')
-                errors += 1
-
-        if batch_num % 5 == 0:
-            print(f'✅ Progression: {i + len(batch)}/{total} instructions ({success} succès, {errors} erreurs)')
-
-    print(f'\n✨ Import terminé!')
-    print(f'   ✅ Succès: {success}')
-    print(f'   ❌ Erreurs: {errors}')
 
 if __name__ == '__main__':
     main()
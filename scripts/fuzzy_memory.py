@@ -0,0 +1,173 @@
+"""
+Recherche approchée dans la mémoire de traduction (MinHash + LSH)
+Les apocryphes répètent des formules presque identiques (additions d'Esther et de
+Daniel, Maccabées): un verset qui ne diffère d'un verset déjà traduit que par la
+ponctuation ou la casse reprend sa traduction; un verset seulement proche la donne
+en exemple au modèle (un nom ou un mot changé suffit à fausser une reprise telle quelle)
+
+Similarité: Jaccard sur les trigrammes de mots du texte normalisé (minuscules, sans
+ponctuation); les signatures MinHash sont rangées par bandes (LSH) pour ne comparer
+qu'une poignée de candidats, la similarité exacte départage ensuite
+Signature en une passe (one permutation hashing): chaque empreinte tombe dans une des
+NUM_PERM cases, les cases vides empruntent la case pleine suivante (densification)
+"""
+
+import re
+import hashlib
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16  # 16 bandes de 4 lignes: candidats dès ~0,5 de similarité
+# Au-delà: candidat à la reprise telle quelle, qui exige en plus les mêmes mots
+# dans le même ordre (seules la ponctuation et la casse peuvent différer)
+REUSE_THRESHOLD = 0.95
+# Au-delà: traduction donnée en exemple au modèle
+CONTEXT_THRESHOLD = 0.5
+MAX_EXAMPLES = 8
+
+_EMPTY = 1 << 64
+# Décalage des valeurs empruntées par une case vide (densification)
+_BORROW_OFFSET = 0x9E3779B97F4A7C15
+_WORD = re.compile(r'\w+')
+
+
+class Match(NamedTuple):
+    similarity: float
+    source: str
+    translation: str
+
+
+def normalize(text: str) -> List[str]:
+    """Mots du texte en minuscules, sans ponctuation"""
+    return _WORD.findall(text.lower())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Empreintes 64 bits des n-grammes de mots (le texte entier s'il est plus court)"""
+    words = normalize(text)
+    grams = [' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))]
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little')
+            for g in grams}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class FuzzyIndex:
+    """Index LSH (source -> traduction), sûr pour plusieurs threads"""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._entries: List[Tuple[str, str, Set[int]]] = []
+        self._known: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_memory(cls, memory) -> 'FuzzyIndex':
+        """Index de toutes les traductions d'une TranslationMemory"""
+        index = cls()
+        index.add_many(memory.sources())
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, grams: Set[int]) -> List[int]:
+        k = self.num_perm
+        signature = [_EMPTY] * k
+        for g in grams:
+            slot, value = g % k, g // k
+            if value < signature[slot]:
+                signature[slot] = value
+        if _EMPTY in signature:
+            # Case vide: valeur de la prochaine case pleine (circulairement), décalée par la distance
+            dense = list(signature)
+            nxt = None
+            for i in range(2 * k - 1, -1, -1):
+                if signature[i % k] != _EMPTY:
+                    nxt = i
+                elif i < k:
+                    dense[i] = signature[nxt % k] + (nxt - i) * _BORROW_OFFSET
+            signature = dense
+        return signature
+
+    def _band_keys(self, grams: Set[int]) -> List[Tuple[int, ...]]:
+        signature = self._signature(grams)
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def add(self, source: str, translation: str) -> None:
+        self.add_many([(source, translation)])
+
+    def add_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        for source, translation in pairs:
+            grams = shingles(source)
+            keys = self._band_keys(grams)
+            with self._lock:
+                if source in self._known:
+                    self._entries[self._known[source]] = (source, translation, grams)
+                    continue
+                entry = len(self._entries)
+                self._entries.append((source, translation, grams))
+                self._known[source] = entry
+                for bucket, key in zip(self._buckets, keys):
+                    bucket.setdefault(key, []).append(entry)
+
+    def query(self, text: str, threshold: float = CONTEXT_THRESHOLD, limit: int = 1) -> List[Match]:
+        """Entrées au moins aussi similaires que threshold, les plus proches d'abord"""
+        grams = shingles(text)
+        keys = self._band_keys(grams)
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, keys):
+                candidates.update(bucket.get(key, ()))
+            entries = [self._entries[i] for i in candidates]
+        matches = [Match(jaccard(grams, g), s, t) for s, t, g in entries]
+        matches = [m for m in matches if m.similarity >= threshold]
+        matches.sort(key=lambda m: -m.similarity)
+        return matches[:limit]
+
+    def reuse(self, text: str, threshold: float = REUSE_THRESHOLD) -> Optional[Match]:
+        """Traduction réutilisable telle quelle: mêmes mots (et nombres) dans le même ordre"""
+        words = normalize(text)
+        for match in self.query(text, threshold, limit=MAX_EXAMPLES):
+            if normalize(match.source) == words:
+                return match
+        return None
+
+    def examples(self, texts: Iterable[str], threshold: float = CONTEXT_THRESHOLD,
+                 limit: int = MAX_EXAMPLES) -> List[Tuple[str, str]]:
+        """Paires (source, traduction) les plus proches d'un lot, pour un prompt few-shot"""
+        best: Dict[str, Match] = {}
+        for text in texts:
+            for match in self.query(text, threshold):
+                if match.source != text and (match.source not in best
+                                             or best[match.source].similarity < match.similarity):
+                    best[match.source] = match
+        ranked = sorted(best.values(), key=lambda m: -m.similarity)[:limit]
+        return [(m.source, m.translation) for m in ranked]
+
+
+def group_near_duplicates(texts: List[str], threshold: float = REUSE_THRESHOLD) -> Dict[str, str]:
+    """
+    Textes d'une même liste assez proches pour partager une traduction
+    Retourne: texte -> représentant (premier texte rencontré), pour les seuls doublons
+    """
+    index = FuzzyIndex()
+    aliases = {}
+    for text in texts:
+        match = index.reuse(text, threshold)
+        if match is not None:
+            aliases[text] = match.translation
+        else:
+            index.add(text, text)
+    return aliases
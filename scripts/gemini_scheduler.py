@@ -0,0 +1,221 @@
+"""
+Ordonnanceur de traductions par lots pour Gemini
+Plusieurs requêtes en vol, sous un budget de requêtes et de tokens par minute
+(fenêtre glissante de 60 s). Les lots sont dimensionnés par estimation de tokens
+et remplis dans l'ordre des livres: les petits livres partagent un lot avec leurs voisins
+
+Échange structuré: chaque texte part avec un identifiant, la réponse est un tableau
+JSON [{"id", "fr"}] validé élément par élément; seuls les identifiants manquants
+ou invalides sont renvoyés dans un nouveau lot
+"""
+
+import sys
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Estimation grossière: ~4 caractères par token pour l'anglais
+CHARS_PER_TOKEN = 4
+# Consigne + séparateurs
+PROMPT_OVERHEAD_TOKENS = 120
+PER_TEXT_OVERHEAD_TOKENS = 4
+# Le français est plus long que l'anglais: sortie estimée à 1,3x l'entrée
+OUTPUT_RATIO = 1.3
+
+DEFAULT_RPM = 60
+DEFAULT_TPM = 500_000
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_BATCH_TOKENS = 6000
+# Envois d'un même texte avant de renoncer (le texte original est alors gardé)
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Schéma imposé à la réponse (generationConfig.responseSchema)
+RESPONSE_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {'id': {'type': 'STRING'}, 'fr': {'type': 'STRING'}},
+        'required': ['id', 'fr'],
+    },
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def request_cost(texts: List[str]) -> int:
+    """Tokens comptés pour une requête: consigne + entrée + sortie estimée"""
+    source = sum(estimate_tokens(t) + PER_TEXT_OVERHEAD_TOKENS for t in texts)
+    return PROMPT_OVERHEAD_TOKENS + int(source * (1 + OUTPUT_RATIO))
+
+
+def pack_batches(texts: List[str], max_tokens: int = DEFAULT_BATCH_TOKENS) -> List[List[int]]:
+    """Regroupe les indices de texts en lots consécutifs d'au plus max_tokens (entrée estimée)"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text) + PER_TEXT_OVERHEAD_TOKENS
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_request_items(texts: List[str]) -> Tuple[str, Dict[str, str]]:
+    """Sérialise un lot en [{"id", "en"}]; retourne (json, id -> texte source)"""
+    sources = {str(i + 1): text for i, text in enumerate(texts)}
+    payload = json.dumps([{'id': key, 'en': text} for key, text in sources.items()], ensure_ascii=False)
+    return payload, sources
+
+
+def _decode_items(reply: str) -> List:
+    """Éléments du tableau JSON; si la réponse est tronquée, récupère les objets complets"""
+    try:
+        items = json.loads(reply)
+        return items if isinstance(items, list) else []
+    except ValueError:
+        pass
+    decoder = json.JSONDecoder()
+    items = []
+    pos = reply.find('{')
+    while pos != -1:
+        try:
+            item, end = decoder.raw_decode(reply, pos)
+        except ValueError:
+            break
+        items.append(item)
+        pos = reply.find('{', end)
+    return items
+
+
+def is_valid_translation(source: str, translation) -> bool:
+    """Rejette les traductions vides ou de longueur aberrante (coupées, fusionnées)"""
+    if not isinstance(translation, str) or not translation.strip():
+        return False
+    return len(translation) <= 4 * len(source) + 80 and 3 * len(translation) >= len(source)
+
+
+def parse_translations(reply: str, sources: Dict[str, str]) -> Dict[str, str]:
+    """id -> traduction pour les seuls éléments valides de la réponse"""
+    translations = {}
+    for item in _decode_items(reply):
+        if not isinstance(item, dict):
+            continue
+        key = str(item.get('id', ''))
+        if key in sources and key not in translations and is_valid_translation(sources[key], item.get('fr')):
+            translations[key] = item['fr'].strip()
+    return translations
+
+
+class RateBudget:
+    """Limiteur requêtes/minute et tokens/minute sur fenêtre glissante, partagé entre threads"""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events = deque()  # (instant, tokens)
+        self._tokens = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens: int) -> None:
+        """Bloque jusqu'à ce que la requête tienne dans les deux budgets"""
+        # Une requête plus grosse que le budget passe seule dans la fenêtre
+        tokens = min(tokens, self.tpm)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= self.window:
+                    self._tokens -= self._events.popleft()[1]
+                if len(self._events) < self.rpm and self._tokens + tokens <= self.tpm:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                self._cond.wait(timeout=max(self.window - (now - self._events[0][0]), 0.05))
+
+
+class TranslationScheduler:
+    """
+    Traduit une liste de textes en lots concurrents
+    translate_batch(textes) -> traductions dans le même ordre, None pour un texte
+    manquant ou invalide: ces textes seuls repartent dans un nouveau lot
+    """
+
+    def __init__(self, translate_batch: Callable[[List[str]], List[Optional[str]]],
+                 rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, verbose: bool = True):
+        self.translate_batch = translate_batch
+        self.budget = RateBudget(rpm, tpm)
+        self.max_in_flight = max_in_flight
+        self.batch_tokens = batch_tokens
+        self.max_attempts = max_attempts
+        self.verbose = verbose
+        self.requeued = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._done = 0
+
+    def translate(self, texts: List[str]) -> List[Optional[str]]:
+        """Traductions dans l'ordre de texts; None si un texte a échoué à chaque tentative"""
+        results: List[Optional[str]] = [None] * len(texts)
+        if not texts:
+            return results
+        batches = pack_batches(texts, self.batch_tokens)
+        self._done = 0
+        self.requeued = 0
+        self.failed = 0
+        start = time.time()
+        if self.verbose:
+            print(f"  🔤 {len(texts)} textes en {len(batches)} lots "
+                  f"({self.max_in_flight} en parallèle, {self.budget.rpm} req/min, {self.budget.tpm} tokens/min)")
+
+        def run(indices: List[int]) -> List[int]:
+            """Traduit un lot et retourne les indices à renvoyer"""
+            batch = [texts[i] for i in indices]
+            self.budget.acquire(request_cost(batch))
+            translations = self.translate_batch(batch)
+            missing = []
+            for j, i in enumerate(indices):
+                translation = translations[j] if j < len(translations) else None
+                if translation is None:
+                    missing.append(i)
+                else:
+                    results[i] = translation
+            with self._lock:
+                self._done += len(indices) - len(missing)
+                if self.verbose:
+                    print(f"    Traduit: {self._done}/{len(texts)}", end='\r')
+                    sys.stdout.flush()
+            return missing
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            pending = {pool.submit(run, indices): 1 for indices in batches}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempt = pending.pop(future)
+                    missing = future.result()
+                    if not missing:
+                        continue
+                    if attempt < self.max_attempts:
+                        self.requeued += len(missing)
+                        for indices in pack_batches([texts[i] for i in missing], self.batch_tokens):
+                            pending[pool.submit(run, [missing[k] for k in indices])] = attempt + 1
+                    else:
+                        self.failed += len(missing)
+
+        if self.verbose:
+            print(f"  ✓ {len(texts) - self.failed} textes traduits en {time.time() - start:.0f}s "
+                  f"({self.requeued} renvoyés, {self.failed} abandonnés)    ")
+        return results
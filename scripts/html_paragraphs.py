@@ -0,0 +1,169 @@
+"""
+Extraction du texte des paragraphes <p> d'une page HTML, plusieurs moteurs
+Chaque moteur rend, dans l'ordre du document, le texte de chaque <p> comme
+BeautifulSoup p.get_text(strip=True): chaque nœud texte est nettoyé (strip) puis
+les morceaux sont collés sans séparateur; commentaires, <script> et <style> exclus
+
+  stdlib      tokenisation en flux (html.parser), sans dépendance ni arbre
+  lxml        arbre libxml2 (pip install lxml)
+  selectolax  analyseur lexbor (pip install selectolax)
+  bs4         BeautifulSoup + html.parser, l'implémentation d'origine (référence)
+
+Sur du HTML mal formé (<p> non fermés), lxml et selectolax ferment les paragraphes
+selon HTML5, stdlib et bs4 les imbriquent: stdlib est le moteur par défaut, les
+autres ne sont choisis qu'explicitement, une fois bench-html-extract.py passé sans
+écart sur les pages du cache
+"""
+
+import sys
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKENDS = ('stdlib', 'lxml', 'selectolax', 'bs4')
+# Mêmes paragraphes que bs4 quel que soit le HTML, sans dépendance
+DEFAULT_BACKEND = 'stdlib'
+SKIPPED_TAGS = ('script', 'style')
+# Éléments sans contenu ni balise fermante (comme dans BeautifulSoup)
+VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+                       'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+                       'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'))
+
+
+class _ParagraphCollector(HTMLParser):
+    """
+    Textes des <p> au fil des balises, avec la même pile de balises que l'arbre
+    BeautifulSoup/html.parser: une balise fermante referme tout ce qui a été ouvert
+    après la balise correspondante (</div> referme un <p> resté ouvert), une
+    balise fermante orpheline est ignorée
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: List[List[str]] = []
+        # (balise, indice du paragraphe pour un <p>, sinon None)
+        self._stack: List[Tuple[str, Optional[int]]] = []
+        self._open: List[int] = []
+        self._pending: List[str] = []
+        self._skipping = 0
+
+    def _flush(self) -> None:
+        # Un nœud texte = tout le texte entre deux balises
+        if self._pending:
+            text = ''.join(self._pending).strip()
+            self._pending = []
+            if text and not self._skipping:
+                for index in self._open:
+                    self.paragraphs[index].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            return
+        index = None
+        if tag == 'p':
+            index = len(self.paragraphs)
+            self.paragraphs.append([])
+            self._open.append(index)
+        elif tag in SKIPPED_TAGS:
+            self._skipping += 1
+        self._stack.append((tag, index))
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        if tag == 'p':
+            self.paragraphs.append([])
+
+    def handle_endtag(self, tag):
+        self._flush()
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return
+        for closed, index in self._stack[depth:]:
+            if index is not None:
+                self._open.remove(index)
+            elif closed in SKIPPED_TAGS:
+                self._skipping -= 1
+        del self._stack[depth:]
+
+    def handle_data(self, data):
+        if self._open:
+            self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _stdlib(html: str) -> List[str]:
+    collector = _ParagraphCollector()
+    collector.feed(html)
+    collector.close()
+    return [''.join(parts) for parts in collector.paragraphs]
+
+
+def _lxml(html: str) -> List[str]:
+    import lxml.html
+
+    def texts(element):
+        if element.text and element.tag not in SKIPPED_TAGS:
+            yield element.text
+        for child in element:
+            if isinstance(child.tag, str):
+                yield from texts(child)
+            if child.tail:
+                yield child.tail
+
+    if not html.strip():
+        return []
+    root = lxml.html.document_fromstring(html)
+    return [''.join(s for s in (t.strip() for t in texts(p)) if s) for p in root.iter('p')]
+
+
+def _selectolax(html: str) -> List[str]:
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(list(SKIPPED_TAGS))
+    return [p.text(deep=True, separator='', strip=True) for p in tree.css('p')]
+
+
+def _bs4(html: str) -> List[str]:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return [p.get_text(strip=True) for p in soup.find_all('p')]
+
+
+_EXTRACTORS: Dict[str, Callable[[str], List[str]]] = {
+    'stdlib': _stdlib,
+    'lxml': _lxml,
+    'selectolax': _selectolax,
+    'bs4': _bs4,
+}
+_MODULES = {'lxml': 'lxml.html', 'selectolax': 'selectolax.lexbor', 'bs4': 'bs4'}
+
+
+def available(backend: str) -> bool:
+    if backend == 'stdlib':
+        return True
+    try:
+        __import__(_MODULES[backend])
+        return True
+    except ImportError:
+        return False
+
+
+def get_extractor(backend: str = DEFAULT_BACKEND) -> Callable[[str], List[str]]:
+    """Fonction html -> textes des <p>"""
+    if not available(backend):
+        print(f"❌ Moteur HTML {backend} non installé")
+        print(f"Installez-le avec: pip install {'beautifulsoup4' if backend == 'bs4' else backend}")
+        sys.exit(1)
+    return _EXTRACTORS[backend]
+
+
+def paragraph_texts(html: str, backend: str = DEFAULT_BACKEND) -> List[str]:
+    return get_extractor(backend)(html)
@@ -0,0 +1,291 @@
+"""
+Cache HTTP local partagé pour les sources amont (scrollmapper, get.bible, gratis.bible)
+Index par URL, contenus compressés et adressés par leur empreinte (dédupliqués),
+revalidation ETag / If-Modified-Since et mode hors-ligne
+Politesse optionnelle par hôte (HostLimiter) pour get(): seules les requêtes
+réseau sont limitées, les réponses servies depuis le cache ne le sont pas
+
+Variables d'environnement:
+  WIKIBIBLE_HTTP_CACHE    répertoire du cache (défaut: scripts/.cache/http)
+  WIKIBIBLE_HTTP_OFFLINE  1 = ne servir que depuis le cache, aucune requête réseau
+  WIKIBIBLE_HTTP_MAX_AGE  durée (s) pendant laquelle une entrée est servie sans revalidation
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from supabase_rest import create_session
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'http')
+# Les sources ne changent presque jamais: une semaine sans revalidation
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+
+class HostLimiter:
+    """Par hôte: requêtes simultanées bornées et intervalle minimal entre deux départs"""
+
+    def __init__(self, max_concurrent: int = 2, min_interval: float = 0.3):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slots = self._slots.setdefault(host, threading.BoundedSemaphore(self.max_concurrent))
+        with slots:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class CacheMiss(Exception):
+    """URL absente du cache en mode hors-ligne"""
+
+
+class CachedResponse:
+    """Réponse servie depuis le cache (interface proche de requests.Response)"""
+
+    def __init__(self, url: str, status_code: int, blob_path: Optional[str], from_cache: bool):
+        self.url = url
+        self.status_code = status_code
+        self.from_cache = from_cache
+        self._blob_path = blob_path
+        self._content = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            if self._blob_path is None:
+                self._content = b''
+            else:
+                with gzip.open(self._blob_path, 'rb') as f:
+                    self._content = f.read()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} pour {self.url}")
+
+    def iter_lines(self) -> Iterator[str]:
+        if self._blob_path is None:
+            return
+        with gzip.open(self._blob_path, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                yield line.rstrip('\r\n')
+
+
+class HttpCache:
+    """Cache disque des GET HTTP, sûr pour plusieurs threads"""
+
+    def __init__(self, cache_dir: Optional[str] = None, offline: Optional[bool] = None,
+                 max_age: Optional[float] = None, session: Optional[requests.Session] = None,
+                 limiter: Optional[HostLimiter] = None):
+        self.cache_dir = cache_dir or os.getenv('WIKIBIBLE_HTTP_CACHE', DEFAULT_CACHE_DIR)
+        self.offline = offline if offline is not None else os.getenv('WIKIBIBLE_HTTP_OFFLINE') == '1'
+        self.max_age = max_age if max_age is not None else float(os.getenv('WIKIBIBLE_HTTP_MAX_AGE', DEFAULT_MAX_AGE))
+        self.session = session or create_session(pool_size=8)
+        self.limiter = limiter
+        self.stats = {'hits': 0, 'revalidated': 0, 'fetched': 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.cache_dir, 'index'), exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, 'blobs'), exist_ok=True)
+
+    # --- Index -----------------------------------------------------------
+
+    def _index_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'index', f"{key}.json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'blobs', f"{digest}.gz")
+
+    def _lookup(self, url: str) -> Optional[Dict]:
+        path = self._index_path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('sha256') and not os.path.exists(self._blob_path(entry['sha256'])):
+            return None
+        return entry
+
+    def _store_entry(self, url: str, entry: Dict) -> None:
+        path = self._index_path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _response_from(self, url: str, entry: Dict, from_cache: bool) -> CachedResponse:
+        blob = self._blob_path(entry['sha256']) if entry.get('sha256') else None
+        return CachedResponse(url, entry['status'], blob, from_cache)
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('checked_at', 0) < self.max_age
+
+    def _conditional_headers(self, entry: Optional[Dict]) -> Dict:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @contextmanager
+    def _network_slot(self, url: str):
+        if self.limiter is None:
+            yield
+        else:
+            with self.limiter.slot(url):
+                yield
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _cached_or_none(self, url: str):
+        """Entrée utilisable sans réseau (fraîche ou mode hors-ligne), sinon (None, entrée)"""
+        entry = self._lookup(url)
+        if entry and (self.offline or self._is_fresh(entry)):
+            self._count('hits')
+            return self._response_from(url, entry, True), entry
+        if self.offline:
+            raise CacheMiss(f"Hors-ligne: {url} absent du cache")
+        return None, entry
+
+    def _revalidated(self, url: str, entry: Dict) -> CachedResponse:
+        entry['checked_at'] = time.time()
+        self._store_entry(url, entry)
+        self._count('revalidated')
+        return self._response_from(url, entry, True)
+
+    def _new_entry(self, response: requests.Response, digest: Optional[str]) -> Dict:
+        return {
+            'url': response.url,
+            'status': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': digest,
+            'checked_at': time.time(),
+        }
+
+    # --- API publique ----------------------------------------------------
+
+    def get(self, url: str, timeout: int = 30) -> CachedResponse:
+        """GET avec cache; les réponses d'erreur (404...) sont aussi mémorisées"""
+        cached, entry = self._cached_or_none(url)
+        if cached:
+            return cached
+
+        with self._network_slot(url):
+            response = self.session.get(url, headers=self._conditional_headers(entry), timeout=timeout)
+        if response.status_code == 304 and entry:
+            return self._revalidated(url, entry)
+        if response.status_code >= 500 or response.status_code == 429:
+            # Erreur transitoire: ne pas la mémoriser
+            response.raise_for_status()
+
+        digest = self._write_blob(response.content) if response.content else None
+        new_entry = self._new_entry(response, digest)
+        self._store_entry(url, new_entry)
+        self._count('fetched')
+        return self._response_from(url, new_entry, False)
+
+    def iter_lines(self, url: str, timeout: int = 60) -> Iterator[str]:
+        """
+        Lignes d'un document texte; en cas de téléchargement, les lignes sont
+        produites au fil du flux tout en étant écrites dans le cache
+        """
+        cached, entry = self._cached_or_none(url)
+        if cached:
+            cached.raise_for_status()
+            yield from cached.iter_lines()
+            return
+
+        with self.session.get(url, headers=self._conditional_headers(entry),
+                              timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and entry:
+                yield from self._revalidated(url, entry).iter_lines()
+                return
+            response.raise_for_status()
+
+            hasher = hashlib.sha256()
+            tmp = os.path.join(self.cache_dir, 'blobs', f"stream.{os.getpid()}.{id(response)}.tmp")
+            completed = False
+            try:
+                with gzip.open(tmp, 'wb') as out:
+                    pending = b''
+                    for chunk in response.iter_content(chunk_size=65536):
+                        out.write(chunk)
+                        hasher.update(chunk)
+                        pending += chunk
+                        *lines, pending = pending.split(b'\n')
+                        for line in lines:
+                            yield line.decode('utf-8', errors='replace').rstrip('\r')
+                    if pending:
+                        yield pending.decode('utf-8', errors='replace').rstrip('\r')
+                completed = True
+            finally:
+                if completed:
+                    digest = hasher.hexdigest()
+                    os.replace(tmp, self._blob_path(digest))
+                    self._store_entry(url, self._new_entry(response, digest))
+                    self._count('fetched')
+                elif os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def cached_responses(self, url_prefix: str = '') -> Iterator[CachedResponse]:
+        """Réponses en cache dont l'URL commence par url_prefix (sans réseau)"""
+        index_dir = os.path.join(self.cache_dir, 'index')
+        for name in sorted(os.listdir(index_dir)):
+            try:
+                with open(os.path.join(index_dir, name), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if entry.get('url', '').startswith(url_prefix) and entry.get('sha256'):
+                yield self._response_from(entry['url'], entry, True)
+
+    def summary(self) -> str:
+        return (f"cache HTTP: {self.stats['hits']} servis localement, "
+                f"{self.stats['revalidated']} revalidés (304), {self.stats['fetched']} téléchargés")
+
+    def _write_blob(self, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return digest
@@ -7,10 +7,14 @@ import os
 import sys
 import requests
 import time
-import json
 from typing import Dict, List
 from dotenv import load_dotenv
 
+from supabase_rest import BulkWriter
+from http_cache import HttpCache
+from translation_memory import TranslationMemory
+from mymemory_client import MyMemoryClient
+
 # Charger les variables d'environnement AVANT de les utiliser
 load_dotenv(dotenv_path='.env.local')
 
@@ -20,6 +24,9 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Cache local des livres get.bible (WIKIBIBLE_HTTP_OFFLINE=1 pour rejouer sans réseau)
+HTTP_CACHE = HttpCache()
+
 # Mapping des livres apocryphes
 APOCRYPHAL_BOOKS = [
     {'nr': 67, 'name': '1 Esdras', 'name_fr': '1 Esdras', 'slug': '1-esdras', 'category': 'apocrypha'},
@@ -57,80 +64,17 @@ HEADERS = {
     'Prefer': 'return=minimal'
 }
 
-# Cache de traduction
-TRANSLATION_CACHE = {}
-CACHE_FILE = 'translation-cache.json'
-
-def load_cache():
-    """Charge le cache de traduction depuis le disque"""
-    global TRANSLATION_CACHE
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                TRANSLATION_CACHE = json.load(f)
-                print(f"📦 Cache chargé: {len(TRANSLATION_CACHE)} traductions")
-        except:
-            TRANSLATION_CACHE = {}
-
-def save_cache():
-    """Sauvegarde le cache de traduction sur le disque"""
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(TRANSLATION_CACHE, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"  ⚠ Erreur sauvegarde cache: {e}")
-
-def translate_to_french(text: str) -> str:
-    """Traduit un texte vers le français avec cache"""
-    if not text or not text.strip():
-        return text
-
-    text = text.strip()
-
-    # Vérifier le cache
-    if text in TRANSLATION_CACHE:
-        return TRANSLATION_CACHE[text]
-
-    # Traduire via l'API
-    for attempt in range(3):
-        try:
-            url = 'https://api.mymemory.translated.net/get'
-            params = {'q': text, 'langpair': 'en|fr'}
-            response = requests.get(url, params=params, timeout=10)
-
-            if response.status_code == 429:
-                wait_time = (attempt + 1) * 5
-                print(f"  ⏸ Rate limit - Attente {wait_time}s...")
-                sys.stdout.flush()
-                time.sleep(wait_time)
-                continue
-
-            response.raise_for_status()
-            data = response.json()
-
-            if data['responseStatus'] == 200:
-                translated = data['responseData']['translatedText']
-                # Mettre en cache
-                TRANSLATION_CACHE[text] = translated
-                if len(TRANSLATION_CACHE) % 50 == 0:
-                    save_cache()  # Sauvegarde périodique
-                return translated
-            else:
-                return text
-
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(3)
-                continue
-            return text
-
-    return text
+# Mémoire de traduction partagée (SQLite); l'ancien cache JSON y est migré au démarrage
+TRANSLATION_MEMORY = TranslationMemory('mymemory')
+LEGACY_CACHE_FILE = 'translation-cache.json'
+# Client MyMemory: débit adapté aux 429, versets regroupés dans une même requête
+MYMEMORY = MyMemoryClient(TRANSLATION_MEMORY)
 
 def fetch_from_getbible(book_nr: int):
-    """Récupère un livre depuis get.bible API"""
+    """Récupère un livre depuis get.bible API (via le cache HTTP local)"""
     try:
         url = f"https://api.getbible.net/v2/kjva/{book_nr}.json"
-        response = requests.get(url, timeout=30)
+        response = HTTP_CACHE.get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -206,18 +150,11 @@ def insert_verses(book_id: str, verses: List[Dict]) -> bool:
                 'translation_id': 'auto'
             })
 
-        # Insérer par lots de 100
-        batch_size = 100
-        for i in range(0, len(verses_data), batch_size):
-            batch = verses_data[i:i + batch_size]
-            response = requests.post(
-                f"{SUPABASE_BASE}/apocryphal_verses",
-                headers=HEADERS,
-                json=batch
-            )
-            response.raise_for_status()
+        # Insérer par lots (taille ajustée à la latence, lignes invalides isolées)
+        with BulkWriter(SUPABASE_BASE, HEADERS, 'apocryphal_verses') as writer:
+            writer.write(verses_data)
 
-        return True
+        return writer.rows_failed == 0
 
     except Exception as e:
         print(f"  ✗ Erreur insertion versets: {e}")
@@ -233,14 +170,14 @@ def main():
     print(f"💾 Base: {SUPABASE_URL}")
     print("=" * 70)
 
-    # Charger le cache
-    load_cache()
+    # Migrer l'ancien cache JSON (une seule fois)
+    TRANSLATION_MEMORY.import_json(LEGACY_CACHE_FILE)
 
     print("\n⚠️  ATTENTION: Ce script va:")
     print("  1. Récupérer les textes depuis get.bible API")
     print("  2. Traduire tous les versets en français")
     print("  3. Insérer les données dans Supabase")
-    print(f"\n📦 Cache actuel: {len(TRANSLATION_CACHE)} traductions")
+    print(f"\n📦 Mémoire de traduction: {len(TRANSLATION_MEMORY)} traductions")
 
     confirm = input("\nContinuer? (o/n): ")
     if confirm.lower() != 'o':
@@ -269,19 +206,13 @@ def main():
         # Traduire
         print(f"  🔤 Traduction en cours...")
         sys.stdout.flush()
-        translated_verses = []
-        for idx, v in enumerate(verses, 1):
-            if idx % 10 == 0:
-                print(f"    {idx}/{len(verses)}...", end='\r')
-                sys.stdout.flush()
-            text_fr = translate_to_french(v['text'])
-            translated_verses.append({
-                'chapter': v['chapter'],
-                'verse': v['verse'],
-                'text_original': v['text'],
-                'text_fr': text_fr,
-            })
-            time.sleep(0.3)  # Respecter l'API
+        texts_fr = MYMEMORY.translate_many([v['text'] for v in verses])
+        translated_verses = [{
+            'chapter': v['chapter'],
+            'verse': v['verse'],
+            'text_original': v['text'],
+            'text_fr': text_fr,
+        } for v, text_fr in zip(verses, texts_fr)]
 
         print(f"  ✓ {len(translated_verses)} versets traduits")
 
@@ -308,20 +239,16 @@ def main():
         else:
             print(f"  ✗ Erreur lors de l'insertion des versets")
 
-        # Sauvegarder le cache
-        save_cache()
-
         # Délai entre les livres
         time.sleep(2)
 
-    # Sauvegarde finale du cache
-    save_cache()
-
     print("\n" + "=" * 70)
     print(f"✅ IMPORT TERMINÉ!")
     print(f"   📚 Livres importés: {success_count}/{len(APOCRYPHAL_BOOKS)}")
     print(f"   📝 Versets totaux: {total_verses}")
-    print(f"   📦 Traductions en cache: {len(TRANSLATION_CACHE)}")
+    print(f"   📦 Traductions en mémoire: {len(TRANSLATION_MEMORY)}")
+    print(f"   🌐 {HTTP_CACHE.summary()}")
+    print(f"   🔤 {MYMEMORY.summary()}")
     print("=" * 70)
 
 if __name__ == '__main__':
@@ -8,9 +8,20 @@ import sys
 import requests
 import time
 import json
-from typing import Dict, List
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from pg_copy_sink import SINKS, open_writer
+from http_cache import HttpCache
+from translation_memory import TranslationMemory
+from import_journal import COMMITTED, TRANSLATED, ImportJournal, write_journaled
+from fuzzy_memory import REUSE_THRESHOLD, FuzzyIndex, group_near_duplicates
+from gemini_scheduler import (DEFAULT_BATCH_TOKENS, DEFAULT_MAX_ATTEMPTS, DEFAULT_MAX_IN_FLIGHT,
+                              DEFAULT_RPM, DEFAULT_TPM, RESPONSE_SCHEMA, TranslationScheduler,
+                              build_request_items, parse_translations)
+
 # Charger les variables d'environnement
 load_dotenv(dotenv_path='.env.local')
 
@@ -25,6 +36,9 @@ SERVICE_ACCOUNT_FILE = 'project-5c40c540-b58f-4386-874-37fcd1d6ead0.json'
 PROJECT_ID = 'project-5c40c540-b58f-4386-874'
 LOCATION = 'global'  # Gemini 3 Flash utilise l'endpoint global
 MODEL_ID = 'gemini-3-flash-preview'
+REQUEST_TIMEOUT = 300
+# Nouvelles tentatives sur 429 / 5xx avant de garder le texte original
+MAX_RETRIES = 5
 
 # Configuration Supabase
 SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL', '')
@@ -42,6 +56,9 @@ HEADERS = {
     'Prefer': 'return=minimal'
 }
 
+# Cache local des livres get.bible (WIKIBIBLE_HTTP_OFFLINE=1 pour rejouer sans réseau)
+HTTP_CACHE = HttpCache()
+
 # Mapping des livres apocryphes
 APOCRYPHAL_BOOKS = [
     {'nr': 67, 'name': '1 Esdras', 'name_fr': '1 Esdras', 'slug': '1-esdras', 'category': 'apocrypha'},
@@ -61,8 +78,11 @@ APOCRYPHAL_BOOKS = [
 ]
 
 # Cache de traduction
-TRANSLATION_CACHE = {}
-CACHE_FILE = 'translation-cache-gemini.json'
+# Mémoire de traduction partagée (SQLite); l'ancien cache JSON y est migré au démarrage
+TRANSLATION_MEMORY = TranslationMemory(MODEL_ID)
+LEGACY_CACHE_FILE = 'translation-cache-gemini.json'
+# Index approché de la mémoire: réutilisation des quasi-doublons et exemples few-shot
+FUZZY_INDEX = FuzzyIndex()
 
 # Client Gemini (initialisé plus tard)
 gemini_client = None
@@ -91,40 +111,26 @@ def get_access_token():
         print(f"❌ Erreur authentification: {e}")
         return False
 
-def load_cache():
-    """Charge le cache de traduction depuis le disque"""
-    global TRANSLATION_CACHE
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                TRANSLATION_CACHE = json.load(f)
-                print(f"📦 Cache chargé: {len(TRANSLATION_CACHE)} traductions")
-        except:
-            TRANSLATION_CACHE = {}
-
-def save_cache():
-    """Sauvegarde le cache de traduction sur le disque"""
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(TRANSLATION_CACHE, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"  ⚠ Erreur sauvegarde cache: {e}")
-
-def translate_batch_gemini(texts: List[str]) -> List[str]:
-    """Traduit un lot de textes via Gemini 3 Flash"""
+def translate_batch_gemini(texts: List[str]) -> List[Optional[str]]:
+    """
+    Traduit un lot de textes via Gemini 3 Flash (réponse JSON indexée par identifiant)
+    Retourne les traductions dans l'ordre; None pour un texte absent ou invalide
+    dans la réponse (l'ordonnanceur le renverra seul, il n'est pas mis en mémoire)
+    """
     global access_token
     
     if not texts:
         return []
     
-    # Vérifier le cache d'abord
+    # Vérifier la mémoire de traduction d'abord
     results = []
     texts_to_translate = []
     indices_to_translate = []
     
+    cached = TRANSLATION_MEMORY.get_many(texts)
     for i, text in enumerate(texts):
-        if text in TRANSLATION_CACHE:
-            results.append(TRANSLATION_CACHE[text])
+        if text in cached:
+            results.append(cached[text])
         else:
             results.append(None)
             texts_to_translate.append(text)
@@ -133,15 +139,23 @@ def translate_batch_gemini(texts: List[str]) -> List[str]:
     if not texts_to_translate:
         return results
     
-    # Préparer le prompt pour traduction en batch
-    prompt = """Tu es un traducteur biblique expert. Traduis les versets suivants de l'anglais vers le français.
-Conserve le style solennel et biblique. Réponds UNIQUEMENT avec les traductions, une par ligne, dans le même ordre.
-Ne numérote pas les lignes. Ne rajoute aucun commentaire.
-
-Versets à traduire:
-"""
-    for i, text in enumerate(texts_to_translate):
-        prompt += f"{text}\n---\n"
+    # Chaque verset part avec un identifiant; la réponse doit reprendre ces identifiants
+    items_json, sources = build_request_items(texts_to_translate)
+    prompt = f"""Tu es un traducteur biblique expert. Traduis les versets suivants de l'anglais vers le français.
+Conserve le style solennel et biblique.
+Entrée: un tableau JSON d'objets {{"id", "en"}}.
+Réponds avec un tableau JSON d'objets {{"id", "fr"}}: un objet par identifiant reçu,
+avec le même "id" et la traduction française du champ "en". Aucun commentaire.
+
+{items_json}"""
+    # Versets proches déjà traduits: mêmes formules, même terminologie
+    examples = FUZZY_INDEX.examples(texts_to_translate)
+    if examples:
+        examples_json = json.dumps([{'en': en, 'fr': fr} for en, fr in examples], ensure_ascii=False)
+        prompt += f"""
+
+Traductions déjà validées de versets proches (reprends leurs formules et leur vocabulaire):
+{examples_json}"""
     
     try:
         # Pour global, l'URL est différente (pas de préfixe région)
@@ -162,45 +176,49 @@ Versets à traduire:
             }],
             "generationConfig": {
                 "temperature": 0.3,
-                "maxOutputTokens": 65536  # Max pour Gemini 3 Flash
+                "maxOutputTokens": 65536,  # Max pour Gemini 3 Flash
+                "responseMimeType": "application/json",
+                "responseSchema": RESPONSE_SCHEMA
             }
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=600)  # Timeout augmenté
+        for attempt in range(MAX_RETRIES):
+            response = requests.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            # Quota dépassé ou surcharge: attendre (Retry-After si fourni) puis relancer
+            retry_after = response.headers.get('Retry-After', '')
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
         response.raise_for_status()
         
         data = response.json()
-        translated_text = data['candidates'][0]['content']['parts'][0]['text']
+        reply = ''.join(part.get('text', '') for part in data['candidates'][0]['content']['parts'])
         
-        # Parser les traductions (séparées par ---)
-        translations = [t.strip() for t in translated_text.split('---') if t.strip()]
+        # Ne garder que les éléments valides, rattachés par identifiant
+        translations = parse_translations(reply, sources)
         
-        # Si le nombre ne correspond pas, on utilise la réponse brute découpée par lignes
-        if len(translations) != len(texts_to_translate):
-            translations = [t.strip() for t in translated_text.split('\n') if t.strip()]
-        
-        # Remplir les résultats et le cache
+        validated = []
         for i, idx in enumerate(indices_to_translate):
-            if i < len(translations):
-                results[idx] = translations[i]
-                TRANSLATION_CACHE[texts_to_translate[i]] = translations[i]
-            else:
-                results[idx] = texts_to_translate[i]  # Fallback: texte original
+            translation = translations.get(str(i + 1))
+            if translation is not None:
+                results[idx] = translation
+                validated.append((texts_to_translate[i], translation))
+        # Écriture immédiate: rien n'est perdu si l'import est interrompu
+        TRANSLATION_MEMORY.put_many(validated)
+        FUZZY_INDEX.add_many(validated)
         
         return results
         
     except Exception as e:
         print(f"    ⚠ Erreur traduction Gemini: {e}")
-        # Fallback: retourner les textes originaux
-        for i, idx in enumerate(indices_to_translate):
-            results[idx] = texts_to_translate[i]
+        # Les textes non traduits restent à None et seront renvoyés
         return results
 
 def fetch_from_getbible(book_nr: int):
-    """Récupère un livre depuis get.bible API"""
+    """Récupère un livre depuis get.bible API (via le cache HTTP local)"""
     try:
         url = f"https://api.getbible.net/v2/kjva/{book_nr}.json"
-        response = requests.get(url, timeout=30)
+        response = HTTP_CACHE.get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -222,6 +240,16 @@ def extract_verses(book_data: Dict) -> List[Dict]:
                     })
     return verses
 
+def find_book_id(slug: str) -> Optional[str]:
+    """ID d'un livre apocryphe déjà présent en base (par slug)"""
+    response = requests.get(
+        f"{SUPABASE_BASE}/apocryphal_books?slug=eq.{slug}&select=id",
+        headers=HEADERS
+    )
+    response.raise_for_status()
+    data = response.json()
+    return data[0]['id'] if data else None
+
 def insert_book(book: Dict) -> str:
     """Insère un livre et retourne son ID"""
     try:
@@ -247,22 +275,18 @@ def insert_book(book: Dict) -> str:
 
         # Récupérer l'UUID
         time.sleep(0.5)
-        response = requests.get(
-            f"{SUPABASE_BASE}/apocryphal_books?slug=eq.{book['slug']}&select=id",
-            headers=HEADERS
-        )
-        response.raise_for_status()
-        data = response.json()
-        if data and len(data) > 0:
-            return data[0]['id']
+        book_id = find_book_id(book['slug'])
+        if book_id:
+            return book_id
         raise Exception("UUID non trouvé")
 
     except Exception as e:
         print(f"  ✗ Erreur insertion livre: {e}")
         return None
 
-def insert_verses(book_id: str, verses: List[Dict]) -> bool:
-    """Insère les versets par lots"""
+def insert_verses(book_id: str, verses: List[Dict], journal: ImportJournal, unit: str,
+                  sink: str = 'rest') -> bool:
+    """Insère les versets par lots; les lots déjà validés d'après le journal ne sont pas renvoyés"""
     try:
         # Préparer les données
         verses_data = []
@@ -276,26 +300,95 @@ def insert_verses(book_id: str, verses: List[Dict]) -> bool:
                 'translation_id': 'gemini-3-flash'
             })
 
-        # Insérer par lots de 100
-        insert_batch_size = 500  # Batch d'insertion aussi augmenté
-        for i in range(0, len(verses_data), insert_batch_size):
-            batch = verses_data[i:i + insert_batch_size]
-            response = requests.post(
-                f"{SUPABASE_BASE}/apocryphal_verses",
-                headers=HEADERS,
-                json=batch
-            )
-            response.raise_for_status()
-            print(f"    ✓ Lot {i//insert_batch_size + 1}/{(len(verses_data) + insert_batch_size - 1)//insert_batch_size}")
+        # Lots du journal de DEFAULT_BATCH_ROWS lignes, requêtes dimensionnées par BulkWriter
+        with open_writer(sink, SUPABASE_BASE, HEADERS, 'apocryphal_verses') as writer:
+            skipped = write_journaled(writer, journal, unit, verses_data, complete_stage=COMMITTED)
+        if skipped:
+            print(f"  ↳ {skipped} lots déjà insérés lors d'un lancement précédent")
 
-        return True
+        # Livre noté seulement si tous ses lots sont écrits (ni rejet, ni ligne d'issue inconnue)
+        return journal.done(unit)
 
     except Exception as e:
         print(f"  ✗ Erreur insertion versets: {e}")
         return False
 
+def fetch_all_books(books: List[Dict]) -> List[Dict]:
+    """Récupère et extrait les livres demandés (en parallèle, via le cache HTTP)"""
+    print(f"\n📥 Récupération de {len(books)} livres depuis get.bible...")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        books_data = list(pool.map(lambda b: fetch_from_getbible(b['nr']), books))
+
+    fetched = []
+    for book, book_data in zip(books, books_data):
+        if not book_data:
+            continue
+        verses = extract_verses(book_data)
+        print(f"  ✓ {book['name_fr']}: {len(verses)} versets")
+        fetched.append({**book, 'verses': verses})
+    return fetched
+
+def translate_all(books: List[Dict], scheduler: TranslationScheduler,
+                  reuse_threshold: float = REUSE_THRESHOLD) -> Dict[str, str]:
+    """
+    Traduit d'un coup les textes de tous les livres
+    Les textes déjà en mémoire et les doublons ne sont envoyés qu'une fois; un quasi-doublon
+    (similarité >= reuse_threshold, mêmes mots au signe et à la casse près) d'un verset
+    traduit ou d'un autre verset à traduire reprend sa traduction; un verset seulement
+    proche est traduit, avec la traduction voisine en exemple
+    Retourne: texte original -> traduction (sans les textes dont la traduction a échoué)
+    """
+    texts = list(dict.fromkeys(v['text'] for book in books for v in book['verses']))
+    translations = TRANSLATION_MEMORY.get_many(texts)
+    pending = [text for text in texts if text not in translations]
+    in_memory = len(translations)
+
+    # Quasi-doublons de versets déjà traduits
+    reused = 0
+    for text in pending:
+        match = FUZZY_INDEX.reuse(text, reuse_threshold)
+        if match is not None:
+            translations[text] = match.translation
+            reused += 1
+    pending = [text for text in pending if text not in translations]
+    # Quasi-doublons entre versets à traduire: seul le premier est envoyé
+    aliases = group_near_duplicates(pending, reuse_threshold)
+    pending = [text for text in pending if text not in aliases]
+
+    print(f"\n🔤 Traduction via Gemini 3 Flash: {len(pending)} textes à traduire, "
+          f"{in_memory} déjà en mémoire, {reused + len(aliases)} quasi-doublons réutilisés")
+    for text, translated in zip(pending, scheduler.translate(pending)):
+        # Échec après toutes les tentatives: absent du résultat, non mis en mémoire
+        if translated is not None:
+            translations[text] = translated
+    for text, representative in aliases.items():
+        # Représentant non traduit: le quasi-doublon ne l'est pas non plus
+        if representative in translations:
+            translations[text] = translations[representative]
+    if scheduler.failed:
+        print(f"  ⚠ {scheduler.failed} textes non traduits: leurs livres ne seront pas insérés")
+    return translations
+
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Import des apocryphes avec traduction Gemini")
+    parser.add_argument('--rpm', type=int, default=DEFAULT_RPM, help="requêtes Gemini par minute")
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TPM, help="tokens Gemini par minute (entrée + sortie estimées)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_MAX_IN_FLIGHT, help="requêtes Gemini en vol")
+    parser.add_argument('--batch-tokens', type=int, default=DEFAULT_BATCH_TOKENS,
+                        help="taille d'un lot en tokens de texte source (estimés)")
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="envois d'un verset avant de garder le texte original")
+    parser.add_argument('--reuse-threshold', type=float, default=REUSE_THRESHOLD,
+                        help="similarité à partir de laquelle un quasi-doublon (mêmes mots au signe et à la casse près) "
+                             "reprend une traduction (>1 pour désactiver)")
+    parser.add_argument('--resume', action='store_true',
+                        help="reprendre un import interrompu: livres et lots déjà insérés sautés (journal local)")
+    parser.add_argument('--sink', choices=SINKS, default='rest',
+                        help="rest: API PostgREST par lots (défaut); copy: COPY direct dans PostgreSQL "
+                             "via SUPABASE_DB_URL (psycopg requis)")
+    args = parser.parse_args()
+
     print("\n" + "=" * 70)
     print("🚀 IMPORT APOCRYPHES AVEC GEMINI 3 FLASH")
     print("=" * 70)
@@ -309,105 +402,104 @@ def main():
     if not get_access_token():
         sys.exit(1)
 
-    # Charger le cache
-    load_cache()
+    # Migrer l'ancien cache JSON (une seule fois)
+    TRANSLATION_MEMORY.import_json(LEGACY_CACHE_FILE)
+    FUZZY_INDEX.add_many(TRANSLATION_MEMORY.sources())
 
     print("\n⚠️  Ce script va:")
     print("  1. Récupérer les textes depuis get.bible API")
-    print("  2. Traduire par lots via Gemini 3 Flash")
+    print("  2. Traduire par lots via Gemini 3 Flash (plusieurs requêtes en parallèle)")
     print("  3. Insérer les données dans Supabase")
-    print(f"\n📦 Cache actuel: {len(TRANSLATION_CACHE)} traductions")
+    print(f"\n📦 Mémoire de traduction: {len(TRANSLATION_MEMORY)} traductions")
 
     confirm = input("\nContinuer? (o/n): ")
     if confirm.lower() != 'o':
         print("❌ Annulation")
         sys.exit(0)
 
+    journal = ImportJournal('apocrypha-gemini', resume=args.resume)
+    # Reprise: les livres entièrement insérés ne sont ni relus ni retraduits
+    books = fetch_all_books([b for b in APOCRYPHAL_BOOKS if not journal.skip(b['slug'])])
+
+    scheduler = TranslationScheduler(
+        translate_batch_gemini, rpm=args.rpm, tpm=args.tpm,
+        max_in_flight=args.concurrency, batch_tokens=args.batch_tokens,
+        max_attempts=args.max_attempts
+    )
+    translations = translate_all(books, scheduler, args.reuse_threshold)
+    for book in books:
+        if all(v['text'] in translations for v in book['verses']):
+            journal.mark(book['slug'], TRANSLATED, verses=len(book['verses']))
+
     success_count = 0
     total_verses = 0
 
-    for i, book in enumerate(APOCRYPHAL_BOOKS, 1):
+    for i, book in enumerate(books, 1):
         print(f"\n{'=' * 70}")
-        print(f"[{i}/{len(APOCRYPHAL_BOOKS)}] {book['name_fr']}")
+        print(f"[{i}/{len(books)}] {book['name_fr']}")
         print('=' * 70)
 
-        # Récupérer
-        print(f"  📥 Récupération depuis get.bible...")
-        book_data = fetch_from_getbible(book['nr'])
-        if not book_data:
+        untranslated = sum(1 for v in book['verses'] if v['text'] not in translations)
+        if untranslated:
+            # Ni inséré ni noté: ses textes seront retraduits au prochain lancement
+            print(f"  ⚠ {untranslated} versets non traduits: livre non inséré (relancer avec --resume)")
             continue
 
-        # Extraire
-        verses = extract_verses(book_data)
-        print(f"  ✓ {len(verses)} versets extraits")
-        sys.stdout.flush()
+        translated_verses = [{
+            'chapter': v['chapter'],
+            'verse': v['verse'],
+            'text_original': v['text'],
+            'text_fr': translations[v['text']],
+        } for v in book['verses']]
 
-        # Traduire par lots de 800 versets
-        print(f"  🔤 Traduction via Gemini 3 Flash...")
-        sys.stdout.flush()
-        
-        translated_verses = []
-        batch_size = 300  # Batch réduit à 300 (sécurité timeout)
-        
-        for batch_start in range(0, len(verses), batch_size):
-            batch_end = min(batch_start + batch_size, len(verses))
-            batch = verses[batch_start:batch_end]
-            
-            texts = [v['text'] for v in batch]
-            translations = translate_batch_gemini(texts)
-            
-            for j, v in enumerate(batch):
-                translated_verses.append({
-                    'chapter': v['chapter'],
-                    'verse': v['verse'],
-                    'text_original': v['text'],
-                    'text_fr': translations[j] if j < len(translations) else v['text'],
-                })
-            
-            print(f"    Traduit: {batch_end}/{len(verses)}", end='\r')
-            sys.stdout.flush()
-            time.sleep(0.5)  # Rate limiting prudent avec gros batches
-
-        print(f"  ✓ {len(translated_verses)} versets traduits    ")
-
-        # Insérer le livre
+        # Insérer le livre (ou reprendre celui créé par le lancement interrompu)
         print(f"  💾 Insertion dans Supabase...")
-        book_id = insert_book({
-            'name': book['name'],
-            'name_fr': book['name_fr'],
-            'slug': book['slug'],
-            'category': book['category'],
-            'chapters': len(set(v['chapter'] for v in translated_verses)),
-        })
+        created = journal.info(book['slug'], 'book')
+        if created:
+            book_id = created['id']
+            print(f"  ↳ Livre créé lors d'un lancement précédent (ID: {book_id[:8]}...)")
+        else:
+            try:
+                existing_id = find_book_id(book['slug'])
+            except Exception as e:
+                print(f"  ✗ Vérification du livre impossible: {e}")
+                continue
+            if existing_id:
+                # Absent du journal: état de ses versets inconnu, ne pas le compléter à l'aveugle
+                print(f"  ⚠ Livre déjà en base (ID: {existing_id[:8]}...), ignoré pour ne pas dupliquer ses versets")
+                continue
+            book_id = insert_book({
+                'name': book['name'],
+                'name_fr': book['name_fr'],
+                'slug': book['slug'],
+                'category': book['category'],
+                'chapters': len(set(v['chapter'] for v in translated_verses)),
+            })
 
-        if not book_id:
-            continue
+            if not book_id:
+                continue
 
-        print(f"  ✓ Livre inséré (ID: {book_id[:8]}...)")
+            journal.mark(book['slug'], 'book', id=book_id)
+            print(f"  ✓ Livre inséré (ID: {book_id[:8]}...)")
 
         # Insérer les versets
-        if insert_verses(book_id, translated_verses):
+        if insert_verses(book_id, translated_verses, journal, book['slug'], args.sink):
+            journal.mark(book['slug'], COMMITTED, verses=len(translated_verses))
             print(f"  ✅ {len(translated_verses)} versets insérés!")
             success_count += 1
             total_verses += len(translated_verses)
         else:
-            print(f"  ✗ Erreur lors de l'insertion des versets")
-
-        # Sauvegarder le cache
-        save_cache()
-
-        # Délai entre les livres
-        time.sleep(1)
-
-    # Sauvegarde finale du cache
-    save_cache()
+            print(f"  ✗ Erreur lors de l'insertion des versets (relancer avec --resume)")
 
     print("\n" + "=" * 70)
     print(f"✅ IMPORT TERMINÉ!")
     print(f"   📚 Livres importés: {success_count}/{len(APOCRYPHAL_BOOKS)}")
     print(f"   📝 Versets totaux: {total_verses}")
-    print(f"   📦 Traductions en cache: {len(TRANSLATION_CACHE)}")
+    print(f"   📦 Traductions en mémoire: {len(TRANSLATION_MEMORY)}")
+    print(f"   🌐 {HTTP_CACHE.summary()}")
+    print(f"   📒 {journal.summary()}")
     print("=" * 70)
+    journal.close()
 
 if __name__ == '__main__':
     main()
@@ -5,10 +5,13 @@ Utilise l'API MyMemory gratuita (sans clé) pour la traduction
 
 import os
 import sys
-import requests
 import time
 import json
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+from http_cache import HttpCache
+from translation_memory import TranslationMemory
+from mymemory_client import MyMemoryClient, translate_to_french
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -16,6 +19,14 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Cache local des livres get.bible (WIKIBIBLE_HTTP_OFFLINE=1 pour rejouer sans réseau)
+HTTP_CACHE = HttpCache()
+
+# Mémoire de traduction partagée avec les autres imports MyMemory (SQLite)
+TRANSLATION_MEMORY = TranslationMemory('mymemory')
+# Client MyMemory: débit adapté aux 429, versets regroupés dans une même requête
+MYMEMORY = MyMemoryClient(TRANSLATION_MEMORY)
+
 # Mapping des livres apocryphes
 APOCRYPHAL_BOOKS = [
     {'nr': 67, 'name': '1 Esdras', 'name_fr': '1 Esdras', 'slug': '1-esdras', 'category': 'apocrypha'},
@@ -34,65 +45,11 @@ APOCRYPHAL_BOOKS = [
     {'nr': 81, 'name': '2 Maccabees', 'name_fr': '2 Maccabées', 'slug': '2-maccabees', 'category': 'deutero'},
 ]
 
-def translate_to_french(text: str, max_retries: int = 3) -> str:
-    """
-    Traduit un texte vers le français utilisant l'API MyMemory gratuite
-    """
-    if not text or not text.strip():
-        return text
-
-    # Nettoyer le texte
-    text = text.strip()
-
-    # Si le texte contient déjà un marqueur de traduction, le retourner
-    if text.startswith('[TRADUCTION FR]') or text.startswith('[FR]'):
-        return text.replace('[TRADUCTION FR] ', '').replace('[FR] ', '')
-
-    for attempt in range(max_retries):
-        try:
-            # Utiliser l'API MyMemory (gratuite, sans clé)
-            url = 'https://api.mymemory.translated.net/get'
-            params = {
-                'q': text,
-                'langpair': 'en|fr'
-            }
-
-            response = requests.get(url, params=params, timeout=10)
-
-            # Gérer le rate limit (429)
-            if response.status_code == 429:
-                wait_time = (attempt + 1) * 5  # 5s, 10s, 15s
-                print(f"  ⏸ Rate limit - Attente {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-
-            response.raise_for_status()
-            data = response.json()
-
-            if data['responseStatus'] == 200:
-                translated = data['responseData']['translatedText']
-                print(f"  ✓ Traduit: {text[:50]}...")
-                return translated
-            else:
-                print(f"  ⚠ Erreur traduction: {data.get('responseDetails', 'Erreur inconnue')}")
-                return text
-
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 3
-                print(f"  ⚠ Erreur {e} - Retry {attempt + 1}/{max_retries} (attente {wait_time}s)...")
-                time.sleep(wait_time)
-                continue
-            print(f"  ✗ Erreur traduction finale: {e}")
-            return text
-
-    return text  # Fallback après tous les essais
-
 def fetch_from_getbible(book_nr: int):
-    """Récupère un livre depuis get.bible API"""
+    """Récupère un livre depuis get.bible API (via le cache HTTP local)"""
     try:
         url = f"https://api.getbible.net/v2/kjva/{book_nr}.json"
-        response = requests.get(url, timeout=30)
+        response = HTTP_CACHE.get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -144,20 +101,14 @@ def main():
         print(f"  ✓ {len(verses)} versets extraits")
 
         # Traduire les versets
-        translated_verses = []
         print(f"  🔤 Traduction en cours...")
-        for idx, v in enumerate(verses, 1):
-            if idx % 10 == 0:
-                print(f"    Progression: {idx}/{len(verses)} versets...")
-            text_fr = translate_to_french(v.get('text', ''))
-            translated_verses.append({
-                'chapter': v['chapter'],
-                'verse': v['verse'],
-                'text_original': v['text'],
-                'text_fr': text_fr,
-            })
-            # Délai entre chaque traduction pour éviter le rate limit
-            time.sleep(0.5)
+        texts_fr = translate_to_french(MYMEMORY, [v.get('text', '') for v in verses])
+        translated_verses = [{
+            'chapter': v['chapter'],
+            'verse': v['verse'],
+            'text_original': v['text'],
+            'text_fr': text_fr,
+        } for v, text_fr in zip(verses, texts_fr)]
 
         # Créer le livre avec les versets
         book_record = {
@@ -186,6 +137,7 @@ def main():
 
     print("\n" + "=" * 60)
     print(f"✅ {len(all_books)} livres exportés dans {output_file}")
+    print(f"🔤 {MYMEMORY.summary()}")
     print("=" * 60)
     print("\n📄 Utilisez les fichiers SQL générés pour l'import dans Supabase")
     print("🔥 Bon courage !")
@@ -6,10 +6,15 @@ Utilise pdfplumber avec layout=True et des regex robustes
 import os
 import sys
 import re
-from typing import List, Dict, Tuple
+import argparse
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import requests
 
+from pg_copy_sink import SINKS, open_writer
+from pdf_pages import count_pages, iter_page_texts, require_pdfplumber
+from line_classifier import BOOK, UNKNOWN, VERSE_CLASSES, LineClassifier
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -34,6 +39,8 @@ HEADERS = {
     'Prefer': 'return=representation'
 }
 
+WHITESPACE = re.compile(r'\s+')
+
 # Même mapping que l'original
 BOOK_MAPPING = {
     'Genèse': 'Genesis', 'Exode': 'Exodus', 'Lévitique': 'Leviticus',
@@ -82,146 +89,71 @@ def fetch_books() -> List[Dict]:
     print(f"✓ {len(books)} livres récupérés")
     return books
 
-def parse_pdf_improved(pdf_path: str) -> List[Tuple[str, int, int, str]]:
+def parse_pdf_improved(pdf_path: str, workers: Optional[int] = None, use_cache: bool = True) -> List[Tuple[str, int, int, str]]:
     """
     Version AMÉLIORÉE du parsing PDF avec layout=True et regex robustes
+    Pages extraites en parallèle (workers processus) puis parsées dans l'ordre
     """
     print(f"📖 Parsing du PDF: {pdf_path}")
-
-    try:
-        import pdfplumber
-    except ImportError:
-        print("❌ pdfplumber manquant: pip install pdfplumber")
-        sys.exit(1)
+    require_pdfplumber()
 
     verses = []
-    current_book = None
-    current_chapter = None
+    # Classification des lignes en une passe (suit le livre / chapitre courant)
+    classifier = LineClassifier(BOOK_MAPPING.keys())
     stats = {'pages': 0, 'verses': 0, 'errors': 0}
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        print(f"📄 {total_pages} pages à traiter\n")
+    total_pages = count_pages(pdf_path, use_cache=use_cache)
+    print(f"📄 {total_pages} pages à traiter\n")
+
+    # Utiliser layout=True pour préserver la mise en page
+    for page_num, text in iter_page_texts(pdf_path, layout=True, workers=workers, use_cache=use_cache):
+        if page_num % 10 == 0:
+            print(f"   Page {page_num}/{total_pages}... ({stats['verses']} versets)")
+
+        if not text:
+            continue
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            if page_num % 10 == 0:
-                print(f"   Page {page_num}/{total_pages}... ({stats['verses']} versets)")
+        stats['pages'] += 1
+        lines = text.split('\n')
 
-            # Utiliser layout=True pour préserver la mise en page
-            text = page.extract_text(layout=True)
-            if not text:
+        for line in lines:
+            line = line.strip()
+            if not line:
                 continue
 
-            stats['pages'] += 1
-            lines = text.split('\n')
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # 1. Détecter un nouveau livre (tout en majuscules)
-                if re.match(r'^[A-ZÂÊÎÔÛÀÙÇÉÈ\s]+$', line) and len(line) < 40:
-                    potential_book = line.strip()
-                    if potential_book in BOOK_MAPPING:
-                        current_book = potential_book
-                        current_chapter = None
-                        print(f"📖 Livre: {current_book}")
-                        continue
-
-                # 2. Détecter "Chapitre X" ou juste "X" (numéro)
-                chapter_match = re.match(r'^Chapitre\s+(\d+)', line, re.IGNORECASE)
-                if chapter_match:
-                    current_chapter = int(chapter_match.group(1))
-                    continue
-
-                # Numéro seul = probablement un chapitre
-                if line.isdigit() and int(line) < 200:
-                    current_chapter = int(line)
-                    continue
-
-                # 3. Patterns MULTIPLES pour les versets
-                verse_data = None
-
-                # Pattern A: "Genèse 1, 1 Au commencement..." (avec nom du livre)
-                pattern_a = re.match(r'^([A-Z][a-zàâéèêëîïôûùüç\s\'\-]+?)\s+(\d+)[\.,]\s*(\d+)\s+(.+)$', line)
-                if pattern_a:
-                    book_name = pattern_a.group(1).strip()
-                    if book_name in BOOK_MAPPING:
-                        verse_data = (
-                            book_name,
-                            int(pattern_a.group(2)),
-                            int(pattern_a.group(3)),
-                            pattern_a.group(4).strip()
-                        )
-                        current_book = book_name
-                        current_chapter = int(pattern_a.group(2))
-
-                # Pattern B: "1, 2 Au commencement..." (sans nom du livre)
-                if not verse_data:
-                    pattern_b = re.match(r'^(\d+)[\.,]\s*(\d+)\s+(.+)$', line)
-                    if pattern_b and current_book:
-                        verse_data = (
-                            current_book,
-                            int(pattern_b.group(1)),
-                            int(pattern_b.group(2)),
-                            pattern_b.group(3).strip()
-                        )
-                        current_chapter = int(pattern_b.group(1))
-
-                # Pattern C: "1. Au commencement..." (numéro avec point)
-                if not verse_data and current_book:
-                    pattern_c = re.match(r'^(\d+)\.\s+(.+)$', line)
-                    if pattern_c and current_chapter:
-                        verse_data = (
-                            current_book,
-                            current_chapter,
-                            int(pattern_c.group(1)),
-                            pattern_c.group(2).strip()
-                        )
-
-                # Pattern D: "1 Au commencement..." (numéro espace texte)
-                if not verse_data and current_book:
-                    pattern_d = re.match(r'^(\d+)\s+([A-Z].+)$', line)
-                    if pattern_d and current_chapter:
-                        # Vérifier que le numéro n'est pas trop grand (pas un chapitre)
-                        if int(pattern_d.group(1)) < 200:
-                            verse_data = (
-                                current_book,
-                                current_chapter,
-                                int(pattern_d.group(1)),
-                                pattern_d.group(2).strip()
-                            )
-
-                if verse_data:
-                    book_name, chapter, verse_num, text = verse_data
-
-                    # Nettoyer le texte
-                    text = re.sub(r'\s+', ' ', text)
-                    text = text[:500]
-
-                    if text and len(text) > 2:  # Éviter les versets vides/trop courts
-                        verses.append((book_name, chapter, verse_num, text))
-                        stats['verses'] += 1
-                else:
-                    # Détection des erreurs (lignes non reconnues)
-                    if len(line) > 10 and not line.startswith('http'):
-                        stats['errors'] += 1
+            token = classifier.feed(line)
+            kind = token[0]
+
+            if kind == BOOK:
+                print(f"📖 Livre: {token[1]}")
+            elif kind in VERSE_CLASSES:
+                _, book_name, chapter, verse_num, text = token
+
+                # Nettoyer le texte
+                text = WHITESPACE.sub(' ', text)
+                text = text[:500]
+
+                if text and len(text) > 2:  # Éviter les versets vides/trop courts
+                    verses.append((book_name, chapter, verse_num, text))
+                    stats['verses'] += 1
+            elif kind == UNKNOWN:
+                # Détection des erreurs (lignes non reconnues)
+                if len(line) > 10 and not line.startswith('http'):
+                    stats['errors'] += 1
 
     print(f"\n✓ Parsing terminé!")
     print(f"  Pages traitées: {stats['pages']}")
     print(f"  Versets extraits: {stats['verses']}")
     print(f"  Lignes non reconnues: {stats['errors']}")
+    print(f"  Classes de lignes: {classifier.report()}")
 
     return verses
 
-def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) -> None:
-    """Insère les versets dans Supabase par lots de 100"""
+def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict], sink: str = 'rest') -> None:
+    """Insère les versets dans Supabase par lots (taille ajustée par BulkWriter)"""
     print(f"\n💾 Insertion dans Supabase...")
 
     book_id_map = {book['name']: book['id'] for book in books}
-    batch_size = 100
-    total_inserted = 0
     errors = []
 
     # Supprimer d'abord les anciens versets Jérusalem pour éviter les doublons
@@ -237,17 +169,14 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
         print("⚠️  Impossible de supprimer (peut-être aucun verset existe)")
 
     # Insérer les nouveaux versets
-    for i in range(0, len(verses), batch_size):
-        batch = verses[i:i+batch_size]
-        batch_data = []
-
-        for book_name, chapter, verse_num, text in batch:
+    def iter_rows():
+        for book_name, chapter, verse_num, text in verses:
             book_id = book_id_map.get(book_name)
             if not book_id:
                 errors.append(f"Livre introuvable: {book_name}")
                 continue
 
-            batch_data.append({
+            yield {
                 'book_id': book_id,
                 'chapter': chapter,
                 'verse': verse_num,
@@ -259,23 +188,13 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
                     .replace('à', 'a').replace('ù', 'u')
                     .replace('ô', 'o').replace('î', 'i')
                     .replace('ê', 'e').replace('â', 'a')
-            })
+            }
 
-        if not batch_data:
-            continue
-
-        response = requests.post(
-            f"{SUPABASE_BASE}/bible_verses",
-            headers=HEADERS,
-            json=batch_data
-        )
+    with open_writer(sink, SUPABASE_BASE, HEADERS, 'bible_verses') as writer:
+        writer.write(iter_rows())
 
-        if response.status_code == 201:
-            total_inserted += len(batch_data)
-            print(f"   {total_inserted}/{len(verses)} versets insérés...")
-        else:
-            print(f"❌ Erreur batch {i}: {response.status_code}")
-            errors.append(f"Batch {i}: {response.status_code}")
+    total_inserted = writer.rows_sent
+    errors.extend(f"Lot: {e}" for e in writer.errors)
 
     print(f"\n✓ {total_inserted} versets insérés avec succès")
 
@@ -284,7 +203,19 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
         for err in errors[:10]:
             print(f"   - {err}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import amélioré de la Bible de Jérusalem depuis le PDF")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processus d'extraction des pages (défaut: un par cœur, 1 = séquentiel)")
+    parser.add_argument('--no-pdf-cache', action='store_true',
+                        help="extraire les pages sans passer par le cache (scripts/.cache/pdf-text.sqlite)")
+    parser.add_argument('--sink', choices=SINKS, default='rest',
+                        help="rest: API PostgREST par lots (défaut); copy: COPY direct dans PostgreSQL "
+                             "via SUPABASE_DB_URL (psycopg requis)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("🙏 IMPORT BIBLE DE JÉRUSALEM - VERSION AMÉLIORÉE")
     print("="*80)
 
@@ -298,14 +229,14 @@ def main():
     books = fetch_books()
 
     # 2. Parser le PDF avec les nouveaux regex
-    verses = parse_pdf_improved(pdf_path)
+    verses = parse_pdf_improved(pdf_path, workers=args.workers, use_cache=not args.no_pdf_cache)
 
     if not verses:
         print("❌ Aucun verset extrait!")
         sys.exit(1)
 
     # 3. Insérer dans Supabase
-    insert_verses(verses, books)
+    insert_verses(verses, books, args.sink)
 
     print("\n" + "="*80)
     print("✅ IMPORT TERMINÉ!")
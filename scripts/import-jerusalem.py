@@ -5,12 +5,16 @@ Utilise pdfplumber pour extraire le texte et parser les versets
 
 import os
 import sys
-import re
 import json
+import argparse
 from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import requests
 
+from pg_copy_sink import SINKS, open_writer
+from pdf_pages import count_pages, iter_page_texts, require_pdfplumber
+from verse_scanner import VerseScanner
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -137,147 +141,35 @@ def fetch_books() -> List[Dict]:
     print(f"✓ {len(books)} livres récupérés")
     return books
 
-def clean_text(text: str) -> str:
-    """Nettoie le texte d'un verset"""
-    if not text:
-        return ""
-    # Remplacer les retours à la ligne par des espaces
-    text = text.replace('\n', ' ')
-    # Supprimer les espaces multiples
-    text = re.sub(r'\s+', ' ', text)
-    # Supprimer le tiret de césure à la fin si nécessaire (ex: "commen-\ncement" -> "commencement")
-    # C'est délicat car certains mots ont des tirets. On va juste faire basique pour l'instant.
-    return text.strip()
-
-def parse_pdf_text(pdf_path: str) -> List[Tuple[str, int, int, str]]:
+def parse_pdf_text(pdf_path: str, workers: Optional[int] = None, use_cache: bool = True) -> List[Tuple[str, int, int, str]]:
     """
     Extrait et parse le texte du PDF de la Bible de Jérusalem
+    L'extraction des pages est répartie sur un pool de processus (workers);
+    les pages arrivent dans l'ordre et sont découpées en versets par VerseScanner
     Retourne: List[(book_name, chapter, verse, text)]
     """
     print(f"📖 Ouverture du PDF: {pdf_path}")
+    require_pdfplumber()
 
-    try:
-        import pdfplumber
-    except ImportError:
-        print("❌ pdfplumber n'est pas installé")
-        print("Installez-le avec: pip install pdfplumber")
-        sys.exit(1)
+    # Découpage incrémental: seule la nouvelle page (et une courte fin reportée) est analysée
+    scanner = VerseScanner(BOOK_MAPPING.keys())
 
-    verses = []
-    
-    # Construire l'expression régulière pour détecter le début d'un verset
-    # Trier les livres par longueur décroissante pour éviter les conflits (ex: "1 Jean" vs "Jean")
-    sorted_books = sorted(BOOK_MAPPING.keys(), key=len, reverse=True)
-    books_pattern = '|'.join(map(re.escape, sorted_books))
-    
-    # Pattern: Book Name + Chapter + comma + Verse
-    # Capture groups: 1=Book, 2=Chapter, 3=Verse
-    verse_start_pattern = re.compile(f'({books_pattern})\\s+(\\d+),\\s+(\\d+)')
+    total_pages = count_pages(pdf_path, use_cache=use_cache)
+    print(f"📄 {total_pages} pages à traiter")
 
-    current_book = None
-    current_chapter = None
-    current_verse_num = None
-    pending_text_buffer = ""
+    for page_num, text in iter_page_texts(pdf_path, workers=workers, use_cache=use_cache):
+        if page_num % 50 == 0:
+            print(f"   Traitement page {page_num}/{total_pages} | Versets trouvés: {len(scanner.verses)}")
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        print(f"📄 {total_pages} pages à traiter")
-
-        for page_num, page in enumerate(pdf.pages, 1):
-            if page_num % 50 == 0:
-                print(f"   Traitement page {page_num}/{total_pages} | Versets trouvés: {len(verses)}")
-
-            text = page.extract_text()
-            if not text:
-                continue
-
-            # Ajouter le texte de la page au buffer en cours
-            # On ajoute un espace pour éviter de coller les mots entre pages
-            full_text = pending_text_buffer + " " + text
-            
-            # Chercher tous les débuts de versets dans ce bloc de texte
-            matches = list(verse_start_pattern.finditer(full_text))
-            
-            if matches:
-                # S'il y a des correspondances, on traite le texte
-                
-                # 1. Texte avant le premier match -> appartient au verset précédent (si existe)
-                first_match = matches[0]
-                prefix_text = full_text[:first_match.start()]
-                
-                if current_book and current_chapter and current_verse_num:
-                    # On complète le verset précédent et on l'enregistre
-                    complete_previous_text = clean_text(prefix_text)
-                    if complete_previous_text:
-                        # Append to last verse if we are just continuing?
-                        # No, we treat verses as atomic per logic block usually, but here we rebuild it.
-                        # Wait, the 'verses' list stores finalized verses.
-                        # But we haven't finalized the last one yet because we were waiting for more text.
-                        # So we need to UPDATE the last parsed verse?
-                        # Actually, better: accumulate text in variables, only append to `verses` when we start a NEW verse.
-                        pass
-                
-                # Logic Refinement:
-                # We commit a verse ONLY when we hit the START of the NEXT verse.
-                # 'prefix_text' completes the PREVIOUS verse.
-                
-                if current_book:
-                   # This completes the currently open verse
-                   final_text = clean_text(prefix_text)
-                   # Only append if valid?
-                   if final_text or current_verse_num: # Text might be empty if just header? Rare.
-                       # Nettoyer "Chapitre X" qui traîne souvent à la fin du verset précédent
-                       # Regex pour enlever "Chapitre X" à la fin
-                       final_text = re.sub(r'Chapitre\s+\d+\s*$', '', final_text, flags=re.IGNORECASE).strip()
-                       
-                       verses.append((current_book, current_chapter, current_verse_num, final_text))
-                
-                # 2. Traiter les matchs intermédiaire
-                for i in range(len(matches)):
-                    match = matches[i]
-                    # Extraire les infos du header
-                    book_name = match.group(1)
-                    chapter_num = int(match.group(2))
-                    verse_num = int(match.group(3))
-                    
-                    # Déterminer la fin du texte pour ce verset
-                    start_text_idx = match.end()
-                    
-                    if i < len(matches) - 1:
-                        # Ce n'est pas le dernier match, donc le texte va jusqu'au prochain match
-                        end_text_idx = matches[i+1].start()
-                        verse_content = full_text[start_text_idx:end_text_idx]
-                        
-                        # Nettoyer et enregistrer ce verset immédiatement car il est clos par le suivant
-                        verse_content = clean_text(verse_content)
-                        verse_content = re.sub(r'Chapitre\s+\d+\s*$', '', verse_content, flags=re.IGNORECASE).strip()
-                        
-                        verses.append((book_name, chapter_num, verse_num, verse_content))
-                    else:
-                        # C'est le dernier match de la page/buffer
-                        # Le texte va jusqu'à la fin du buffer
-                        # Ce verset reste "ouvert" (pending)
-                        current_book = book_name
-                        current_chapter = chapter_num
-                        current_verse_num = verse_num
-                        pending_text_buffer = full_text[start_text_idx:]
-            
-            else:
-                # Aucun match sur cette page.
-                # Tout le texte appartient au verset en cours (s'il y en a un)
-                # On garde tout dans le buffer
-                pending_text_buffer = full_text
+        scanner.feed(text)
 
     # Fin du fichier: enregistrer le dernier verset en cours
-    if current_book and pending_text_buffer:
-        final_text = clean_text(pending_text_buffer)
-        final_text = re.sub(r'Chapitre\s+\d+\s*$', '', final_text, flags=re.IGNORECASE).strip()
-        verses.append((current_book, current_chapter, current_verse_num, final_text))
+    verses = scanner.finish()
 
     print(f"\n✓ {len(verses)} versets extraits au total")
     return verses
 
-def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) -> None:
+def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict], sink: str = 'rest') -> None:
     """Insère les versets dans Supabase"""
     print(f"\n💾 Insertion des versets dans Supabase...")
 
@@ -298,27 +190,13 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
     # BOOK_MAPPING keys are PDF names (FR).
     # We need to match these to DB IDs.
     
-    # Préparer les données en lots
-    batch_size = 500 # Augmenter la taille du batch pour aller plus vite
-    total_inserted = 0
+    # Préparer les données en lots, envoyés en parallèle par le writer
     errors = []
 
-    for i in range(0, len(verses), batch_size):
-        batch = verses[i:i+batch_size]
-        batch_data = []
-
-        for book_name, chapter, verse_num, text in batch:
+    def iter_rows():
+        for book_name, chapter, verse_num, text in verses:
             # Essayer de trouver l'ID du livre
             book_id = book_id_map.get(book_name)
-            
-            # Si pas de match direct, essayer via le mapping anglais -> ID (si la DB a des noms anglais ?)
-            if not book_id:
-                # Fallback: peut-être la DB a "Genesis" mais on a "Genèse"
-                mapped_name = BOOK_MAPPING.get(book_name)
-                if mapped_name:
-                    # Chercher dans les books si un a ce nom
-                    # C'est un peu flou sans voir la DB, mais on suppose que 'name' est la clé.
-                    pass
 
             if not book_id:
                 # Log seulement une fois par livre manquant pour éviter le spam
@@ -329,32 +207,20 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
             # Créer le slug
             slug = BOOK_MAPPING.get(book_name, book_name).lower().replace(' ', '-')
 
-            batch_data.append({
+            yield {
                 'book_id': book_id,
                 'chapter': chapter,
                 'verse': verse_num,
                 'text': text,
                 'translation_id': 'jerusalem',
                 'book_slug': slug
-            })
-
-        if not batch_data:
-            continue
-
-        # Insérer le batch
-        response = requests.post(
-            f"{SUPABASE_BASE}/bible_verses",
-            headers=HEADERS,
-            json=batch_data
-        )
-
-        if response.status_code == 201:
-            total_inserted += len(batch_data)
-            # print(f"   {total_inserted}/{len(verses)}...", end='\r')
-        else:
-            print(f"\n❌ Erreur insertion batch {i}: {response.status_code}")
-            # print(response.text[:200])
-            errors.append(f"Batch {i}: {response.status_code}")
+            }
+
+    with open_writer(sink, SUPABASE_BASE, HEADERS, 'bible_verses') as writer:
+        writer.write(iter_rows())
+
+    total_inserted = writer.rows_sent
+    errors.extend(f"Lot: {e}" for e in writer.errors)
 
     print(f"\n✓ {total_inserted} versets insérés avec succès")
 
@@ -363,7 +229,19 @@ def insert_verses(verses: List[Tuple[str, int, int, str]], books: List[Dict]) ->
         for error in errors[:10]:
             print(f"   - {error}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import de la Bible de Jérusalem depuis le PDF")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processus d'extraction des pages (défaut: un par cœur, 1 = séquentiel)")
+    parser.add_argument('--no-pdf-cache', action='store_true',
+                        help="extraire les pages sans passer par le cache (scripts/.cache/pdf-text.sqlite)")
+    parser.add_argument('--sink', choices=SINKS, default='rest',
+                        help="rest: API PostgREST par lots (défaut); copy: COPY direct dans PostgreSQL "
+                             "via SUPABASE_DB_URL (psycopg requis)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("🙏 Importation de la Bible de Jérusalem (FIXED VERSION)\n")
     print("="*60)
 
@@ -378,7 +256,7 @@ def main():
     books = fetch_books()
 
     # Étape 2: Parser le PDF
-    verses = parse_pdf_text(pdf_path)
+    verses = parse_pdf_text(pdf_path, workers=args.workers, use_cache=not args.no_pdf_cache)
 
     if not verses:
         print("❌ Aucun verset extrait du PDF")
@@ -389,7 +267,7 @@ def main():
         print(f" - {v}")
 
     # Étape 3: Insérer dans Supabase
-    insert_verses(verses, books)
+    insert_verses(verses, books, args.sink)
 
     print("\n" + "="*60)
     print("✅ Importation terminée avec succès!")
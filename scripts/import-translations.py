@@ -5,12 +5,19 @@ Supporte KJV, ASV, BBE, WEB, YLT depuis le dépôt GitHub
 
 import os
 import sys
+import argparse
 import requests
 import time
 import json
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, Optional
 from dotenv import load_dotenv
 
+from supabase_rest import VERSE_KEY_COLUMNS, check_on_conflict, fetch_verse_hashes, text_hash
+from pg_copy_sink import SINKS, open_writer
+from catalog_status import CatalogStatus
+from http_cache import HttpCache
+from import_journal import COMMITTED, ImportJournal, write_journaled
+
 # Charger les variables d'environnement
 load_dotenv(dotenv_path='.env.local')
 
@@ -36,6 +43,9 @@ HEADERS = {
     'Prefer': 'return=minimal'
 }
 
+# Cache local des fichiers sources (revalidation ETag, mode hors-ligne)
+HTTP_CACHE = HttpCache()
+
 # Base URL pour les fichiers bruts GitHub
 SCROLLMAPPER_RAW_BASE = "https://raw.githubusercontent.com/scrollmapper/bible_databases/master/formats/txt"
 
@@ -93,130 +103,191 @@ def build_book_mapping():
                 print(f"❌ Erreur construction mapping après {max_retries} tentatives")
                 return False
 
-def fetch_translation_file(filename: str) -> List[Dict]:
-    """Télécharge un fichier de traduction depuis GitHub"""
-    try:
-        url = f"{SCROLLMAPPER_RAW_BASE}/{filename}"
-        print(f"  📥 Téléchargement: {url}")
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-
-        # Parser le fichier
-        # Format: [chapter:verse] Text
-        # Avec des marqueurs ### Book Name
-        verses = []
-        current_book = None
-        current_book_num = 0
-
-        for line in response.text.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
+def parse_translation_lines(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    Parse un fichier scrollmapper ligne par ligne et produit les versets au fil de l'eau
+    Format: [chapter:verse] Text, avec des marqueurs ### Book Name
+    """
+    current_book = None
+    current_book_num = 0
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
 
-            # Marqueur de nom de livre
-            if line.startswith('### '):
-                current_book = line[4:].strip()
-                # Trouver le numéro du livre dans notre base
-                # On utilisera la position pour faire correspondre
-                current_book_num += 1
-                print(f"    📖 Livre détecté: {current_book} (Position {current_book_num})")
-                continue
+        # Marqueur de nom de livre
+        if line.startswith('### '):
+            current_book = line[4:].strip()
+            # Trouver le numéro du livre dans notre base
+            # On utilisera la position pour faire correspondre
+            current_book_num += 1
+            print(f"    📖 Livre détecté: {current_book} (Position {current_book_num})")
+            continue
 
-            # Format de verset [chapter:verse]
-            if line.startswith('[') and '] ' in line:
-                try:
-                    verse_marker_end = line.index(']')
-                    verse_ref = line[1:verse_marker_end]  # chapter:verse
-                    text = line[verse_marker_end + 2:]  # Texte après "] "
-
-                    if ':' in verse_ref:
-                        chapter_str, verse_str = verse_ref.split(':')
-                        chapter = int(chapter_str)
-                        verse = int(verse_str)
-
-                        verses.append({
-                            'book_num': current_book_num,
-                            'chapter': chapter,
-                            'verse': verse,
-                            'text': text
-                        })
-                except (ValueError, IndexError) as e:
-                    # Ignorer les lignes mal formatées
-                    continue
+        # Format de verset [chapter:verse]
+        if line.startswith('[') and '] ' in line:
+            try:
+                verse_marker_end = line.index(']')
+                verse_ref = line[1:verse_marker_end]  # chapter:verse
+                text = line[verse_marker_end + 2:]  # Texte après "] "
+
+                if ':' in verse_ref:
+                    chapter_str, verse_str = verse_ref.split(':')
+                    yield {
+                        'book_num': current_book_num,
+                        'chapter': int(chapter_str),
+                        'verse': int(verse_str),
+                        'text': text
+                    }
+            except (ValueError, IndexError):
+                # Ignorer les lignes mal formatées
+                continue
 
-        print(f"  ✓ {len(verses)} versets extraits")
-        return verses
-
-    except Exception as e:
-        print(f"  ❌ Erreur téléchargement {filename}: {e}")
-        return []
+def stream_translation_file(filename: str) -> Iterator[Dict]:
+    """
+    Télécharge un fichier de traduction en flux: les versets sont produits pendant
+    le téléchargement (ou relus depuis le cache local sans accès réseau)
+    """
+    url = f"{SCROLLMAPPER_RAW_BASE}/{filename}"
+    print(f"  📥 Téléchargement (flux): {url}")
+    yield from parse_translation_lines(HTTP_CACHE.iter_lines(url, timeout=60))
 
 # Fonction get_book_id_by_position supprimée car remplacée par le cache POSITION_MAPPING
 
-def insert_verses_batch(translation_id: str, verses: List[Dict]) -> bool:
-    """Insère les versets par lots"""
-    try:
+def insert_verses_batch(translation_id: str, verses: Iterable[Dict],
+                        existing_hashes: Optional[Dict] = None,
+                        journal: Optional[ImportJournal] = None, sink: str = 'rest') -> Optional[int]:
+    """
+    Insère les versets par lots au fur et à mesure qu'ils arrivent (liste ou flux)
+    Avec existing_hashes (mode upsert), les versets dont le texte n'a pas
+    changé sont ignorés et les autres sont fusionnés sur la clé du verset
+    Avec journal (mode replace), les lots déjà insérés par un lancement
+    interrompu sont sautés
+    sink: 'rest' (PostgREST) ou 'copy' (COPY direct, voir pg_copy_sink.py)
+    Retourne le nombre de versets lus, ou None en cas d'échec
+    """
+    counts = {'read': 0, 'skipped': 0, 'unchanged': 0, 'resumed_batches': 0}
+    missing_books = set()
+
+    def iter_rows():
         # Préparer les données avec mapping des positions vers UUIDs
-        verses_data = []
-        skipped = 0
-
         for v in verses:
+            counts['read'] += 1
             # Utilisation du cache au lieu de faire une requête API par verset
             book_id = POSITION_MAPPING.get(v['book_num'])
-            
+
             if not book_id:
                 # Log seulement la première fois pour chaque livre manquant pour éviter le spam
-                if v['book_num'] not in [x.get('missing_book_num') for x in getattr(insert_verses_batch, 'logs', [])]:
-                     print(f"  ❌ ERREUR CRITIQUE: Livre position {v['book_num']} non trouvé dans la base Supabase!")
-                     if not hasattr(insert_verses_batch, 'logs'): insert_verses_batch.logs = []
-                     insert_verses_batch.logs.append({'missing_book_num': v['book_num']})
-                skipped += 1
+                if v['book_num'] not in missing_books:
+                    print(f"  ❌ ERREUR CRITIQUE: Livre position {v['book_num']} non trouvé dans la base Supabase!")
+                    missing_books.add(v['book_num'])
+                counts['skipped'] += 1
                 continue
 
-            verses_data.append({
+            if existing_hashes is not None:
+                key = (book_id, v['chapter'], v['verse'])
+                if existing_hashes.get(key) == text_hash(v['text']):
+                    counts['unchanged'] += 1
+                    continue
+
+            yield {
                 'book_id': book_id,
                 'chapter': v['chapter'],
                 'verse': v['verse'],
                 'text': v['text'],
                 'translation_id': translation_id,
                 'book_slug': None  # Sera mis à jour par un trigger si nécessaire
-            })
-
-        if skipped > 0:
-            print(f"  ⚠ {skipped} versets ignorés (livre non trouvé)")
-
-        if not verses_data:
-            print(f"  ⚠ Aucun verset à insérer")
-            return False
-
-        # Insérer par lots de 500
-        batch_size = 500
-        for i in range(0, len(verses_data), batch_size):
-            batch = verses_data[i:i + batch_size]
-            response = requests.post(
-                f"{SUPABASE_BASE}/bible_verses",
-                headers=HEADERS,
-                json=batch
-            )
-            response.raise_for_status()
-            print(f"    ✓ Lot {i//batch_size + 1}/{(len(verses_data) + batch_size - 1)//batch_size}")
-
-        print(f"  ✅ {len(verses_data)} versets insérés")
-        return True
+            }
 
+    try:
+        # Insérer par lots (taille ajustée à la latence), plusieurs en vol sur une session partagée;
+        # le premier lot part pendant que la suite est encore en téléchargement
+        on_conflict = VERSE_KEY_COLUMNS if existing_hashes is not None else None
+        with open_writer(sink, SUPABASE_BASE, HEADERS, 'bible_verses',
+                         on_conflict=on_conflict) as writer:
+            if journal is not None:
+                counts['resumed_batches'] = write_journaled(writer, journal, translation_id, iter_rows(),
+                                                            complete_stage=COMMITTED)
+            else:
+                writer.write(iter_rows())
     except Exception as e:
         print(f"  ❌ Erreur insertion: {e}")
-        return False
+        return None
+
+    print(f"  ✓ {counts['read']} versets extraits")
+    if counts['skipped'] > 0:
+        print(f"  ⚠ {counts['skipped']} versets ignorés (livre non trouvé)")
+    if counts['unchanged'] > 0:
+        print(f"  ✓ {counts['unchanged']} versets inchangés (non renvoyés)")
+    if counts['resumed_batches'] > 0:
+        print(f"  ✓ {counts['resumed_batches']} lots déjà insérés lors d'un lancement précédent")
+
+    if writer.rows_failed:
+        print(f"  ❌ {writer.rows_failed} versets non insérés")
+        return None
+
+    if journal is not None and not journal.done(translation_id):
+        # Lots d'issue inconnue d'un lancement précédent: la traduction n'est pas complète
+        print(f"  ❌ Versets d'issue inconnue, à vérifier en base")
+        return None
+
+    if writer.rows_sent == 0:
+        if counts['unchanged'] > 0 or counts['resumed_batches'] > 0:
+            print(f"  ✅ Traduction déjà à jour")
+            return counts['read']
+        print(f"  ⚠ Aucun verset à insérer")
+        return None
+
+    print(f"  ✅ {writer.rows_sent} versets insérés")
+    return counts['read']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import des traductions scrollmapper")
+    parser.add_argument(
+        '--mode', choices=['upsert', 'replace'], default='upsert',
+        help="upsert: fusionne sur (translation_id, book_id, chapter, verse) et ignore "
+             "les versets inchangés (défaut); replace: supprime puis réinsère tout"
+    )
+    parser.add_argument(
+        '--offline', action='store_true',
+        help="lire les fichiers sources uniquement depuis le cache local"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="reprendre un import interrompu: traductions terminées sautées, et en mode "
+             "replace ni nouvelle suppression ni renvoi des lots déjà insérés (journal local)"
+    )
+    parser.add_argument(
+        '--sink', choices=SINKS, default='rest',
+        help="rest: API PostgREST par lots (défaut); copy: COPY direct dans PostgreSQL "
+             "via SUPABASE_DB_URL (psycopg requis), bien plus rapide pour une traduction complète"
+    )
+    return parser.parse_args()
 
 def main():
     """Fonction principale"""
+    args = parse_args()
+    if args.offline:
+        HTTP_CACHE.offline = True
+
     print("\n" + "=" * 70)
     print("🚀 IMPORT DES TRADUCTIONS BIBLIQUES (SCROLLMAPPER)")
     print("=" * 70)
     print(f"📚 Traductions: {len(TRANSLATIONS)}")
     print(f"💾 Base: {SUPABASE_URL}")
+    print(f"🔁 Mode: {args.mode}")
+    print(f"📦 Écriture: {args.sink}")
     print("=" * 70)
 
+    if args.mode == 'upsert':
+        # Sans la contrainte unique, chaque lot serait refusé puis coupé jusqu'à la ligne
+        error = check_on_conflict(SUPABASE_BASE, HEADERS, 'bible_verses', VERSE_KEY_COLUMNS)
+        if error:
+            print(f"❌ Mode upsert impossible: {error}")
+            print("   Appliquez sql/bible_verses_unique_key.sql ou relancez avec --mode replace")
+            sys.exit(1)
+
     # Construire le mapping des livres
     print("\n📖 Construction du mapping des livres...")
     if not build_book_mapping():
@@ -231,51 +302,76 @@ def main():
 
     success_count = 0
     total_verses = 0
+    catalog = CatalogStatus(SUPABASE_BASE, HEADERS)
+    journal = ImportJournal(f"translations-{args.mode}", resume=args.resume)
 
     for i, translation in enumerate(TRANSLATIONS, 1):
         print(f"\n{'=' * 70}")
         print(f"[{i}/{len(TRANSLATIONS)}] {translation['name']}")
         print('=' * 70)
 
-        # Vérifier si déjà importée
+        if journal.skip(translation['id']):
+            print(f"  ✓ Déjà importée lors d'un lancement précédent (reprise)")
+            continue
+
+        # Vérifier si déjà importée (comptage exact, sans télécharger les lignes)
         try:
-            response = requests.get(
-                f"{SUPABASE_BASE}/bible_verses?translation_id=eq.{translation['id']}&select=id",
-                headers=HEADERS
-            )
-            if response.json() and len(response.json()) > 0:
-                print(f"  ⚠ Traduction déjà importée ({len(response.json())} versets)")
-                print(f"  ↳ Réimport automatique (suppression des anciens versets)...")
-                # if choice.lower() != 'o':
-                #     print("  ↳ Passé")
-                #     continue
-                # Supprimer les anciens versets
-                print(f"  🗑️ Suppression des anciens versets...")
+            existing_count = catalog.count_verses(translation['id'])
+        except Exception as e:
+            print(f"  ❌ Comptage des versets existants impossible: {e}")
+            continue
+
+        existing_hashes = None
+        if args.mode == 'upsert':
+            # Empreintes des versets en base: seuls les textes modifiés seront envoyés
+            existing_hashes = {}
+            if existing_count > 0:
+                print(f"  ✓ {existing_count} versets déjà en base (comparaison par empreinte)")
+                try:
+                    existing_hashes = fetch_verse_hashes(SUPABASE_BASE, HEADERS, translation['id'])
+                except Exception as e:
+                    print(f"  ❌ Lecture des versets existants impossible: {e}")
+                    continue
+        elif journal.done(translation['id'], 'deleted'):
+            print(f"  ↳ Reprise: anciens versets déjà supprimés, {existing_count} versets insérés depuis")
+        elif existing_count > 0:
+            print(f"  ⚠ Traduction déjà importée ({existing_count} versets)")
+            print(f"  ↳ Réimport automatique (suppression des anciens versets)...")
+            # Supprimer les anciens versets
+            print(f"  🗑️ Suppression des anciens versets...")
+            try:
                 requests.delete(
                     f"{SUPABASE_BASE}/bible_verses?translation_id=eq.{translation['id']}",
-                    headers={**HEADERS, 'Prefer': 'return=representation'}
-                )
-        except:
-            pass
-
-        # Télécharger
-        print(f"  📥 Téléchargement depuis GitHub...")
-        verses = fetch_translation_file(translation['file'])
-        if not verses:
-            print(f"  ⚠ Passé (erreur ou fichier vide)")
-            continue
+                    headers=HEADERS
+                ).raise_for_status()
+            except Exception as e:
+                print(f"  ❌ Suppression impossible: {e}")
+                continue
 
-        # Insérer
-        print(f"  💾 Insertion dans Supabase...")
-        if insert_verses_batch(translation['id'], verses):
+        # Télécharger et insérer en flux: le parseur alimente directement les lots
+        print(f"  📥 Téléchargement depuis GitHub et insertion dans Supabase...")
+        verses = stream_translation_file(translation['file'])
+        if args.mode == 'replace':
+            # Les lots ne sont numérotés de façon stable qu'en mode replace (aucun filtrage)
+            journal.mark(translation['id'], 'deleted')
+            inserted = insert_verses_batch(translation['id'], verses, journal=journal, sink=args.sink)
+        else:
+            inserted = insert_verses_batch(translation['id'], verses, existing_hashes, sink=args.sink)
+        if inserted is not None:
+            journal.mark(translation['id'], COMMITTED, verses=inserted)
             success_count += 1
-            total_verses += len(verses)
+            total_verses += inserted
         else:
-            print(f"  ❌ Erreur lors de l'insertion")
+            print(f"  ❌ Erreur lors de l'import")
 
         # Délai respectueux
         time.sleep(1)
 
+    catalog.close()
+    print(f"\n📦 {HTTP_CACHE.summary()}")
+    print(f"📒 {journal.summary()}")
+    journal.close()
+
     print("\n" + "=" * 70)
     print(f"✅ IMPORT TERMINÉ!")
     print(f"   📚 Traductions importées: {success_count}/{len(TRANSLATIONS)}")
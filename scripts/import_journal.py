@@ -0,0 +1,180 @@
+"""
+Journal local des imports (SQLite en mode WAL)
+Chaque unité de travail (livre, chapitre, lot d'insertion...) est notée dès qu'elle
+est terminée; avec --resume, un import interrompu saute les unités déjà faites
+(test en mémoire, O(1)) et ne termine que ce qui reste
+
+Unités: chaînes libres propres à chaque script ('tobit', 'gen/12', 'tobit#3' pour
+le lot 3 du livre tobit); étapes: 'translated', 'committed', 'book'...
+(WIKIBIBLE_IMPORT_JOURNAL pour changer l'emplacement de la base)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'import-journal.sqlite')
+
+TRANSLATED = 'translated'
+COMMITTED = 'committed'
+
+
+class ImportJournal:
+    """Étapes terminées d'un import, sûr pour plusieurs threads (rappels de BulkWriter)"""
+
+    def __init__(self, job: str, resume: bool = False, path: Optional[str] = None):
+        self.job = job
+        self.resume = resume
+        self.path = path or os.getenv('WIKIBIBLE_IMPORT_JOURNAL', DEFAULT_JOURNAL_PATH)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS units (
+            job TEXT NOT NULL, unit TEXT NOT NULL, stage TEXT NOT NULL, info TEXT,
+            updated_at REAL NOT NULL, PRIMARY KEY (job, unit, stage)) WITHOUT ROWID''')
+        if not resume:
+            # Nouvel import: on repart d'un journal vide pour ce job
+            self.conn.execute('DELETE FROM units WHERE job = ?', (job,))
+        self.conn.commit()
+        self._done: Dict[tuple, Optional[str]] = {
+            (unit, stage): info for unit, stage, info in
+            self.conn.execute('SELECT unit, stage, info FROM units WHERE job = ?', (job,))
+        }
+        self.skipped = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def done(self, unit: str, stage: str = COMMITTED) -> bool:
+        """Étape déjà terminée (lors de ce lancement ou d'un lancement repris)"""
+        return (unit, stage) in self._done
+
+    def info(self, unit: str, stage: str = COMMITTED) -> Optional[Dict]:
+        """Informations enregistrées avec l'étape (ex: identifiant du livre créé)"""
+        info = self._done.get((unit, stage))
+        return json.loads(info) if info else None
+
+    def mark(self, unit: str, stage: str = COMMITTED, **info) -> None:
+        """Note une étape terminée; écrite immédiatement"""
+        payload = json.dumps(info, ensure_ascii=False) if info else None
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO units (job, unit, stage, info, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (self.job, unit, stage, payload, time.time())
+            )
+            self.conn.commit()
+            self._done[(unit, stage)] = payload
+
+    def skip(self, unit: str, stage: str = COMMITTED) -> bool:
+        """done() qui compte les unités sautées (pour le résumé final)"""
+        if self.done(unit, stage):
+            self.skipped += 1
+            return True
+        return False
+
+    def summary(self) -> str:
+        mode = 'reprise' if self.resume else 'nouvel import'
+        return f"Journal {self.job} ({mode}): {len(self._done)} étapes notées, {self.skipped} unités sautées"
+
+
+def write_journaled(writer, journal: ImportJournal, unit: str, rows: Iterable[Dict],
+                    complete_stage: Optional[str] = None, skip_batches: bool = True) -> int:
+    """
+    Envoie rows via un BulkWriter par lots de writer.batch_size, numérotés unit#0, unit#1...
+    Un lot est noté dès que son envoi est terminé, avec la position des lignes qu'il
+    n'a pas pu écrire (refusées par le serveur) et de celles d'issue inconnue (requête
+    expirée en insertion simple): à la reprise, seules les premières sont renvoyées
+    (relues dans rows, donc corrigées si la source l'a été), les secondes jamais (à
+    vérifier en base); un lot noté sans rejet est sauté. Un lot annulé en entier
+    (transaction COPY) n'est pas noté et repart en entier. L'ordre de rows doit être
+    le même d'un lancement à l'autre (skip_batches=False si rows est déjà filtré sur
+    ce qui est en base: la numérotation des lots change alors d'un lancement à l'autre)
+    Avec complete_stage, unit elle-même est notée une fois tous ses lots écrits sans
+    rejet ni ligne d'issue inconnue
+    Retourne le nombre de lots sautés
+    """
+    lock = threading.Lock()
+    state = {'pending': 1, 'failed': False}  # 1: la boucle d'envoi elle-même
+
+    def finished(ok: bool, rejected: List[Dict], uncertain: List[Dict], key: Optional[str] = None,
+                 sent: Optional[List[tuple]] = None, unverified: Iterable[int] = ()) -> None:
+        """sent: (position dans le lot, ligne) envoyées; unverified: positions d'issue inconnue déjà notées"""
+        if ok and key and skip_batches:
+            info = {}
+            refused = _positions(sent, rejected)
+            unknown = sorted(set(unverified) | set(_positions(sent, uncertain)))
+            if refused:
+                info['rejected'] = refused
+            if unknown:
+                info['uncertain'] = unknown
+            journal.mark(key, **info)
+        with lock:
+            state['failed'] = state['failed'] or not ok or bool(rejected or uncertain or unverified)
+            state['pending'] -= 1
+            complete = state['pending'] == 0 and not state['failed']
+        if complete and complete_stage:
+            journal.mark(unit, complete_stage)
+
+    rows = iter(rows)
+    skipped = 0
+    number = 0
+    while True:
+        batch = list(islice(rows, writer.batch_size))
+        if not batch:
+            break
+        key = f"{unit}#{number}"
+        number += 1
+        positions = list(range(len(batch)))
+        unverified: List[int] = []
+        if skip_batches and journal.done(key):
+            # Lot déjà envoyé: ne renvoyer que ses lignes rejetées
+            info = journal.info(key) or {}
+            positions = [p for p in info.get('rejected', []) if p < len(batch)]
+            unverified = info.get('uncertain', [])
+            if unverified:
+                print(f"    ⚠ {key}: {len(unverified)} lignes d'issue inconnue lors d'un lancement "
+                      f"précédent, non renvoyées (à vérifier en base)")
+            if not positions:
+                if unverified:
+                    with lock:
+                        state['failed'] = True
+                else:
+                    journal.skip(key)
+                    skipped += 1
+                continue
+            batch = [batch[p] for p in positions]
+        with lock:
+            state['pending'] += 1
+        sent = list(zip(positions, batch))
+        writer.write_batch(batch, on_done=lambda ok, rejected, uncertain, key=key, sent=sent, unverified=unverified:
+                           finished(ok, rejected, uncertain, key, sent, unverified))
+    finished(True, [], [])
+    return skipped
+
+
+def _positions(sent: Optional[List[tuple]], rows: List[Dict]) -> List[int]:
+    """Positions dans le lot des lignes de rows (comparées via leur JSON)"""
+    if not rows:
+        return []
+    keys = {_row_key(row) for row in rows}
+    return [position for position, row in sent if _row_key(row) in keys]
+
+
+def _row_key(row: Dict) -> str:
+    return json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
@@ -0,0 +1,198 @@
+"""
+Export incrémental des tables qui grossissent (segments NDJSON compressés)
+Chaque table a un filigrane (colonne de date, id) : un export ne lit, par pages
+ordonnées sur (date, id) et sans offset, que les lignes créées ou modifiées
+depuis le filigrane précédent, et les écrit dans un nouveau segment .ndjson.gz
+L'état (filigranes, liste des segments et leurs empreintes) est dans
+wikibible-incremental.json du répertoire d'export
+
+Les suppressions ne sont pas suivies: une chaîne de segments s'applique sur la
+dernière sauvegarde complète (backup-database.py backup / restore)
+Une ligne dont la colonne du filigrane est NULL n'est jamais exportée (le filtre
+lt. l'exclut): count_undated() les compte, change_tracking.sql les date
+Index, colonnes updated_at et dates non nulles: scripts/sql/change_tracking.sql
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog_status import count_rows
+from supabase_rest import PAGE_SIZE, create_session
+
+STATE_FILE = 'wikibible-incremental.json'
+# Table -> colonne de date du filigrane (updated_at si les lignes sont modifiées sur place)
+DEFAULT_TABLES = {
+    'bible_verses': 'updated_at',
+    'wiki_articles': 'updated_at',
+    'wiki_revisions': 'created_at',
+    'verse_links': 'created_at',
+}
+# Ordre de replay: tables référencées par clé étrangère avant celles qui les
+# référencent (wiki_revisions.article_id -> wiki_articles, verse_links -> bible_verses);
+# les autres tables suivent dans l'ordre du fichier d'état
+REPLAY_ORDER = ('bible_books', 'bible_verses', 'wiki_articles', 'wiki_revisions', 'verse_links')
+# Les transactions encore ouvertes peuvent valider des lignes datées d'avant leur
+# validation: on n'exporte que jusqu'à maintenant - lag
+DEFAULT_LAG_SECONDS = 300
+
+
+def parse_table_specs(specs: List[str]) -> Dict[str, str]:
+    """['bible_verses', 'wiki_articles:updated_at'] -> {table: colonne}"""
+    tables = {}
+    for spec in specs:
+        table, _, column = spec.partition(':')
+        tables[table] = column or DEFAULT_TABLES.get(table, 'created_at')
+    return tables
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ChangeExporter:
+    """Écrit les lignes postérieures au filigrane de chaque table dans un nouveau segment"""
+
+    def __init__(self, base_url: str, headers: Dict, directory: str, lag_seconds: int = DEFAULT_LAG_SECONDS):
+        self.base_url = base_url
+        self.session = create_session(headers)
+        self.directory = directory
+        self.lag = timedelta(seconds=lag_seconds)
+        os.makedirs(directory, exist_ok=True)
+        self.state = load_state(directory)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def count_undated(self, table: str, column: str) -> int:
+        """Lignes dont la colonne du filigrane est NULL (jamais exportées)"""
+        return count_rows(self.session, f"{self.base_url}/{table}", {column: 'is.null'})
+
+    def _pages(self, table: str, column: str, watermark: Optional[Dict], upper: str) -> Iterator[List[Dict]]:
+        """Pages ordonnées sur (colonne, id), en reprenant après la dernière ligne lue"""
+        while True:
+            params: List[Tuple[str, str]] = [
+                ('select', '*'),
+                ('order', f'{column}.asc,id.asc'),
+                ('limit', str(PAGE_SIZE)),
+                (column, f'lt.{upper}'),
+            ]
+            if watermark:
+                value, last_id = watermark['value'], watermark['id']
+                params.append(('or', f'({column}.gt."{value}",and({column}.eq."{value}",id.gt.{last_id}))'))
+            response = self.session.get(f"{self.base_url}/{table}", params=params, timeout=60)
+            response.raise_for_status()
+            rows = response.json()
+            if rows:
+                yield rows
+                watermark = {'value': rows[-1][column], 'id': rows[-1]['id']}
+            if len(rows) < PAGE_SIZE:
+                return
+
+    def export_table(self, table: str, column: str) -> int:
+        """Nouveau segment pour table (aucun s'il n'y a pas de changement); retourne le nombre de lignes"""
+        entry = self.state['tables'].setdefault(table, {'column': column, 'watermark': None, 'segments': []})
+        if entry['column'] != column:
+            raise ValueError(f"{table}: filigrane sur {entry['column']}, pas {column} (nouveau répertoire nécessaire)")
+        upper = (datetime.now(timezone.utc) - self.lag).isoformat()
+        started = datetime.now().strftime('%Y%m%d_%H%M%S')
+        name = f"{table}/{len(entry['segments']):06d}-{started}.ndjson.gz"
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        rows_written = 0
+        watermark = entry['watermark']
+        with gzip.open(path + '.part', 'wt', encoding='utf-8') as out:
+            for rows in self._pages(table, column, watermark, upper):
+                for row in rows:
+                    out.write(json.dumps(row, ensure_ascii=False))
+                    out.write('\n')
+                rows_written += len(rows)
+                watermark = {'value': rows[-1][column], 'id': rows[-1]['id']}
+
+        if not rows_written:
+            os.remove(path + '.part')
+            return 0
+        # Le segment n'existe sous son nom final qu'une fois complet
+        os.replace(path + '.part', path)
+        entry['segments'].append({
+            'file': name,
+            'rows': rows_written,
+            'sha256': file_sha256(path),
+            'from': entry['watermark'],
+            'to': watermark,
+        })
+        entry['watermark'] = watermark
+        save_state(self.directory, self.state)
+        return rows_written
+
+
+def load_state(directory: str) -> Dict:
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {'tables': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(directory: str, state: Dict) -> None:
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.part', path)
+
+
+def iter_segment(path: str) -> Iterator[Dict]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def iter_latest_rows(directory: str, segments: List[Dict]) -> Iterator[Dict]:
+    """
+    Lignes de tous les segments, la version la plus récente de chaque id seulement
+    (segments parcourus du plus récent au plus ancien: l'ordre d'écriture des lots
+    n'a alors plus d'importance)
+    """
+    seen = set()
+    for segment in reversed(segments):
+        path = os.path.join(directory, segment['file'])
+        if file_sha256(path) != segment['sha256']:
+            raise ValueError(f"{segment['file']}: empreinte différente du fichier d'état")
+        for row in iter_segment(path):
+            if row['id'] in seen:
+                continue
+            seen.add(row['id'])
+            yield row
+
+
+def replay_order(tables: Iterable[str]) -> List[str]:
+    """Tables de REPLAY_ORDER dans cet ordre, puis les autres dans leur ordre d'origine"""
+    tables = list(tables)
+    rank = {table: position for position, table in enumerate(REPLAY_ORDER)}
+    return sorted(tables, key=lambda table: (rank.get(table, len(rank)), tables.index(table)))
+
+
+def replay(directory: str, writer_factory, tables: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Rejoue les segments (upsert sur id) table par table, les tables parentes d'abord
+    (REPLAY_ORDER)
+    writer_factory(table) retourne un BulkWriter ou un CopyWriter avec on_conflict='id'
+    """
+    state = load_state(directory)
+    results = {}
+    for table in replay_order(state['tables']):
+        entry = state['tables'][table]
+        if tables and table not in tables:
+            continue
+        with writer_factory(table) as writer:
+            writer.write(iter_latest_rows(directory, entry['segments']))
+        results[table] = writer.stats()
+    return results
@@ -10,6 +10,8 @@ import time
 from typing import Dict, List
 import requests
 
+from supabase_rest import BulkWriter
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -98,19 +100,11 @@ def insert_verses(book_id: str, verses: List[Dict]) -> bool:
                 'translation_id': 'auto'
             })
 
-        # Insérer par lots de 100
-        batch_size = 100
-        for i in range(0, len(verses_data), batch_size):
-            batch = verses_data[i:i + batch_size]
-            response = requests.post(
-                f"{SUPABASE_BASE}/apocryphal_verses",
-                headers=HEADERS,
-                json=batch
-            )
-            response.raise_for_status()
-            print(f"    ✓ Insertion lot {i//batch_size + 1}/{(len(verses_data) + batch_size - 1)//batch_size}")
+        # Insérer par lots (taille ajustée à la latence, lignes invalides isolées)
+        with BulkWriter(SUPABASE_BASE, HEADERS, 'apocryphal_verses') as writer:
+            writer.write(verses_data)
 
-        return True
+        return writer.rows_failed == 0
 
     except Exception as e:
         print(f"  ✗ Erreur insertion versets: {e}")
@@ -0,0 +1,103 @@
+"""
+Classification des lignes du PDF de la Bible de Jérusalem (mode layout) en une passe
+Chaque ligne est aiguillée sur son premier caractère puis testée par une seule regex
+précompilée dont les alternatives sont ordonnées comme l'ancienne cascade:
+  titre de livre > "Chapitre N" > numéro seul > A "Livre 1, 2 ..." > B "1, 2 ..." > C "2. ..." > D "2 ..."
+Le classifieur suit le livre et le chapitre courants et compte les décisions par classe
+"""
+
+import re
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+
+# Classes de lignes (et clés des compteurs)
+BOOK = 'book'
+CHAPTER_HEADING = 'chapter_heading'
+CHAPTER_NUMBER = 'chapter_number'
+VERSE_A = 'verse_a'
+VERSE_B = 'verse_b'
+VERSE_C = 'verse_c'
+VERSE_D = 'verse_d'
+UNKNOWN = 'unknown'
+VERSE_CLASSES = frozenset((VERSE_A, VERSE_B, VERSE_C, VERSE_D))
+CLASSES = (BOOK, CHAPTER_HEADING, CHAPTER_NUMBER, VERSE_A, VERSE_B, VERSE_C, VERSE_D, UNKNOWN)
+
+# Titre de livre: tout en majuscules
+HEADING = re.compile(r'^[A-ZÂÊÎÔÛÀÙÇÉÈ\s]+$')
+
+# Lignes commençant par une lettre: "Chapitre N" puis pattern A
+LETTER_LINE = re.compile(
+    r'^(?:(?i:Chapitre)\s+(?P<chapter>\d+)'
+    r'|(?P<a_book>[A-Z][a-zàâéèêëîïôûùüç\s\'\-]+?)\s+(?P<a_chapter>\d+)[\.,]\s*(?P<a_verse>\d+)\s+(?P<a_text>.+)$)'
+)
+
+# Lignes commençant par un chiffre: patterns B, C puis D
+DIGIT_LINE = re.compile(
+    r'^(?P<n>\d+)(?:[\.,]\s*(?P<b_verse>\d+)\s+(?P<b_text>.+)'
+    r'|\.\s+(?P<c_text>.+)'
+    r'|\s+(?P<d_text>[A-Z].+))$'
+)
+
+Token = Tuple
+
+
+class LineClassifier:
+    """
+    feed(ligne) -> token, avec ligne déjà strip() et non vide:
+      (BOOK, nom) | (CHAPTER_HEADING, n) | (CHAPTER_NUMBER, n)
+      (VERSE_x, livre, chapitre, verset, texte) | (UNKNOWN,)
+    """
+
+    def __init__(self, book_names: Iterable[str]):
+        self.book_names = frozenset(book_names)
+        # Noms de livres reconnus comme titres (même test que l'ancienne regex)
+        self.headings = frozenset(n for n in self.book_names if len(n) < 40 and HEADING.match(n))
+        self.current_book: Optional[str] = None
+        self.current_chapter: Optional[int] = None
+        self.hits: Counter = Counter()
+
+    def _classify(self, line: str) -> Token:
+        if line[0].isdigit():
+            if line.isdigit() and int(line) < 200:
+                return (CHAPTER_NUMBER, int(line))
+            m = DIGIT_LINE.match(line)
+            if m is None or not self.current_book:
+                return (UNKNOWN,)
+            n = int(m.group('n'))
+            if m.group('b_text') is not None:
+                return (VERSE_B, self.current_book, n, int(m.group('b_verse')), m.group('b_text').strip())
+            if not self.current_chapter:
+                return (UNKNOWN,)
+            if m.group('c_text') is not None:
+                return (VERSE_C, self.current_book, self.current_chapter, n, m.group('c_text').strip())
+            if n < 200:
+                return (VERSE_D, self.current_book, self.current_chapter, n, m.group('d_text').strip())
+            return (UNKNOWN,)
+
+        if line in self.headings:
+            return (BOOK, line)
+        m = LETTER_LINE.match(line)
+        if m is None:
+            return (UNKNOWN,)
+        if m.group('chapter') is not None:
+            return (CHAPTER_HEADING, int(m.group('chapter')))
+        book = m.group('a_book').strip()
+        if book not in self.book_names:
+            return (UNKNOWN,)
+        return (VERSE_A, book, int(m.group('a_chapter')), int(m.group('a_verse')), m.group('a_text').strip())
+
+    def feed(self, line: str) -> Token:
+        token = self._classify(line)
+        kind = token[0]
+        self.hits[kind] += 1
+        if kind == BOOK:
+            self.current_book, self.current_chapter = token[1], None
+        elif kind in (CHAPTER_HEADING, CHAPTER_NUMBER):
+            self.current_chapter = token[1]
+        elif kind != UNKNOWN:
+            self.current_book, self.current_chapter = token[1], token[2]
+        return token
+
+    def report(self) -> str:
+        """Compteurs par classe, pour inspecter les décisions du parseur"""
+        return ', '.join(f"{kind}={self.hits[kind]}" for kind in CLASSES)
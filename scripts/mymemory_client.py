@@ -0,0 +1,308 @@
+"""
+Client MyMemory à débit adaptatif et requêtes concurrentes
+- seau à jetons partagé: le débit monte doucement tant que tout passe et est divisé
+  par deux à chaque 429 (pause Retry-After si fournie)
+- plusieurs versets sont envoyés dans un même paramètre q (limite 500 octets) puis
+  redécoupés; si le découpage ne retombe pas juste, chaque verset est renvoyé seul
+- les versets trop longs sont coupés aux fins de phrase
+- lecture / écriture dans la mémoire de traduction partagée; un verset qui ne diffère d'un
+  verset déjà traduit (ou d'un autre verset du lot) que par la ponctuation ou la casse
+  reprend sa traduction (fuzzy_memory)
+
+MYMEMORY_EMAIL (optionnel): adresse transmise en paramètre "de", quota quotidien plus élevé
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from supabase_rest import create_session
+from translation_memory import TranslationMemory
+from fuzzy_memory import REUSE_THRESHOLD, FuzzyIndex, group_near_duplicates
+
+MYMEMORY_URL = 'https://api.mymemory.translated.net/get'
+# Taille max du paramètre q acceptée par MyMemory
+MAX_Q_BYTES = 500
+SEPARATOR = ' ||| '
+SEPARATOR_PATTERN = re.compile(r'\s*\|\s*\|\s*\|\s*')
+SENTENCE_END = re.compile(r'(?<=[.;:!?])\s+')
+
+DEFAULT_RATE = 2.0        # requêtes/s au départ
+DEFAULT_MAX_RATE = 10.0
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+
+
+def _size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+def split_for_query(text: str, limit: int = MAX_Q_BYTES) -> List[str]:
+    """Coupe un texte en morceaux d'au plus limit octets (fins de phrase, puis espaces)"""
+    if _size(text) <= limit:
+        return [text]
+    pieces = []
+    for sentence in SENTENCE_END.split(text):
+        if _size(sentence) <= limit:
+            pieces.append(sentence)
+            continue
+        words = []
+        for word in sentence.split(' '):
+            if words and _size(' '.join(words + [word])) > limit:
+                pieces.append(' '.join(words))
+                words = []
+            words.append(word)
+        if words:
+            pieces.append(' '.join(words))
+    # Regrouper les morceaux consécutifs tant qu'ils tiennent
+    merged = []
+    for piece in pieces:
+        if merged and _size(merged[-1] + ' ' + piece) <= limit:
+            merged[-1] += ' ' + piece
+        else:
+            merged.append(piece)
+    return merged
+
+
+class AdaptiveRateLimiter:
+    """Seau à jetons dont le débit suit les réponses (hausse additive, baisse multiplicative)"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, max_rate: float = DEFAULT_MAX_RATE,
+                 min_rate: float = 0.2, increase: float = 0.1):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.throttled = 0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait = (1.0 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            # Les 429 des requêtes déjà en vol pendant la pause ne comptent qu'une fois
+            if now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self._paused_until = max(self._paused_until, now + (retry_after or 1.0 / self.rate))
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+
+class MyMemoryClient:
+    """Traduction de lots de versets via MyMemory, sûre pour plusieurs threads"""
+
+    def __init__(self, memory: Optional[TranslationMemory] = None, langpair: str = 'en|fr',
+                 rate: float = DEFAULT_RATE, max_rate: float = DEFAULT_MAX_RATE,
+                 concurrency: int = DEFAULT_CONCURRENCY, verbose: bool = True,
+                 reuse_threshold: Optional[float] = REUSE_THRESHOLD):
+        self.memory = memory
+        # None: pas de réutilisation des quasi-doublons
+        self.reuse_threshold = reuse_threshold
+        self._index: Optional[FuzzyIndex] = None
+        self.langpair = langpair
+        self.limiter = AdaptiveRateLimiter(rate, max_rate)
+        self.concurrency = concurrency
+        self.verbose = verbose
+        self.email = os.getenv('MYMEMORY_EMAIL')
+        self.session = create_session(pool_size=concurrency)
+        self.stats = {'requests': 0, 'packed': 0, 'unpacked': 0, 'failed': 0, 'reused': 0}
+        # Quota quotidien épuisé: plus aucune requête, les textes restent en anglais
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def _count(self, stat: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[stat] += n
+
+    def _request(self, q: str) -> Optional[str]:
+        """Une requête MyMemory; None si la traduction n'a pas pu être obtenue"""
+        params = {'q': q, 'langpair': self.langpair}
+        if self.email:
+            params['de'] = self.email
+        for attempt in range(MAX_ATTEMPTS):
+            if self.exhausted:
+                return None
+            self.limiter.acquire()
+            self._count('requests')
+            try:
+                response = self.session.get(MYMEMORY_URL, params=params, timeout=15)
+            except requests.RequestException:
+                time.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                retry_after = response.headers.get('Retry-After', '')
+                self.limiter.on_throttle(float(retry_after) if retry_after.isdigit() else None)
+                continue
+            if not response.ok:
+                return None
+            try:
+                data = response.json()
+                status = int(data.get('responseStatus', 0))
+                translated = data['responseData']['translatedText']
+            except (ValueError, KeyError, TypeError):
+                return None
+
+            if status == 429 or (isinstance(translated, str) and 'MYMEMORY WARNING' in translated):
+                if 'ALL AVAILABLE FREE TRANSLATIONS' in str(translated):
+                    if not self.exhausted and self.verbose:
+                        print("\n  ⚠ Quota quotidien MyMemory épuisé: les versets restants restent en anglais")
+                    self.exhausted = True
+                    return None
+                self.limiter.on_throttle()
+                continue
+            if status != 200 or not isinstance(translated, str) or not translated.strip():
+                return None
+            self.limiter.on_success()
+            return translated
+        return None
+
+    def _translate_group(self, units: List[str]) -> List[Optional[str]]:
+        """Traduit des morceaux envoyés ensemble; repli morceau par morceau si le découpage échoue"""
+        if len(units) > 1:
+            translated = self._request(SEPARATOR.join(units))
+            if translated is not None:
+                parts = [p.strip() for p in SEPARATOR_PATTERN.split(translated)]
+                if len(parts) == len(units) and all(parts):
+                    self._count('packed', len(units))
+                    return parts
+        results = [self._request(unit) for unit in units]
+        self._count('unpacked', len(units))
+        return results
+
+    def translate_many(self, texts: List[str]) -> List[str]:
+        """
+        Traductions dans l'ordre de texts; un texte non traduit est rendu tel quel
+        (sans être écrit dans la mémoire)
+        """
+        texts = [t.strip() if t else t for t in texts]
+        unique = list(dict.fromkeys(t for t in texts if t))
+        known: Dict[str, str] = self.memory.get_many(unique) if self.memory is not None else {}
+        pending = [t for t in unique if t not in known]
+
+        # Quasi-doublons: d'un verset déjà traduit, puis entre versets du lot
+        aliases: Dict[str, str] = {}
+        if self.reuse_threshold is not None and pending:
+            index = self._fuzzy_index()
+            before = len(pending)
+            for text in pending:
+                match = index.reuse(text, self.reuse_threshold)
+                if match is not None:
+                    known[text] = match.translation
+            pending = [t for t in pending if t not in known]
+            aliases = group_near_duplicates(pending, self.reuse_threshold)
+            pending = [t for t in pending if t not in aliases]
+            self._count('reused', before - len(pending))
+
+        # Morceaux à traduire (un verset long peut en donner plusieurs), puis groupes <= MAX_Q_BYTES
+        units, owners = [], []
+        for text in pending:
+            for piece in split_for_query(text):
+                units.append(piece)
+                owners.append(text)
+        groups, current, current_size = [], [], 0
+        for i, unit in enumerate(units):
+            size = _size(unit) + (_size(SEPARATOR) if current else 0)
+            if current and current_size + size > MAX_Q_BYTES:
+                groups.append(current)
+                current, current_size = [], 0
+                size = _size(unit)
+            current.append(i)
+            current_size += size
+        if current:
+            groups.append(current)
+
+        translated_units: List[Optional[str]] = [None] * len(units)
+        done = [0]
+
+        def run(group: List[int]) -> None:
+            for i, translation in zip(group, self._translate_group([units[i] for i in group])):
+                translated_units[i] = translation
+            with self._lock:
+                done[0] += len(group)
+                if self.verbose:
+                    print(f"    Traduit: {done[0]}/{len(units)} ({self.limiter.rate:.1f} req/s)", end='\r')
+                    sys.stdout.flush()
+
+        if groups:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(run, groups))
+            if self.verbose:
+                print()
+
+        # Réassembler les versets; seuls les versets entièrement traduits vont en mémoire
+        pieces: Dict[str, List[Optional[str]]] = {}
+        for owner, translation in zip(owners, translated_units):
+            pieces.setdefault(owner, []).append(translation)
+        fresh = {}
+        for text, parts in pieces.items():
+            if all(p is not None for p in parts):
+                fresh[text] = ' '.join(parts)
+            else:
+                self._count('failed')
+        if self.memory is not None and fresh:
+            self.memory.put_many(fresh.items())
+        if self._index is not None:
+            self._index.add_many(fresh.items())
+        known.update(fresh)
+        for text, representative in aliases.items():
+            if representative in known:
+                known[text] = known[representative]
+
+        return [known.get(t, t) if t else t for t in texts]
+
+    def _fuzzy_index(self) -> FuzzyIndex:
+        """Index approché construit à la première utilisation depuis la mémoire"""
+        with self._lock:
+            if self._index is None:
+                self._index = FuzzyIndex.from_memory(self.memory) if self.memory is not None else FuzzyIndex()
+            return self._index
+
+    def translate(self, text: str) -> str:
+        return self.translate_many([text])[0]
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"MyMemory: {s['requests']} requêtes, {s['packed']} morceaux groupés, "
+                f"{s['unpacked']} envoyés seuls, {s['reused']} quasi-doublons réutilisés, {s['failed']} versets non traduits, "
+                f"{self.limiter.throttled} ralentissements (débit final {self.limiter.rate:.1f} req/s)")
+
+
+def translate_to_french(client: MyMemoryClient, texts: List[str]) -> List[str]:
+    """
+    Traduit des versets vers le français via l'API MyMemory gratuite (ordre conservé)
+    """
+    texts = [t.strip() if t else t for t in texts]
+    # Textes portant déjà un marqueur de traduction: retirer le marqueur
+    marked = {i: t.replace('[TRADUCTION FR] ', '').replace('[FR] ', '')
+              for i, t in enumerate(texts) if t and (t.startswith('[TRADUCTION FR]') or t.startswith('[FR]'))}
+    translated = iter(client.translate_many([t for i, t in enumerate(texts) if i not in marked]))
+    return [marked[i] if i in marked else next(translated) for i in range(len(texts))]
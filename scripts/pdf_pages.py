@@ -0,0 +1,211 @@
+"""
+Extraction du texte des pages d'un PDF avec pdfplumber, en parallèle sur plusieurs processus
+Les pages sont découpées en plages, extraites par un pool de processus et
+restituées dans l'ordre des pages: le parseur en aval voit exactement le même
+flux qu'en séquentiel, ce qui préserve le recollage des versets entre pages
+
+Le texte extrait est conservé dans un cache SQLite local, indexé par empreinte
+du PDF, numéro de page et mode d'extraction (layout ou non): les itérations sur
+les regex rejouent le texte en quelques secondes sans rouvrir le PDF
+(WIKIBIBLE_PDF_CACHE pour changer l'emplacement du cache)
+"""
+
+import os
+import sys
+import sqlite3
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Nombre de pages par tâche envoyée à un processus
+PAGES_PER_TASK = 40
+
+DEFAULT_TEXT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'pdf-text.sqlite')
+
+# Empreintes déjà calculées dans ce processus: chemin -> (taille, mtime, sha256);
+# partagées par tous les appels (count_pages puis iter_page_texts, lectures répétées)
+_DIGESTS: Dict[str, Tuple[int, float, str]] = {}
+
+
+def require_pdfplumber():
+    """Importe pdfplumber ou quitte avec un message d'installation"""
+    try:
+        import pdfplumber
+        return pdfplumber
+    except ImportError:
+        print("❌ pdfplumber n'est pas installé")
+        print("Installez-le avec: pip install pdfplumber")
+        sys.exit(1)
+
+
+def file_sha256(path: str) -> str:
+    """Empreinte SHA-256 d'un fichier (lu par blocs)"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def pdf_digest(pdf_path: str) -> str:
+    """file_sha256 mémorisé tant que la taille et la date de modification du fichier ne changent pas"""
+    st = os.stat(pdf_path)
+    key = os.path.abspath(pdf_path)
+    known = _DIGESTS.get(key)
+    if known and known[:2] == (st.st_size, st.st_mtime):
+        return known[2]
+    digest = file_sha256(pdf_path)
+    _DIGESTS[key] = (st.st_size, st.st_mtime, digest)
+    return digest
+
+
+class PageTextCache:
+    """Cache SQLite du texte extrait: (pdf_sha256, page, mode) -> texte"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('WIKIBIBLE_PDF_CACHE', DEFAULT_TEXT_CACHE)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS pdfs (
+            pdf_sha256 TEXT PRIMARY KEY, pages INTEGER NOT NULL)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS pages (
+            pdf_sha256 TEXT NOT NULL, page INTEGER NOT NULL, mode TEXT NOT NULL, text TEXT NOT NULL,
+            PRIMARY KEY (pdf_sha256, page, mode)) WITHOUT ROWID''')
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def digest(self, pdf_path: str) -> str:
+        return pdf_digest(pdf_path)
+
+    def page_count(self, digest: str) -> Optional[int]:
+        row = self.conn.execute('SELECT pages FROM pdfs WHERE pdf_sha256 = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, digest: str, pages: int) -> None:
+        self.conn.execute('INSERT OR REPLACE INTO pdfs (pdf_sha256, pages) VALUES (?, ?)', (digest, pages))
+        self.conn.commit()
+
+    def get_pages(self, digest: str, mode: str) -> Dict[int, str]:
+        rows = self.conn.execute(
+            'SELECT page, text FROM pages WHERE pdf_sha256 = ? AND mode = ?', (digest, mode)
+        )
+        return dict(rows)
+
+    def put_pages(self, digest: str, mode: str, pages: Iterable[Tuple[int, str]]) -> None:
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO pages (pdf_sha256, page, mode, text) VALUES (?, ?, ?, ?)',
+            ((digest, page_num, mode, text) for page_num, text in pages)
+        )
+        self.conn.commit()
+
+
+def extraction_mode(layout: bool) -> str:
+    return 'layout' if layout else 'plain'
+
+
+def count_pages(pdf_path: str, use_cache: bool = True) -> int:
+    """Nombre de pages (depuis le cache si le PDF y est connu)"""
+    if not use_cache:
+        return _count_pages(pdf_path, None)
+    cache = PageTextCache()
+    try:
+        return _count_pages(pdf_path, cache)
+    finally:
+        cache.close()
+
+
+def _count_pages(pdf_path: str, cache: Optional[PageTextCache]) -> int:
+    if cache:
+        digest = cache.digest(pdf_path)
+        known = cache.page_count(digest)
+        if known is not None:
+            return known
+    pdfplumber = require_pdfplumber()
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+    if cache:
+        cache.set_page_count(digest, total)
+    return total
+
+
+def extract_page_range(pdf_path: str, start: int, end: int, layout: bool = False) -> List[Tuple[int, str]]:
+    """Extrait les pages [start, end) (numérotées à partir de 1); exécuté dans un processus du pool"""
+    pdfplumber = require_pdfplumber()
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in range(start, end):
+            page = pdf.pages[page_num - 1]
+            text = page.extract_text(layout=layout) if layout else page.extract_text()
+            pages.append((page_num, text or ''))
+            # Libérer les objets de la page (la mémoire grimpe sinon sur les gros PDF)
+            page.flush_cache()
+    return pages
+
+
+def _missing_ranges(pages: List[int], cached: Dict[int, str], pages_per_task: int) -> List[Tuple[int, int]]:
+    """Plages contiguës [start, end) de pages absentes du cache, découpées en tâches"""
+    ranges = []
+    for page_num in pages:
+        if page_num in cached:
+            continue
+        if ranges and ranges[-1][1] == page_num and ranges[-1][1] - ranges[-1][0] < pages_per_task:
+            ranges[-1] = (ranges[-1][0], page_num + 1)
+        else:
+            ranges.append((page_num, page_num + 1))
+    return ranges
+
+
+def iter_page_texts(pdf_path: str, layout: bool = False, workers: Optional[int] = None,
+                    pages_per_task: int = PAGES_PER_TASK, pages: Optional[Iterable[int]] = None,
+                    use_cache: bool = True) -> Iterator[Tuple[int, str]]:
+    """
+    Produit (numéro de page, texte) dans l'ordre des pages
+    pages: sous-ensemble de pages à lire (toutes par défaut)
+    workers=1 extrait dans le processus courant; par défaut un processus par cœur
+    Les pages déjà en cache sont relues sans ouvrir le PDF
+    """
+    cache = PageTextCache() if use_cache else None
+    try:
+        total_pages = _count_pages(pdf_path, cache)
+        wanted = sorted(p for p in (pages or range(1, total_pages + 1)) if 1 <= p <= total_pages)
+        mode = extraction_mode(layout)
+        digest = cache.digest(pdf_path) if cache else None
+        cached = cache.get_pages(digest, mode) if cache else {}
+        ranges = _missing_ranges(wanted, cached, pages_per_task)
+        workers = workers or os.cpu_count() or 1
+
+        if cache and cached:
+            print(f"📦 {len(wanted) - sum(e - s for s, e in ranges)}/{len(wanted)} pages lues depuis le cache")
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(ranges) > 1 else None
+        try:
+            if pool:
+                # map() restitue les plages dans l'ordre de soumission
+                n = len(ranges)
+                extracted = pool.map(extract_page_range, [pdf_path] * n,
+                                     [r[0] for r in ranges], [r[1] for r in ranges], [layout] * n)
+            else:
+                extracted = (extract_page_range(pdf_path, s, e, layout) for s, e in ranges)
+            extracted = iter(extracted)
+
+            fresh: Dict[int, str] = {}
+            for page_num in wanted:
+                if page_num in cached:
+                    yield page_num, cached[page_num]
+                    continue
+                if page_num not in fresh:
+                    # Les plages manquantes arrivent dans l'ordre croissant des pages
+                    chunk = next(extracted)
+                    if cache:
+                        cache.put_pages(digest, mode, chunk)
+                    fresh = dict(chunk)
+                yield page_num, fresh[page_num]
+        finally:
+            if pool:
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if cache:
+            cache.close()
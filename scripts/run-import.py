@@ -11,6 +11,11 @@ import json
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+from supabase_rest import BulkWriter
+from http_cache import HttpCache
+from translation_memory import TranslationMemory
+from mymemory_client import MyMemoryClient, translate_to_french
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -41,6 +46,14 @@ HEADERS = {
     'Prefer': 'return=representation'
 }
 
+# Cache local des livres get.bible (WIKIBIBLE_HTTP_OFFLINE=1 pour rejouer sans réseau)
+HTTP_CACHE = HttpCache()
+
+# Mémoire de traduction partagée avec les autres imports MyMemory (SQLite)
+TRANSLATION_MEMORY = TranslationMemory('mymemory')
+# Client MyMemory: débit adapté aux 429, versets regroupés dans une même requête
+MYMEMORY = MyMemoryClient(TRANSLATION_MEMORY)
+
 # Mapping des livres apocryphes
 APOCRYPHAL_BOOKS = [
     {'nr': 67, 'name': '1 Esdras', 'name_fr': '1 Esdras', 'slug': '1-esdras', 'category': 'apocrypha'},
@@ -59,49 +72,11 @@ APOCRYPHAL_BOOKS = [
     {'nr': 81, 'name': '2 Maccabees', 'name_fr': '2 Maccabées', 'slug': '2-maccabees', 'category': 'deutero'},
 ]
 
-def translate_to_french(text: str, max_retries: int = 3) -> str:
-    """
-    Traduit un texte vers le français utilisant l'API MyMemory gratuite
-    """
-    if not text or not text.strip():
-        return text
-
-    # Nettoyer le texte
-    text = text.strip()
-
-    # Si le texte contient déjà un marqueur de traduction, le retourner
-    if text.startswith('[TRADUCTION FR]') or text.startswith('[FR]'):
-        return text.replace('[TRADUCTION FR] ', '').replace('[FR] ', '')
-
-    try:
-        # Utiliser l'API MyMemory (gratuite, sans clé)
-        url = 'https://api.mymemory.translated.net/get'
-        params = {
-            'q': text,
-            'langpair': 'en|fr'
-        }
-
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data['responseStatus'] == 200:
-            translated = data['responseData']['translatedText']
-            print(f"  ✓ Traduit: {text[:50]}...")
-            return translated
-        else:
-            print(f"  ⚠ Erreur traduction: {data.get('responseDetails', 'Erreur inconnue')}")
-            return text
-
-    except Exception as e:
-        print(f"  ⚠ Erreur traduction: {e}")
-        return text
-
 def fetch_from_getbible(book_nr: int) -> Optional[Dict]:
-    """Récupère un livre depuis get.bible API"""
+    """Récupère un livre depuis get.bible API (via le cache HTTP local)"""
     try:
         url = f"https://api.getbible.net/v2/kjva/{book_nr}.json"
-        response = requests.get(url, timeout=30)
+        response = HTTP_CACHE.get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -138,34 +113,29 @@ def create_book_supabase(book: Dict, source: str) -> Optional[Dict]:
 def insert_verses_supabase(book_id: str, verses: List[Dict]) -> bool:
     """Insère les versets en lot dans Supabase"""
     try:
-        # Préparer les données par lots de 100
+        # Traduire par lots de 100; l'insertion (requêtes dimensionnées par BulkWriter)
+        # se fait en arrière-plan pendant la traduction du lot suivant
         batch_size = 100
+        writer = BulkWriter(SUPABASE_BASE, HEADERS, 'apocryphal_verses')
         for i in range(0, len(verses), batch_size):
             batch = verses[i:i + batch_size]
-            to_insert = []
+            # Traduire le lot (requêtes MyMemory groupées et concurrentes)
+            texts_fr = translate_to_french(MYMEMORY, [v.get('text', '') for v in batch])
 
-            for v in batch:
-                # Traduire le texte
-                text_fr = translate_to_french(v.get('text', ''))
-
-                to_insert.append({
-                    'book_id': book_id,
-                    'chapter': v.get('chapter', 1),
-                    'verse': v.get('verse', 1),
-                    'text_original': v.get('text', ''),
-                    'text_fr': text_fr,
-                })
+            to_insert = [{
+                'book_id': book_id,
+                'chapter': v.get('chapter', 1),
+                'verse': v.get('verse', 1),
+                'text_original': v.get('text', ''),
+                'text_fr': text_fr,
+            } for v, text_fr in zip(batch, texts_fr)]
 
             # Insérer le lot
-            response = requests.post(
-                f"{SUPABASE_BASE}/apocryphal_verses",
-                headers=HEADERS,
-                json=to_insert
-            )
-            response.raise_for_status()
-            print(f"  ✓ Insert lot {i//batch_size + 1}: {len(batch)} versets")
-
-        return True
+            writer.write(to_insert)
+            print(f"  ✓ Lot {i//batch_size + 1}: {len(batch)} versets en file")
+
+        writer.close()
+        return writer.rows_failed == 0
     except Exception as e:
         print(f"  ✗ Erreur insertion versets: {e}")
         return False
@@ -258,6 +228,7 @@ def main():
 
     print("\n" + "=" * 60)
     print("✅ IMPORT TERMINÉ!")
+    print(f"🔤 {MYMEMORY.summary()}")
     print("=" * 60)
     print("\n📄 Pages disponibles:")
     print("  - http://localhost:3000/apocrypha")
@@ -0,0 +1,15 @@
+-- Clé naturelle des versets : nécessaire pour l'import en mode upsert
+-- (PostgREST on_conflict=translation_id,book_id,chapter,verse)
+--
+-- Supprimer d'abord les éventuels doublons laissés par les anciens imports :
+DELETE FROM bible_verses a
+USING bible_verses b
+WHERE a.translation_id = b.translation_id
+  AND a.book_id = b.book_id
+  AND a.chapter = b.chapter
+  AND a.verse = b.verse
+  AND a.id > b.id;
+
+ALTER TABLE bible_verses
+  ADD CONSTRAINT bible_verses_translation_book_chapter_verse_key
+  UNIQUE (translation_id, book_id, chapter, verse);
@@ -0,0 +1,55 @@
+-- Suivi des changements pour l'export incrémental
+-- Utilisé par scripts/backup-database.py incremental (scripts/incremental_export.py)
+--
+-- bible_verses est modifié sur place par les imports en mode upsert, wiki_articles
+-- par l'application (current_revision_id) : updated_at (mis à jour par trigger)
+-- sert de filigrane. wiki_revisions et verse_links ne font que grossir : created_at
+-- suffit. Les index (date, id) permettent de lire les pages après le filigrane
+-- sans parcourir toute la table. Une ligne dont la date est NULL ne serait jamais
+-- exportée : les dates manquantes sont remplies et interdites.
+ALTER TABLE bible_verses
+  ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION public.touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS bible_verses_touch_updated_at ON bible_verses;
+CREATE TRIGGER bible_verses_touch_updated_at
+  BEFORE UPDATE ON bible_verses
+  FOR EACH ROW
+  WHEN (OLD.* IS DISTINCT FROM NEW.*)
+  EXECUTE FUNCTION public.touch_updated_at();
+
+DROP TRIGGER IF EXISTS wiki_articles_touch_updated_at ON wiki_articles;
+CREATE TRIGGER wiki_articles_touch_updated_at
+  BEFORE UPDATE ON wiki_articles
+  FOR EACH ROW
+  WHEN (OLD.* IS DISTINCT FROM NEW.*)
+  EXECUTE FUNCTION public.touch_updated_at();
+
+UPDATE wiki_articles SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL;
+ALTER TABLE wiki_articles
+  ALTER COLUMN updated_at SET DEFAULT now(),
+  ALTER COLUMN updated_at SET NOT NULL;
+
+UPDATE wiki_revisions SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE wiki_revisions
+  ALTER COLUMN created_at SET DEFAULT now(),
+  ALTER COLUMN created_at SET NOT NULL;
+
+UPDATE verse_links SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE verse_links
+  ALTER COLUMN created_at SET DEFAULT now(),
+  ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS bible_verses_updated_at_id_idx ON bible_verses (updated_at, id);
+CREATE INDEX IF NOT EXISTS wiki_articles_updated_at_id_idx ON wiki_articles (updated_at, id);
+CREATE INDEX IF NOT EXISTS wiki_revisions_created_at_id_idx ON wiki_revisions (created_at, id);
+CREATE INDEX IF NOT EXISTS verse_links_created_at_id_idx ON verse_links (created_at, id);
@@ -0,0 +1,39 @@
+-- Exécution d'un groupe d'instructions SQL en une transaction
+-- Utilisé par scripts/execute-batch-import.py (POST /rest/v1/rpc/exec_sql_batch)
+--
+-- Chaque instruction est identifiée par (fichier source, numéro de ligne) dans
+-- sql_import_ledger, inscrit dans la même transaction : une instruction déjà
+-- appliquée n'est jamais rejouée, quel que soit le découpage en groupes, et un
+-- groupe renvoyé après une erreur réseau (réponse perdue) ne s'applique pas deux fois.
+-- Une erreur annule tout le groupe (ledger compris) ; le script le découpe alors
+-- en deux pour isoler l'instruction fautive.
+CREATE TABLE IF NOT EXISTS public.sql_import_ledger (
+  source text NOT NULL,
+  line integer NOT NULL,
+  applied_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (source, line)
+);
+
+CREATE OR REPLACE FUNCTION public.exec_sql_batch(p_source text, p_lines integer[], p_statements text[])
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  i integer;
+  applied integer := 0;
+BEGIN
+  FOR i IN 1 .. coalesce(array_length(p_statements, 1), 0) LOOP
+    INSERT INTO public.sql_import_ledger (source, line) VALUES (p_source, p_lines[i])
+    ON CONFLICT DO NOTHING;
+    IF FOUND THEN
+      EXECUTE p_statements[i];
+      applied := applied + 1;
+    END IF;
+  END LOOP;
+  RETURN applied;
+END;
+$$;
+
+-- Exécute du SQL arbitraire : réservé au rôle service, comme exec_sql
+REVOKE EXECUTE ON FUNCTION public.exec_sql_batch(text, integer[], text[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.exec_sql_batch(text, integer[], text[]) TO service_role;
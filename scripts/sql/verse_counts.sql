@@ -0,0 +1,20 @@
+-- Compteurs de versets par traduction, livre et chapitre en un seul appel
+-- Utilisé par scripts/catalog_status.py (POST /rest/v1/rpc/verse_counts)
+--
+-- Le résultat est un unique tableau JSON [[translation_id, book_id, chapter, n], ...]
+-- pour ne pas être tronqué par la limite max-rows de PostgREST.
+CREATE OR REPLACE FUNCTION public.verse_counts(p_translation_id text DEFAULT NULL)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT coalesce(jsonb_agg(jsonb_build_array(translation_id, book_id, chapter, n)), '[]'::jsonb)
+  FROM (
+    SELECT translation_id, book_id, chapter, count(*) AS n
+    FROM bible_verses
+    WHERE p_translation_id IS NULL OR translation_id = p_translation_id
+    GROUP BY translation_id, book_id, chapter
+  ) counts;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.verse_counts(text) TO anon, authenticated, service_role;
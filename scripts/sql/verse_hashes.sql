@@ -0,0 +1,19 @@
+-- Empreintes des textes de versets d'une traduction en un seul appel
+-- Utilisé par scripts/import-translations.py en mode upsert (POST /rest/v1/rpc/verse_hashes)
+-- pour ne renvoyer que les versets modifiés sans télécharger tous les textes
+--
+-- Le résultat est un unique tableau JSON [[book_id, chapter, verse, empreinte], ...]
+-- pour ne pas être tronqué par la limite max-rows de PostgREST. L'empreinte
+-- (16 premiers caractères hexadécimaux du md5 du texte) doit rester identique à
+-- text_hash() de scripts/supabase_rest.py.
+CREATE OR REPLACE FUNCTION public.verse_hashes(p_translation_id text)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT coalesce(jsonb_agg(jsonb_build_array(book_id, chapter, verse, left(md5(coalesce(text, '')), 16))), '[]'::jsonb)
+  FROM bible_verses
+  WHERE translation_id = p_translation_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.verse_hashes(text) TO anon, authenticated, service_role;
@@ -0,0 +1,390 @@
+"""
+Client REST Supabase partagé par les scripts d'import
+Session HTTP persistante (keep-alive) et écriture concurrente par lots; la taille
+des requêtes d'insertion s'ajuste à la latence observée et aux refus du serveur
+"""
+
+import sys
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Nombre de POST simultanés par défaut
+DEFAULT_MAX_IN_FLIGHT = 6
+
+# Clé naturelle d'un verset (contrainte unique requise pour l'upsert,
+# voir sql/bible_verses_unique_key.sql)
+VERSE_KEY_COLUMNS = 'translation_id,book_id,chapter,verse'
+
+# Taille de page PostgREST (max-rows par défaut côté Supabase)
+PAGE_SIZE = 1000
+
+# Lignes par lot logique (numérotation des lots du journal) et taille initiale des requêtes
+DEFAULT_BATCH_ROWS = 500
+# Bornes des requêtes d'insertion: lignes, octets de JSON, durée visée par requête
+MAX_BATCH_ROWS = 5000
+DEFAULT_MAX_BATCH_BYTES = 1_000_000
+MIN_BATCH_BYTES = 16_000
+TARGET_LATENCY = 2.0
+# Renvois d'une requête: 429 toujours; 5xx / erreurs réseau seulement en upsert
+MAX_RETRIES = 4
+# Statuts PostgREST d'une ligne refusée (format, contrainte): le lot est coupé en deux
+# jusqu'à isoler la ligne; les autres statuts (401, 404...) font échouer le lot entier
+BISECT_STATUSES = (400, 409, 422)
+
+
+def create_session(headers: Optional[Dict] = None, pool_size: int = DEFAULT_MAX_IN_FLIGHT) -> requests.Session:
+    """Crée une session HTTP avec un pool de connexions réutilisables"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def text_hash(text: str) -> str:
+    """Empreinte compacte d'un texte de verset (identique à la RPC verse_hashes)"""
+    return hashlib.md5((text or '').encode('utf-8')).hexdigest()[:16]
+
+
+def iter_rows(session: requests.Session, url: str, params: Dict,
+              page_size: int = PAGE_SIZE, order: str = 'id') -> Iterator[Dict]:
+    """Parcourt toutes les lignes d'une requête, page par page (ordre stable)"""
+    offset = 0
+    while True:
+        response = session.get(
+            url,
+            params={**params, 'order': order, 'limit': page_size, 'offset': offset},
+            timeout=60
+        )
+        response.raise_for_status()
+        rows = response.json()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
+def fetch_verse_hashes(base_url: str, headers: Dict, translation_id: str) -> Dict[Tuple[str, int, int], str]:
+    """
+    Empreintes des textes déjà en base pour une traduction, par (book_id, chapitre, verset)
+    Calculées par la RPC verse_hashes (sql/verse_hashes.sql) en un appel; sans elle,
+    les textes sont téléchargés page par page et hachés ici
+    """
+    session = create_session(headers)
+    try:
+        response = session.post(f"{base_url}/rpc/verse_hashes",
+                                json={'p_translation_id': translation_id}, timeout=120)
+        if response.status_code != 404:
+            response.raise_for_status()
+            return {(book_id, chapter, verse): digest
+                    for book_id, chapter, verse, digest in response.json() or []}
+        print("  ⚠ RPC verse_hashes absente (voir sql/verse_hashes.sql), textes téléchargés pour comparaison")
+        rows = iter_rows(
+            session,
+            f"{base_url}/bible_verses",
+            {'translation_id': f'eq.{translation_id}', 'select': 'book_id,chapter,verse,text'}
+        )
+        return {(r['book_id'], r['chapter'], r['verse']): text_hash(r['text']) for r in rows}
+    finally:
+        session.close()
+
+
+def check_on_conflict(base_url: str, headers: Dict, table: str, on_conflict: str) -> Optional[str]:
+    """
+    Vérifie en une requête (lot vide) que on_conflict correspond à une contrainte unique
+    de table; retourne l'erreur du serveur, None si l'upsert est possible
+    """
+    session = create_session({**headers, 'Prefer': 'return=minimal,resolution=merge-duplicates',
+                              'Content-Type': 'application/json'})
+    try:
+        response = session.post(f"{base_url}/{table}", params={'on_conflict': on_conflict},
+                                data=b'[]', timeout=30)
+    except requests.RequestException as e:
+        return str(e)
+    finally:
+        session.close()
+    if response.status_code in (200, 201, 204):
+        return None
+    return f"{response.status_code} {response.text[:200]}"
+
+
+class BatchSizer:
+    """
+    Taille des requêtes d'insertion, partagée par les threads d'envoi
+    Croît tant que les requêtes pleines restent sous la latence visée, se réduit
+    en proportion au-delà; divisée par deux sur 413 (corps trop gros) ou timeout
+    """
+
+    def __init__(self, rows: int = DEFAULT_BATCH_ROWS, max_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+                 target_latency: float = TARGET_LATENCY, max_rows: int = MAX_BATCH_ROWS):
+        self.rows = max(1, min(rows, max_rows))
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+
+    def split(self, encoded: List[bytes]) -> List[List[bytes]]:
+        """Découpe des lignes encodées en requêtes sous les limites courantes"""
+        with self._lock:
+            max_rows, max_bytes = self.rows, self.max_bytes
+        chunks, chunk, size = [], [], 2
+        for row in encoded:
+            if chunk and (len(chunk) >= max_rows or size + len(row) + 1 > max_bytes):
+                chunks.append(chunk)
+                chunk, size = [], 2
+            chunk.append(row)
+            size += len(row) + 1
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def record(self, rows: int, seconds: float) -> None:
+        """Ajuste la taille d'après la durée d'une requête réussie"""
+        with self._lock:
+            if seconds > self.target_latency:
+                self.rows = max(1, min(self.rows, int(rows * self.target_latency / seconds)))
+            elif rows >= self.rows and seconds < self.target_latency / 2:
+                self.rows = min(self.max_rows, self.rows + max(1, self.rows // 2))
+
+    def shrink(self, rows: int, size: int) -> None:
+        """Requête refusée pour sa taille (413) ou trop lente (timeout)"""
+        with self._lock:
+            self.rows = max(1, min(self.rows, rows // 2))
+            self.max_bytes = max(MIN_BATCH_BYTES, min(self.max_bytes, size // 2))
+
+
+class BulkWriter:
+    """
+    Insère des lignes dans une table PostgREST par lots, avec plusieurs
+    requêtes en vol sur une même session. Les lots sont envoyés dès qu'ils
+    sont pleins; close() attend la fin des envois et affiche le débit.
+
+    Chaque lot part en une ou plusieurs requêtes dimensionnées par BatchSizer
+    (lignes et octets). Un lot refusé pour une ligne invalide est coupé en deux
+    récursivement: seules les lignes fautives échouent (rejected_rows).
+
+    Avec on_conflict (liste de colonnes d'une contrainte unique), les lignes
+    existantes sont mises à jour au lieu d'être dupliquées (upsert).
+
+    Une requête expirée, en 5xx ou coupée par le réseau a pu être validée par le
+    serveur: elle n'est renvoyée qu'en upsert. En insertion simple ses lignes
+    sont comptées en échec sans renvoi (uncertain_rows, à vérifier en base) pour
+    ne pas créer de doublons.
+    """
+
+    def __init__(self, base_url: str, headers: Dict, table: str,
+                 batch_size: int = DEFAULT_BATCH_ROWS, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 timeout: int = 60, verbose: bool = True, on_conflict: Optional[str] = None,
+                 max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES, target_latency: float = TARGET_LATENCY):
+        self.table = table
+        self.url = f"{base_url}/{table}"
+        # Taille des lots de write_batch() (journal) et taille initiale des requêtes
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.verbose = verbose
+        self.sizer = BatchSizer(batch_size, max_batch_bytes, target_latency)
+        # Renvoyer une requête d'issue inconnue n'est sans risque qu'en upsert
+        self.idempotent = bool(on_conflict)
+
+        # Pas besoin de relire les lignes insérées
+        prefer = 'return=minimal'
+        if on_conflict:
+            self.url += f"?on_conflict={on_conflict}"
+            prefer += ',resolution=merge-duplicates'
+        self.session = create_session(
+            {**headers, 'Prefer': prefer, 'Content-Type': 'application/json'}, pool_size=max_in_flight
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        # Limite les lots en attente pour ne pas charger toute la source en mémoire
+        self._slots = threading.BoundedSemaphore(max_in_flight * 2)
+        self._lock = threading.Lock()
+        self._futures = []
+        # Lignes déjà encodées en JSON (la taille des requêtes se compte en octets)
+        self._buffer: List[bytes] = []
+        self._buffer_bytes = 2
+        self._started_at: Optional[float] = None
+
+        self.rows_sent = 0
+        self.rows_failed = 0
+        self.batches_sent = 0
+        self.requests_sent = 0
+        self.errors: List[str] = []
+        # Lignes non écrites (refusées ou jamais reçues): peuvent être renvoyées
+        self.rejected_rows: List[Dict] = []
+        # Lignes d'une requête d'issue inconnue en insertion simple: non renvoyées
+        self.uncertain_rows: List[Dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, rows: Iterable[Dict]) -> None:
+        """Ajoute des lignes; les lots pleins (taille courante du BatchSizer) partent immédiatement"""
+        for row in rows:
+            encoded = _encode(row)
+            # Même décompte que BatchSizer.split(): crochets + une virgule par ligne
+            if self._buffer and self._buffer_bytes + len(encoded) + 1 > self.sizer.max_bytes:
+                self._submit_buffer()
+            self._buffer.append(encoded)
+            self._buffer_bytes += len(encoded) + 1
+            if len(self._buffer) >= self.sizer.rows:
+                self._submit_buffer()
+
+    def _submit_buffer(self) -> None:
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = []
+            self._buffer_bytes = 2
+
+    def write_batch(self, rows: List[Dict],
+                    on_done: Optional[Callable[[bool, List[Dict], List[Dict]], None]] = None) -> None:
+        """
+        Envoie rows en un lot à part (le lot partiel en cours part d'abord)
+        on_done(ok, rejected, uncertain) est appelé depuis le thread d'envoi une fois
+        toutes ses lignes traitées: ok=True, rejected liste les lignes non écrites,
+        uncertain celles d'issue inconnue (à vérifier en base), les autres sont écrites
+        """
+        self._submit_buffer()
+        if rows:
+            self._submit([_encode(row) for row in rows], on_done)
+
+    def flush(self) -> None:
+        """Envoie le lot partiel et attend la fin de tous les envois"""
+        self._submit_buffer()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def close(self) -> Dict:
+        """Termine les envois, libère la session et retourne les statistiques"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        stats = self.stats()
+        if self.verbose and (stats['sent'] or stats['failed']):
+            print(f"  ⚡ {stats['sent']} lignes → {self.table} en {stats['elapsed']:.1f}s "
+                  f"({stats['rows_per_sec']:.0f} lignes/s, {stats['batches']} lots, "
+                  f"{stats['requests']} requêtes, taille finale {stats['batch_rows']} lignes)")
+            if stats['failed']:
+                print(f"  ⚠ {stats['failed']} lignes en échec ({len(self.rejected_rows)} non écrites, "
+                      f"{len(self.uncertain_rows)} d'issue inconnue non renvoyées)")
+        return stats
+
+    def stats(self) -> Dict:
+        """Statistiques courantes (lignes envoyées, échecs, débit)"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            'sent': self.rows_sent,
+            'failed': self.rows_failed,
+            'batches': self.batches_sent,
+            'requests': self.requests_sent,
+            'batch_rows': self.sizer.rows,
+            'elapsed': elapsed,
+            'rows_per_sec': self.rows_sent / elapsed if elapsed > 0 else 0.0,
+            'errors': list(self.errors),
+        }
+
+    def _submit(self, batch: List[bytes],
+                on_done: Optional[Callable[[bool, List[Dict], List[Dict]], None]] = None) -> None:
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        self._slots.acquire()
+        future = self._executor.submit(self._post, batch, on_done)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        # Purger les envois terminés pour garder la liste courte
+        if len(self._futures) > 64:
+            self._futures = [f for f in self._futures if not f.done()]
+
+    def _post(self, batch: List[bytes],
+              on_done: Optional[Callable[[bool, List[Dict], List[Dict]], None]] = None) -> None:
+        rejected: List[bytes] = []
+        uncertain: List[bytes] = []
+        for chunk in self.sizer.split(batch):
+            not_written, unknown = self._send(chunk)
+            rejected += not_written
+            uncertain += unknown
+        with self._lock:
+            self.batches_sent += 1
+        if on_done is not None:
+            on_done(True, [json.loads(row) for row in rejected], [json.loads(row) for row in uncertain])
+
+    def _request(self, chunk: List[bytes]) -> Tuple[Optional[int], str]:
+        """(statut HTTP, détail); statut None si la requête a expiré ou n'a pas abouti"""
+        body = b'[' + b','.join(chunk) + b']'
+        for attempt in range(MAX_RETRIES):
+            with self._lock:
+                self.requests_sent += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, data=body, timeout=self.timeout)
+            except requests.Timeout as e:
+                self.sizer.shrink(len(chunk), len(body))
+                return None, str(e)
+            except requests.RequestException as e:
+                status, error = None, str(e)
+            else:
+                status = response.status_code
+                if status in (200, 201, 204):
+                    self.sizer.record(len(chunk), time.perf_counter() - start)
+                    return status, ''
+                if status == 413:
+                    self.sizer.shrink(len(chunk), len(body))
+                error = f"{status} {response.text[:200]}"
+                if status < 500 and status != 429:
+                    return status, error
+            # 429: refusée avant traitement; 5xx / réseau: a pu être validée
+            if status != 429 and not self.idempotent:
+                return status, error
+            time.sleep(2 ** attempt)
+        return status, f"abandon après {MAX_RETRIES} essais: {error}"
+
+    def _send(self, chunk: List[bytes]) -> Tuple[List[bytes], List[bytes]]:
+        """
+        Envoie une requête; en cas de refus, chaque moitié est retentée séparément
+        Retourne (lignes non écrites, lignes d'issue inconnue)
+        """
+        status, detail = self._request(chunk)
+        if status in (200, 201, 204):
+            with self._lock:
+                self.rows_sent += len(chunk)
+            return [], []
+        # Refusée sans être traitée (4xx): rien n'a été écrit
+        refused = status is not None and status < 500
+        if len(chunk) > 1 and (status == 413 or status in BISECT_STATUSES
+                               or (status is None and self.idempotent)):
+            middle = len(chunk) // 2
+            first, second = self._send(chunk[:middle]), self._send(chunk[middle:])
+            return first[0] + second[0], first[1] + second[1]
+
+        resendable = refused or self.idempotent
+        with self._lock:
+            self.rows_failed += len(chunk)
+            self.errors.append(detail)
+            target = self.rejected_rows if resendable else self.uncertain_rows
+            target.extend(json.loads(row) for row in chunk)
+        if self.verbose:
+            if len(chunk) == 1 and refused:
+                print(f"    ❌ Ligne rejetée: {detail} {chunk[0][:120].decode('utf-8', 'replace')}")
+            elif resendable:
+                print(f"    ❌ Erreur lot ({len(chunk)} lignes): {detail}")
+            else:
+                print(f"    ⚠ Lot d'issue inconnue ({len(chunk)} lignes, non renvoyé): {detail}")
+            sys.stdout.flush()
+        return (chunk, []) if resendable else ([], chunk)
+
+
+def _encode(row: Dict) -> bytes:
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,150 @@
+"""
+Mémoire de traduction partagée (SQLite en mode WAL)
+Remplace les caches translation-cache*.json réécrits en entier à chaque sauvegarde:
+chaque traduction est écrite dès qu'elle est obtenue, une interruption ne perd rien
+et plusieurs scripts / threads peuvent écrire en même temps
+
+Clé: sha256(modèle | paire de langues | texte source); le texte source est aussi
+conservé pour pouvoir inspecter ou rechercher la mémoire
+(WIKIBIBLE_TRANSLATION_MEMORY pour changer l'emplacement de la base)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_MEMORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'translation-memory.sqlite')
+# Nombre max de paramètres par requête IN (...)
+LOOKUP_CHUNK = 500
+
+
+def memory_key(model: str, langpair: str, source: str) -> bytes:
+    return hashlib.sha256(f"{model}|{langpair}|{source}".encode('utf-8')).digest()
+
+
+class TranslationMemory:
+    """Traductions d'un modèle pour une paire de langues, sûre pour plusieurs threads"""
+
+    def __init__(self, model: str, langpair: str = 'en|fr', path: Optional[str] = None):
+        self.model = model
+        self.langpair = langpair
+        self.path = path or os.getenv('WIKIBIBLE_TRANSLATION_MEMORY', DEFAULT_MEMORY_PATH)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        # timeout = busy_timeout: attendre un autre processus qui écrit
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS translations (
+            key BLOB PRIMARY KEY, model TEXT NOT NULL, langpair TEXT NOT NULL,
+            source TEXT NOT NULL, translation TEXT NOT NULL, created_at REAL NOT NULL) WITHOUT ROWID''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS translations_model ON translations (model, langpair)')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS imported_files (
+            path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, imported INTEGER NOT NULL)''')
+        self.conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, source: str) -> bytes:
+        return memory_key(self.model, self.langpair, source)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                'SELECT count(*) FROM translations WHERE model = ? AND langpair = ?', (self.model, self.langpair)
+            ).fetchone()[0]
+
+    def __contains__(self, source: str) -> bool:
+        return self.get(source) is not None
+
+    def get(self, source: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute('SELECT translation FROM translations WHERE key = ?',
+                                    (self._key(source),)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, sources: Iterable[str]) -> Dict[str, str]:
+        """source -> traduction pour les textes présents dans la mémoire"""
+        keys = {self._key(s): s for s in set(sources)}
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), LOOKUP_CHUNK):
+                chunk = key_list[i:i + LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for key, translation in rows:
+                    found[keys[key]] = translation
+        return found
+
+    def put(self, source: str, translation: str) -> None:
+        self.put_many([(source, translation)])
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        now = time.time()
+        rows = [(self._key(s), self.model, self.langpair, s, t, now) for s, t in pairs]
+        if not rows:
+            return
+        with self._lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO translations (key, model, langpair, source, translation, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            self.conn.commit()
+
+    def import_json(self, json_path: str) -> int:
+        """
+        Migre un ancien cache JSON {source: traduction} (une seule fois par version du fichier)
+        Les traductions déjà présentes dans la mémoire sont conservées
+        """
+        if not os.path.exists(json_path):
+            return 0
+        st = os.stat(json_path)
+        path = os.path.abspath(json_path)
+        with self._lock:
+            row = self.conn.execute('SELECT size, mtime FROM imported_files WHERE path = ?', (path,)).fetchone()
+        if row and row == (st.st_size, st.st_mtime):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ Cache JSON illisible ({json_path}): {e}")
+            return 0
+
+        now = time.time()
+        rows = [(self._key(s), self.model, self.langpair, s, t, now)
+                for s, t in legacy.items() if isinstance(s, str) and isinstance(t, str)]
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO translations (key, model, langpair, source, translation, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            imported = self.conn.total_changes - before
+            self.conn.execute('INSERT OR REPLACE INTO imported_files (path, size, mtime, imported) VALUES (?, ?, ?, ?)',
+                              (path, st.st_size, st.st_mtime, imported))
+            self.conn.commit()
+        print(f"📦 {imported} traductions migrées depuis {os.path.basename(json_path)}")
+        return imported
+
+    def sources(self) -> List[Tuple[str, str]]:
+        """Toutes les paires (source, traduction) de ce modèle / cette paire de langues"""
+        with self._lock:
+            return self.conn.execute(
+                'SELECT source, translation FROM translations WHERE model = ? AND langpair = ?',
+                (self.model, self.langpair)
+            ).fetchall()
@@ -0,0 +1,110 @@
+"""
+Lecture des clés (livre, chapitre, verset) déjà chargées pour une traduction
+Toute la traduction est lue en pages concurrentes (offset/limit, ordre stable par id)
+et stockée sous forme d'entiers triés: ~4 octets par verset, recherche par bisection
+"""
+
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from supabase_rest import PAGE_SIZE, create_session
+from catalog_status import count_rows
+
+# Bits réservés au chapitre et au verset dans une clé encodée (max 1023 chacun)
+CHAPTER_BITS = 10
+VERSE_BITS = 10
+MAX_PARALLEL_PAGES = 8
+
+
+def encode_key(book: int, chapter: int, verse: int) -> int:
+    """Encode (position du livre, chapitre, verset) en un entier ordonné"""
+    return (book << (CHAPTER_BITS + VERSE_BITS)) | (chapter << VERSE_BITS) | verse
+
+
+def decode_key(key: int) -> Tuple[int, int, int]:
+    """Inverse de encode_key"""
+    return (
+        key >> (CHAPTER_BITS + VERSE_BITS),
+        (key >> VERSE_BITS) & ((1 << CHAPTER_BITS) - 1),
+        key & ((1 << VERSE_BITS) - 1),
+    )
+
+
+class VerseKeySet:
+    """Ensemble compact et immuable de clés de versets"""
+
+    def __init__(self, keys: Iterable[int] = ()):
+        self._keys = array('I', sorted(set(keys)))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self):
+        return (decode_key(k) for k in self._keys)
+
+    def _range(self, low: int, high: int) -> Tuple[int, int]:
+        return bisect_left(self._keys, low), bisect_left(self._keys, high)
+
+    def contains(self, book: int, chapter: int, verse: int) -> bool:
+        key = encode_key(book, chapter, verse)
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def __contains__(self, item) -> bool:
+        return self.contains(*item)
+
+    def count(self, book: int, chapter: int = None) -> int:
+        """Nombre de versets chargés pour un livre ou un chapitre"""
+        if chapter is None:
+            start, end = self._range(encode_key(book, 0, 0), encode_key(book + 1, 0, 0))
+        else:
+            start, end = self._range(encode_key(book, chapter, 0), encode_key(book, chapter + 1, 0))
+        return end - start
+
+    def verses(self, book: int, chapter: int) -> List[int]:
+        """Numéros des versets chargés pour un chapitre"""
+        start, end = self._range(encode_key(book, chapter, 0), encode_key(book, chapter + 1, 0))
+        return [k & ((1 << VERSE_BITS) - 1) for k in self._keys[start:end]]
+
+
+def fetch_verse_keys(base_url: str, headers: Dict, translation_id: str,
+                     book_positions: Dict[str, int], page_size: int = PAGE_SIZE,
+                     max_parallel: int = MAX_PARALLEL_PAGES) -> VerseKeySet:
+    """
+    Lit toutes les clés d'une traduction en une passe parallèle
+    book_positions: book_id -> position du livre (bible_books.position)
+    """
+    url = f"{base_url}/bible_verses"
+    params = {'translation_id': f'eq.{translation_id}', 'select': 'book_id,chapter,verse', 'order': 'id'}
+    session = create_session(headers, pool_size=max_parallel)
+
+    def fetch_range(start: int, end: int) -> List[int]:
+        # Si le serveur plafonne la page sous page_size, on relance sur le reste
+        keys = []
+        while start < end:
+            response = session.get(
+                url, params={**params, 'offset': start, 'limit': end - start}, timeout=60
+            )
+            response.raise_for_status()
+            rows = response.json()
+            if not rows:
+                break
+            for r in rows:
+                position = book_positions.get(r['book_id'])
+                if position is not None:
+                    keys.append(encode_key(position, r['chapter'], r['verse']))
+            start += len(rows)
+        return keys
+
+    try:
+        total = count_rows(session, url, {'translation_id': f'eq.{translation_id}'})
+        ranges = [(start, min(start + page_size, total)) for start in range(0, total, page_size)]
+        keys: List[int] = []
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            for page in pool.map(lambda r: fetch_range(*r), ranges):
+                keys.extend(page)
+        return VerseKeySet(keys)
+    finally:
+        session.close()
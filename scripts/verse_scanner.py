@@ -0,0 +1,104 @@
+"""
+Découpage linéaire d'un flux de pages en versets "Livre Chapitre, Verset Texte"
+Remplace le re-scan de tout le buffer en attente à chaque page (quadratique quand
+des pages sans verset s'enchaînent): chaque caractère n'est examiné qu'une fois,
+seule une courte fin de fenêtre (un en-tête possiblement coupé) est reportée
+sur la page suivante
+
+Détection: la regex de l'ancien parseur (alternative des noms de livres triés par
+longueur décroissante, puis "  12, 3"), appliquée seulement à la fenêtre fin reportée
++ nouvelle page au lieu de tout le texte en attente
+"""
+
+import re
+from typing import Iterable, List, Optional, Tuple
+
+WHITESPACE = re.compile(r'\s+')
+TRAILING_CHAPTER = re.compile(r'Chapitre\s+\d+\s*$', re.IGNORECASE)
+# Caractères pouvant suivre un nom de livre dans un en-tête incomplet
+HEADER_TAIL_CHARS = frozenset(' \t\n\r\f\v,0123456789')
+
+def clean_verse_text(raw: str) -> str:
+    """Normalise les espaces et retire un "Chapitre N" resté en fin de verset"""
+    text = WHITESPACE.sub(' ', raw.replace('\n', ' ')).strip()
+    if text[-1:].isdigit():
+        text = TRAILING_CHAPTER.sub('', text).strip()
+    return text
+
+
+class VerseScanner:
+    """
+    Alimenté page par page (feed), accumule les versets dans self.verses:
+    List[(book_name, chapter, verse, text)]; appeler finish() après la dernière page
+    """
+
+    def __init__(self, book_names: Iterable[str]):
+        names = sorted(book_names, key=len, reverse=True)
+        # Le nom le plus long l'emporte, comme dans l'ancien parseur
+        self._header = re.compile(f"({'|'.join(map(re.escape, names))})\\s+(\\d+),\\s+(\\d+)")
+        self._max_name = len(names[0]) if names else 0
+
+        self.verses: List[Tuple[str, int, int, str]] = []
+        self._open: Optional[Tuple[str, int, int]] = None
+        self._open_page = 0
+        self._chunks: List[str] = []
+        self._tail = ''
+        self._pages = 0
+
+    def _close(self, raw: str, closed_on_new_page: bool) -> None:
+        book, chapter, verse = self._open
+        text = clean_verse_text(raw)
+        # Un verset resté ouvert d'une page précédente n'est gardé que s'il a du texte
+        # (ou un numéro non nul), comme dans l'ancien parseur
+        if closed_on_new_page and not (text or verse):
+            return
+        self.verses.append((book, chapter, verse, text))
+
+    def _tail_start(self, window: str, lower: int) -> int:
+        """Début de la zone pouvant contenir un en-tête pas encore complet"""
+        i = len(window)
+        while i > lower and window[i - 1] in HEADER_TAIL_CHARS:
+            i -= 1
+        return max(lower, i - self._max_name)
+
+    def feed(self, page_text: str) -> None:
+        if not page_text:
+            return
+        self._pages += 1
+        # Espace entre pages pour ne pas coller les mots
+        window = self._tail + ' ' + page_text
+        pos = 0
+
+        for m in self._header.finditer(window):
+            if self._open:
+                self._chunks.append(window[pos:m.start()])
+                self._close(''.join(self._chunks), self._open_page < self._pages)
+            self._chunks = []
+            self._open = (m.group(1), int(m.group(2)), int(m.group(3)))
+            self._open_page = self._pages
+            pos = m.end()
+
+        cut = self._tail_start(window, pos)
+        if self._open and cut > pos:
+            self._chunks.append(window[pos:cut])
+        self._tail = window[cut:]
+
+    def finish(self) -> List[Tuple[str, int, int, str]]:
+        """Enregistre le dernier verset ouvert et retourne tous les versets"""
+        if self._open:
+            raw = ''.join(self._chunks) + self._tail
+            if raw:
+                book, chapter, verse = self._open
+                self.verses.append((book, chapter, verse, clean_verse_text(raw)))
+            self._open = None
+        self._chunks = []
+        self._tail = ''
+        return self.verses
+
+
+def scan_pages(pages: Iterable[str], book_names: Iterable[str]) -> List[Tuple[str, int, int, str]]:
+    """Découpe une suite de textes de pages en versets"""
+    scanner = VerseScanner(book_names)
+    for text in pages:
+        scanner.feed(text)
+    return scanner.finish()
@@ -0,0 +1,286 @@
+"""
+Versification de référence du canon catholique (73 livres) et planification des trous
+CHAPTER_VERSES donne le nombre de versets de chaque chapitre, par position de livre
+(bible_books.position, même ordre que BOOK_NUMBER_TO_NAME dans crampon_xml.py)
+Découpage des chapitres identique à bible_books: Esther en 16 chapitres (Vulgate),
+Daniel en 14 avec les parties grecques (Dn 3 de 100 versets), Joël en 4, Malachie en 4;
+ailleurs la numérotation courante des versets (Psaumes sans les titres)
+
+plan_gaps compare localement ces comptes aux clés déjà chargées (VerseKeySet) et ne
+retient que les chapitres auxquels il manque des versets
+
+Usage: python scripts/versification.py [translation_id]
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from verse_keys import VerseKeySet
+
+CHAPTER_VERSES: Dict[int, Tuple[int, ...]] = {
+    # Genèse
+    1: (31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18, 34, 24, 20, 67, 34,
+        35, 46, 22, 35, 43, 55, 32, 20, 31, 29, 43, 36, 30, 23, 23, 57, 38, 34, 34, 28, 34, 31, 22, 33, 26),
+    # Exode
+    2: (22, 25, 22, 31, 23, 30, 25, 32, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 26, 36, 31, 33, 18, 40,
+        37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38),
+    # Lévitique
+    3: (17, 16, 17, 35, 19, 30, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27, 24, 33, 44, 23, 55,
+        46, 34),
+    # Nombres
+    4: (54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 50, 13, 32, 22, 29, 35, 41, 30, 25, 18,
+        65, 23, 31, 40, 16, 54, 42, 56, 29, 34, 13),
+    # Deutéronome
+    5: (46, 37, 29, 49, 33, 25, 26, 20, 29, 22, 32, 32, 18, 29, 23, 22, 20, 22, 21, 20, 23, 30, 25, 22, 19,
+        19, 26, 68, 29, 20, 30, 52, 29, 12),
+    # Josué
+    6: (18, 24, 17, 24, 15, 27, 26, 35, 27, 43, 23, 24, 33, 15, 63, 10, 18, 28, 51, 9, 45, 34, 16, 33),
+    # Juges
+    7: (36, 23, 31, 24, 31, 40, 25, 35, 57, 18, 40, 15, 25, 20, 20, 31, 13, 31, 30, 48, 25),
+    # Ruth
+    8: (22, 23, 18, 22),
+    # 1 Samuel
+    9: (28, 36, 21, 22, 12, 21, 17, 22, 27, 27, 15, 25, 23, 52, 35, 23, 58, 30, 24, 42, 15, 23, 29, 22, 44,
+        25, 12, 25, 11, 31, 13),
+    # 2 Samuel
+    10: (27, 32, 39, 12, 25, 23, 29, 18, 13, 19, 27, 31, 39, 33, 37, 23, 29, 33, 43, 26, 22, 51, 39, 25),
+    # 1 Rois
+    11: (53, 46, 28, 34, 18, 38, 51, 66, 28, 29, 43, 33, 34, 31, 34, 34, 24, 46, 21, 43, 29, 53),
+    # 2 Rois
+    12: (18, 25, 27, 44, 27, 33, 20, 29, 37, 36, 21, 21, 25, 29, 38, 20, 41, 37, 37, 21, 26, 20, 37, 20, 30),
+    # 1 Chroniques
+    13: (54, 55, 24, 43, 26, 81, 40, 40, 44, 14, 47, 40, 14, 17, 29, 43, 27, 17, 19, 8, 30, 19, 32, 31, 31,
+         32, 34, 21, 30),
+    # 2 Chroniques
+    14: (17, 18, 17, 22, 14, 42, 22, 18, 31, 19, 23, 16, 22, 15, 19, 14, 19, 34, 11, 37, 20, 12, 21, 27, 28,
+         23, 9, 27, 36, 27, 21, 33, 25, 33, 27, 23),
+    # Esdras
+    15: (11, 70, 13, 24, 17, 22, 28, 36, 15, 44),
+    # Néhémie
+    16: (11, 20, 32, 23, 19, 19, 73, 18, 38, 39, 36, 47, 31),
+    # Tobie
+    17: (22, 14, 17, 21, 22, 18, 17, 21, 6, 13, 19, 22, 18, 15),
+    # Judith
+    18: (16, 28, 10, 15, 24, 21, 32, 36, 14, 23, 23, 20, 20, 19, 14, 25),
+    # Esther (additions grecques en 10,4-16,24)
+    19: (22, 23, 15, 17, 14, 14, 10, 17, 32, 13, 12, 6, 18, 19, 19, 24),
+    # 1 Maccabées
+    20: (64, 70, 60, 61, 68, 63, 50, 32, 73, 89, 74, 53, 53, 49, 41, 24),
+    # 2 Maccabées
+    21: (36, 32, 40, 50, 27, 31, 42, 36, 29, 38, 38, 45, 26, 46, 39),
+    # Job
+    22: (22, 13, 26, 21, 27, 30, 21, 22, 35, 22, 20, 25, 28, 22, 35, 22, 16, 21, 29, 29, 34, 30, 17, 25, 6,
+         14, 23, 28, 25, 31, 40, 22, 33, 37, 16, 33, 24, 41, 30, 24, 34, 17),
+    # Psaumes
+    23: (6, 12, 8, 8, 12, 10, 17, 9, 20, 18, 7, 8, 6, 7, 5, 11, 15, 50, 14, 9, 13, 31, 6, 10, 22,
+         12, 14, 9, 11, 12, 24, 11, 22, 22, 28, 12, 40, 22, 13, 17, 13, 11, 5, 26, 17, 11, 9, 14, 20, 23,
+         19, 9, 6, 7, 23, 13, 11, 11, 17, 12, 8, 12, 11, 10, 13, 20, 7, 35, 36, 5, 24, 20, 28, 23, 10,
+         12, 20, 72, 13, 19, 16, 8, 18, 12, 13, 17, 7, 18, 52, 17, 16, 15, 5, 23, 11, 13, 12, 9, 9, 5,
+         8, 28, 22, 35, 45, 48, 43, 13, 31, 7, 10, 10, 9, 8, 18, 19, 2, 29, 176, 7, 8, 9, 4, 8, 5,
+         6, 5, 6, 8, 8, 3, 18, 3, 3, 21, 26, 9, 8, 24, 13, 10, 7, 12, 15, 21, 10, 20, 14, 9, 6),
+    # Proverbes
+    24: (33, 22, 35, 27, 23, 35, 27, 36, 18, 32, 31, 28, 25, 35, 33, 33, 28, 24, 29, 30, 31, 29, 35, 34, 28,
+         28, 27, 28, 27, 33, 31),
+    # Ecclésiaste (Qohélet)
+    25: (18, 26, 22, 16, 20, 12, 29, 17, 18, 20, 10, 14),
+    # Cantique
+    26: (17, 17, 11, 16, 16, 13, 13, 14),
+    # Sagesse
+    27: (16, 24, 19, 20, 23, 25, 30, 21, 18, 21, 26, 27, 19, 31, 19, 29, 21, 25, 22),
+    # Siracide
+    28: (30, 18, 31, 31, 15, 37, 36, 19, 18, 31, 34, 18, 26, 27, 20, 30, 32, 33, 30, 32, 28, 27, 28, 34, 26,
+         29, 30, 26, 28, 25, 31, 24, 33, 26, 24, 27, 31, 34, 35, 30, 27, 25, 33, 23, 26, 20, 25, 25, 16, 29,
+         30),
+    # Isaïe
+    29: (31, 22, 26, 6, 30, 13, 25, 22, 21, 34, 16, 6, 22, 32, 9, 14, 14, 7, 25, 6, 17, 25, 18, 23, 12,
+         21, 13, 29, 24, 33, 9, 20, 24, 17, 10, 22, 38, 22, 8, 31, 29, 25, 28, 28, 25, 13, 15, 22, 26, 11,
+         23, 15, 12, 17, 13, 12, 21, 14, 21, 22, 11, 12, 19, 12, 25, 24),
+    # Jérémie
+    30: (19, 37, 25, 31, 31, 30, 34, 22, 26, 25, 23, 17, 27, 22, 21, 21, 27, 23, 15, 18, 14, 30, 40, 10, 38,
+         24, 22, 17, 32, 24, 40, 44, 26, 22, 19, 32, 21, 28, 18, 16, 18, 22, 13, 30, 5, 28, 7, 47, 39, 46,
+         64, 34),
+    # Lamentations
+    31: (22, 22, 66, 22, 22),
+    # Baruch (Lettre de Jérémie en 6)
+    32: (22, 35, 38, 37, 9, 72),
+    # Ézéchiel
+    33: (28, 10, 27, 17, 17, 14, 27, 18, 11, 22, 25, 28, 23, 23, 8, 63, 24, 32, 14, 49, 32, 31, 49, 27, 17,
+         21, 36, 26, 21, 26, 18, 32, 33, 31, 15, 38, 28, 23, 29, 49, 26, 20, 27, 31, 25, 24, 23, 35),
+    # Daniel (cantique des trois jeunes gens en 3,24-90, Suzanne en 13, Bel et le dragon en 14)
+    34: (21, 49, 100, 34, 30, 29, 28, 27, 27, 21, 45, 13, 64, 42),
+    # Osée
+    35: (11, 23, 5, 19, 15, 11, 16, 14, 17, 15, 12, 14, 16, 9),
+    # Joël
+    36: (20, 27, 5, 21),
+    # Amos
+    37: (15, 16, 15, 13, 27, 14, 17, 14, 15),
+    # Abdias
+    38: (21,),
+    # Jonas
+    39: (17, 10, 10, 11),
+    # Michée
+    40: (16, 13, 12, 13, 15, 16, 20),
+    # Nahum
+    41: (15, 13, 19),
+    # Habacuc
+    42: (17, 20, 19),
+    # Sophonie
+    43: (18, 15, 20),
+    # Aggée
+    44: (15, 23),
+    # Zacharie
+    45: (21, 13, 10, 14, 11, 15, 14, 23, 17, 12, 17, 14, 9, 21),
+    # Malachie
+    46: (14, 17, 18, 6),
+    # Matthieu
+    47: (25, 23, 17, 25, 48, 34, 29, 34, 38, 42, 30, 50, 58, 36, 39, 28, 27, 35, 30, 34, 46, 46, 39, 51, 46,
+         75, 66, 20),
+    # Marc
+    48: (45, 28, 35, 41, 43, 56, 37, 38, 50, 52, 33, 44, 37, 72, 47, 20),
+    # Luc
+    49: (80, 52, 38, 44, 39, 49, 50, 56, 62, 42, 54, 59, 35, 35, 32, 31, 37, 43, 48, 47, 38, 71, 56, 53),
+    # Jean
+    50: (51, 25, 36, 54, 47, 71, 53, 59, 41, 42, 57, 50, 38, 31, 27, 33, 26, 40, 42, 31, 25),
+    # Actes
+    51: (26, 47, 26, 37, 42, 15, 60, 40, 43, 48, 30, 25, 52, 28, 41, 40, 34, 28, 41, 38, 40, 30, 35, 27, 27,
+         32, 44, 31),
+    # Romains
+    52: (32, 29, 31, 25, 21, 23, 25, 39, 33, 21, 36, 21, 14, 23, 33, 27),
+    # 1 Corinthiens
+    53: (31, 16, 23, 21, 13, 20, 40, 13, 27, 33, 34, 31, 13, 40, 58, 24),
+    # 2 Corinthiens
+    54: (24, 17, 18, 18, 21, 18, 16, 24, 15, 18, 33, 21, 14),
+    # Galates
+    55: (24, 21, 29, 31, 26, 18),
+    # Éphésiens
+    56: (23, 22, 21, 32, 33, 24),
+    # Philippiens
+    57: (30, 30, 21, 23),
+    # Colossiens
+    58: (29, 23, 25, 18),
+    # 1 Thessaloniciens
+    59: (10, 20, 13, 18, 28),
+    # 2 Thessaloniciens
+    60: (12, 17, 18),
+    # 1 Timothée
+    61: (20, 15, 16, 16, 25, 21),
+    # 2 Timothée
+    62: (18, 26, 17, 22),
+    # Tite
+    63: (16, 15, 15),
+    # Philémon
+    64: (25,),
+    # Hébreux
+    65: (14, 18, 19, 16, 14, 20, 28, 13, 28, 39, 40, 29, 25),
+    # Jacques
+    66: (27, 26, 18, 17, 20),
+    # 1 Pierre
+    67: (25, 25, 22, 19, 14),
+    # 2 Pierre
+    68: (21, 22, 18),
+    # 1 Jean
+    69: (10, 29, 24, 21, 21),
+    # 2 Jean
+    70: (13,),
+    # 3 Jean
+    71: (14,),
+    # Jude
+    72: (25,),
+    # Apocalypse
+    73: (20, 29, 22, 11, 14, 17, 17, 13, 21, 11, 19, 17, 18, 20, 8, 21, 18, 24, 21, 15, 27, 21),
+}
+
+
+class ChapterGap(NamedTuple):
+    """Chapitre à (re)demander: versets attendus absents des clés chargées"""
+    book: int  # position du livre
+    chapter: int
+    missing: Tuple[int, ...]  # vide: chapitre absent dont le nombre de versets est inconnu
+
+
+def chapter_count(book: int) -> int:
+    return len(CHAPTER_VERSES.get(book, ()))
+
+
+def verse_count(book: int, chapter: int) -> Optional[int]:
+    """Versets attendus d'un chapitre, None hors du canon"""
+    chapters = CHAPTER_VERSES.get(book, ())
+    return chapters[chapter - 1] if 1 <= chapter <= len(chapters) else None
+
+
+def chapter_gap(existing: VerseKeySet, book: int, chapter: int,
+                expected: Optional[int] = None) -> Optional[ChapterGap]:
+    """
+    Versets manquants d'un chapitre: 1..attendu, plus les trous sous le dernier verset chargé
+    expected: remplace le compte canonique (ex. versification propre à une traduction)
+    Un chapitre sans aucun verset chargé est toujours un trou, même sans compte attendu
+    """
+    if expected is None:
+        expected = verse_count(book, chapter) or 0
+    present = existing.verses(book, chapter)
+    if not present and not expected:
+        return ChapterGap(book, chapter, ())
+    last = max(expected, present[-1] if present else 0)
+    if len(present) >= last:
+        return None
+    loaded = set(present)
+    return ChapterGap(book, chapter, tuple(v for v in range(1, last + 1) if v not in loaded))
+
+
+def plan_gaps(existing: VerseKeySet, books: Optional[Iterable[int]] = None,
+              expected: Optional[Dict[int, Dict[int, int]]] = None) -> List[ChapterGap]:
+    """
+    Ensemble minimal des chapitres à compléter, dans l'ordre canonique
+    books: positions à examiner (défaut: les 73 livres)
+    expected: {position: {chapitre: versets}} prioritaire sur CHAPTER_VERSES
+    """
+    expected = expected or {}
+    gaps = []
+    for book in (sorted(books) if books is not None else CHAPTER_VERSES):
+        overrides = expected.get(book, {})
+        chapters = max([chapter_count(book), *overrides])
+        for chapter in range(1, chapters + 1):
+            gap = chapter_gap(existing, book, chapter, overrides.get(chapter))
+            if gap:
+                gaps.append(gap)
+    return gaps
+
+
+def main():
+    import requests
+    from dotenv import load_dotenv
+    from verse_keys import fetch_verse_keys
+
+    load_dotenv(dotenv_path='.env.local')
+
+    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL', '')
+    supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY', os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY', ''))
+    if not supabase_url or not supabase_key:
+        print("❌ Erreur: Variables d'environnement Supabase manquantes")
+        sys.exit(1)
+
+    headers = {'apikey': supabase_key, 'Authorization': f'Bearer {supabase_key}'}
+    base = f"{supabase_url}/rest/v1"
+    translation_id = sys.argv[1] if len(sys.argv) > 1 else 'crampon'
+
+    response = requests.get(f"{base}/bible_books", headers=headers,
+                            params={'select': 'id,name,position', 'order': 'position'}, timeout=30)
+    response.raise_for_status()
+    books = response.json()
+    names = {b['position']: b['name'] for b in books}
+
+    existing = fetch_verse_keys(base, headers, translation_id, {b['id']: b['position'] for b in books})
+    gaps = plan_gaps(existing, names)
+    expected_total = sum(sum(CHAPTER_VERSES.get(p, ())) for p in names)
+    print(f"📊 {translation_id}: {len(existing)} versets chargés, {expected_total} attendus")
+    for book in sorted({g.book for g in gaps}):
+        book_gaps = [g for g in gaps if g.book == book]
+        missing = sum(len(g.missing) for g in book_gaps)
+        chapters = ', '.join(str(g.chapter) for g in book_gaps)
+        print(f"  {names[book]:<22} {missing:>5} versets manquants, chapitres {chapters}")
+    print(f"\n🔢 {len(gaps)} chapitres à compléter, {sum(len(g.missing) for g in gaps)} versets")
+
+
+if __name__ == '__main__':
+    main()